@@ -0,0 +1,250 @@
+from __future__ import annotations
+import asyncio
+import collections
+import os
+import random
+import time
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+from .ingest import ARRIVED_AT
+
+# Player-lane handlers running at once per worker; further events wait in line
+CONCURRENCY = int(os.getenv("QUIZ_ADMIT_CONCURRENCY", "32"))
+# Waiting player events per worker before new ones are shed (0 = never shed on depth)
+MAX_QUEUE = int(os.getenv("QUIZ_ADMIT_QUEUE", "10000"))
+# Bounds of the retry_after sent with a rejection (seconds)
+MIN_RETRY_AFTER = 1.0
+MAX_RETRY_AFTER = 5.0
+# Longest an admin action waits in drain() for the player events queued before it
+DRAIN_TIMEOUT = 5.0
+# Per-player buckets kept before idle ones are swept
+MIN_SWEEP = 1024
+
+
+def _rate(name: str, default: str) -> Tuple[float, float]:
+    """(rate per second, burst) from QUIZ_ADMIT_<NAME>=rate[/burst]; rate 0 = unlimited."""
+    raw = os.getenv(f"QUIZ_ADMIT_{name}", default)
+    rate, _, burst = raw.partition("/")
+    r = float(rate or 0)
+    return r, float(burst) if burst else max(1.0, r)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """Take one token; 0 when granted, else seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+    def full(self, now: float) -> bool:
+        """Refilled to its burst, i.e. no different from a new bucket."""
+        return self.tokens + (now - self.stamp) * self.rate >= self.burst
+
+
+class Policy:
+    """Limits for one event type: a bucket per player (socket, email) and one overall.
+
+    Per-player buckets that have refilled are dropped whenever the table has doubled
+    since the last sweep, so keys that never come back (emails, sockets that left
+    without a disconnect) cost nothing once idle.
+    """
+
+    def __init__(self, player: Tuple[float, float], overall: Tuple[float, float]):
+        self.player = player
+        self.overall = TokenBucket(*overall) if overall[0] > 0 else None
+        self.players: Dict[Hashable, TokenBucket] = {}
+        self._sweep_at = MIN_SWEEP
+
+    def _sweep(self, now: float) -> None:
+        self.players = {k: b for k, b in self.players.items() if not b.full(now)}
+        self._sweep_at = max(MIN_SWEEP, 2 * len(self.players))
+
+    def take(self, key: Optional[Hashable], now: float) -> float:
+        if key is not None and self.player[0] > 0:
+            bucket = self.players.get(key)
+            if bucket is None:
+                if len(self.players) >= self._sweep_at:
+                    self._sweep(now)
+                bucket = self.players[key] = TokenBucket(*self.player)
+            wait = bucket.take(now)
+            if wait:
+                return wait
+        if self.overall is not None:
+            return self.overall.take(now)
+        return 0.0
+
+
+def default_policies() -> Dict[str, Policy]:
+    return {
+        "submit_answer": Policy(_rate("ANSWER_PLAYER_RATE", "2/4"), _rate("ANSWER_RATE", "0")),
+        "join_quiz": Policy(_rate("JOIN_PLAYER_RATE", "1/5"), _rate("JOIN_RATE", "0")),
+        "lifeline_request": Policy(_rate("LIFELINE_PLAYER_RATE", "1/3"), _rate("LIFELINE_RATE", "0")),
+        "register": Policy(_rate("REGISTER_PLAYER_RATE", "1/3"), _rate("REGISTER_RATE", "0")),
+        "clock_ping": Policy(_rate("CLOCK_PLAYER_RATE", "1/8"), _rate("CLOCK_RATE", "0")),
+    }
+
+
+class Shed(Exception):
+    def __init__(self, event: str, reason: str, retry_after: float):
+        super().__init__(f"{event} shed ({reason}), retry after {retry_after:.2f}s")
+        self.event = event
+        self.reason = reason
+        # spread so the rejected do not all come back at once
+        self.retry_after = round(min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, retry_after)) * (1 + random.random()), 2)
+
+
+class AdmissionControl:
+    """Admission for player events, so admin and display traffic is never stuck behind them.
+
+    Events without a policy (admin_command, admin_join, display_join, ...) are the
+    priority lane: they pass straight through. Player events first take a token from
+    their event type's buckets (per player, then overall), then a slot in the player
+    lane. At most `concurrency` of them run at once; the rest wait in FIFO order. Each
+    player handler runs for a while on the loop, so a queued admin command waits for
+    at most `concurrency` of them, not for the whole storm. An event that finds its
+    line `max_queue` deep or its bucket empty is rejected at once (Shed), with a
+    retry_after taken from the line's drain rate or the bucket.
+
+    Admin actions that end a question (reveal, next) call drain() first, so answers
+    that arrived before them are still handled in order.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, Policy]] = None, concurrency: int = CONCURRENCY, max_queue: int = MAX_QUEUE):
+        self.policies = default_policies() if policies is None else policies
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self.waiting: Dict[str, int] = collections.Counter()
+        self.admitted: Dict[str, int] = collections.Counter()
+        self.shed: Dict[Tuple[str, str], int] = collections.Counter()
+        self._done: Deque[float] = collections.deque(maxlen=256)  # recent completion times (monotonic)
+        self._seq = 0
+        self._inflight: Dict[str, Dict[int, None]] = collections.defaultdict(dict)  # event -> seqs, arrival order
+        self._barriers: List[Tuple[str, int, asyncio.Future]] = []
+
+    def forget(self, key: Hashable) -> None:
+        """Drop the per-player buckets of a socket or player that has gone."""
+        for policy in self.policies.values():
+            policy.players.pop(key, None)
+
+    def _reject(self, event: str, reason: str, retry_after: float) -> Shed:
+        self.shed[(event, reason)] += 1
+        return Shed(event, reason, retry_after)
+
+    async def acquire(self, event: str, key: Optional[Hashable] = None) -> None:
+        """Wait for a player-lane slot for `event`; raises Shed instead of queueing too long."""
+        depth = len(self._waiters)
+        if self.max_queue and depth >= self.max_queue:
+            rate = self.drain_rate()
+            raise self._reject(event, "queue", depth / rate if rate else MIN_RETRY_AFTER)
+        wait = self.policies[event].take(key, time.monotonic())
+        if wait:
+            raise self._reject(event, "rate", wait)
+        if self.active < self.concurrency and not depth:
+            self.active += 1
+            self.admitted[event] += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self.waiting[event] += 1
+        try:
+            await fut  # release() hands its slot over
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()
+            elif fut in self._waiters:
+                self._waiters.remove(fut)
+            raise
+        finally:
+            self.waiting[event] -= 1
+        self.admitted[event] += 1
+
+    def release(self) -> None:
+        self._done.append(time.monotonic())
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    async def run(self, event: str, key: Optional[Hashable], coro_fn, *args):
+        """Run coro_fn(*args) under admission control (straight through for unlimited events)."""
+        if event not in self.policies:
+            return await coro_fn(*args)
+        # events forwarded without a frame stamp count as arriving here
+        token = ARRIVED_AT.set(ARRIVED_AT.get() or time.time())
+        self._seq += 1
+        seq = self._seq
+        inflight = self._inflight[event]
+        inflight[seq] = None
+        try:
+            await self.acquire(event, key)
+            try:
+                return await coro_fn(*args)
+            finally:
+                self.release()
+        finally:
+            del inflight[seq]
+            if self._barriers:
+                self._check_barriers()
+            ARRIVED_AT.reset(token)
+
+    async def drain(self, event: str, timeout: float = DRAIN_TIMEOUT) -> None:
+        """Wait until every `event` that arrived before this call is handled or shed."""
+        if not self._inflight.get(event):
+            return
+        barrier = (event, self._seq, asyncio.get_running_loop().create_future())
+        self._barriers.append(barrier)
+        try:
+            await asyncio.wait_for(asyncio.shield(barrier[2]), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if barrier in self._barriers:
+                self._barriers.remove(barrier)
+
+    def _check_barriers(self) -> None:
+        for barrier in list(self._barriers):
+            event, seq, fut = barrier
+            inflight = self._inflight[event]
+            if not inflight or next(iter(inflight)) > seq:
+                self._barriers.remove(barrier)
+                if not fut.done():
+                    fut.set_result(None)
+
+    def drain_rate(self) -> Optional[float]:
+        """Player events completed per second over the last two seconds (None: too few)."""
+        now = time.monotonic()
+        recent = [t for t in self._done if now - t <= 2.0]
+        if len(recent) < 2:
+            return None
+        return (len(recent) - 1) / max(recent[-1] - recent[0], 1e-3)
+
+    def stats(self) -> Dict:
+        shed: Dict[str, Dict[str, int]] = {}
+        for (event, reason), n in self.shed.items():
+            shed.setdefault(event, {})[reason] = n
+        return {
+            "concurrency": self.concurrency,
+            "maxQueue": self.max_queue,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "waiting": {k: v for k, v in self.waiting.items() if v},
+            "admitted": dict(self.admitted),
+            "shed": shed,
+            "drainPerSec": round(self.drain_rate() or 0.0, 1),
+        }
@@ -0,0 +1,92 @@
+"""Local message broker for multi-worker mode (see cluster.py).
+
+A small Unix-socket relay that stands in for Redis: every worker keeps one
+connection, frames addressed to a worker id go to that worker only and BROADCAST
+frames go to every other worker. Payloads are opaque bytes to the broker.
+"""
+from __future__ import annotations
+import asyncio
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+
+BROADCAST = 0xFFFF
+_HEADER = struct.Struct("!IH")  # payload length, target worker id (or BROADCAST)
+
+
+def encode_frame(target: int, payload: bytes) -> bytes:
+    return _HEADER.pack(len(payload), target) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    length, target = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    payload = await reader.readexactly(length) if length else b""
+    return target, payload
+
+
+class Broker:
+    """Relay frames between worker connections on a Unix socket.
+
+    A worker announces itself with one empty frame whose target is its own id. A
+    reconnecting (restarted) worker replaces its previous connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._workers: Dict[int, asyncio.StreamWriter] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+        os.chmod(self.path, 0o600)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._workers.values()):
+            writer.close()
+        self._workers.clear()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @property
+    def workers(self) -> int:
+        return len(self._workers)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            worker_id, _ = await read_frame(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        stale = self._workers.get(worker_id)
+        if stale is not None:
+            stale.close()
+        self._workers[worker_id] = writer
+        try:
+            while True:
+                target, payload = await read_frame(reader)
+                frame = encode_frame(target, payload)
+                if target == BROADCAST:
+                    peers = [w for wid, w in self._workers.items() if wid != worker_id]
+                else:
+                    peer = self._workers.get(target)
+                    peers = [peer] if peer is not None else []
+                for peer in peers:
+                    peer.write(frame)
+                for peer in peers:
+                    try:
+                        await peer.drain()
+                    except ConnectionError:
+                        pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if self._workers.get(worker_id) is writer:
+                del self._workers[worker_id]
+            writer.close()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+import collections
+import os
+import time
+from typing import Deque, Dict, List, Optional, Tuple
+
+from . import metrics
+
+# Most an answer's time is moved back for the player's network delay (ms)
+MAX_COMPENSATION = max(0.0, float(os.getenv("QUIZ_CLOCK_MAX_COMP_MS", "250"))) / 1000.0
+# Exchanges kept per socket; the one with the shortest round trip is used
+SAMPLES = max(1, int(os.getenv("QUIZ_CLOCK_SAMPLES", "8")))
+# Round trips longer than this are measurement noise (a stalled tab), not latency
+MAX_RTT = 10.0
+# Applied compensations kept for GET /api/admin/clock
+AUDIT_HISTORY = 200
+
+Sample = Tuple[float, float]  # (round trip, client offset) in seconds
+
+
+def _pct(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+class ClockSync:
+    """NTP-style round-trip and clock-offset estimates per socket.
+
+    One exchange is three messages: clock_ping {t0} from the client, clock_pong
+    {t0, t1, t2} back (t1 = frame arrival, t2 = reply time, server clock) and
+    clock_sync {t0, t1, t2, t3} with the client's receive time t3. The round trip
+    is taken on the server clock alone, from the pong (t2) to the arrival of the
+    matching sync, so a wrong client clock cannot skew it. The client's offset,
+    ((t1 - t0) + (t2 - t3)) / 2, is kept for stats; the client applies it itself.
+
+    As in NTP's clock filter, the sample with the shortest round trip out of the
+    last `samples` is the estimate: queueing only ever adds delay. A player saw the
+    question half a round trip late and their answer took the other half to
+    arrive, so compensation() is that round trip, capped at `max_compensation`
+    (a client can always delay its sync to look slower).
+    """
+
+    def __init__(self, max_compensation: float = MAX_COMPENSATION, samples: int = SAMPLES):
+        self.max_compensation = max_compensation
+        self.samples = samples
+        self._pending: Dict[str, float] = {}  # sid -> t2 of the pong awaiting its sync
+        self._samples: Dict[str, Deque[Sample]] = {}
+        self.compensated = 0
+        self.compensated_total = 0.0
+        self.audit: Deque[Dict] = collections.deque(maxlen=AUDIT_HISTORY)
+
+    def pong(self, sid: str, t0, arrived: float) -> Dict:
+        t2 = time.time()
+        self._pending[sid] = t2
+        return {"t0": t0, "t1": arrived, "t2": t2}
+
+    def sync(self, sid: str, data: Dict, arrived: float) -> Optional[Sample]:
+        """Record the exchange a clock_sync completes; None if it matches no pong."""
+        try:
+            t0, t1, t2, t3 = (float(data[k]) for k in ("t0", "t1", "t2", "t3"))
+        except (KeyError, TypeError, ValueError):
+            return None
+        if self._pending.get(sid) != t2:
+            return None
+        del self._pending[sid]
+        rtt = arrived - t2
+        if not 0.0 <= rtt <= MAX_RTT:
+            return None
+        sample = (rtt, ((t1 - t0) + (t2 - t3)) / 2)
+        samples = self._samples.get(sid)
+        if samples is None:
+            samples = self._samples[sid] = collections.deque(maxlen=self.samples)
+        samples.append(sample)
+        metrics.CLOCK_RTT_SECONDS.observe(rtt)
+        return sample
+
+    def estimate(self, sid: str) -> Optional[Sample]:
+        samples = self._samples.get(sid)
+        return min(samples) if samples else None
+
+    def compensation(self, sid: str) -> float:
+        best = self.estimate(sid)
+        return min(best[0], self.max_compensation) if best is not None else 0.0
+
+    def record(self, code: str, pid: str, idx: int, arrived: float, applied: float) -> None:
+        """Note a compensation applied to a locked answer."""
+        self.compensated += 1
+        self.compensated_total += applied
+        metrics.ANSWER_COMPENSATION_SECONDS.observe(applied)
+        self.audit.append({"at": arrived, "code": code, "playerId": pid, "index": idx, "compensationMs": round(applied * 1000, 1)})
+
+    def forget(self, sid: str) -> None:
+        self._pending.pop(sid, None)
+        self._samples.pop(sid, None)
+
+    def stats(self, clients: bool = False) -> Dict:
+        best = {sid: min(s) for sid, s in self._samples.items() if s}
+        rtts = sorted(b[0] for b in best.values())
+        offsets = sorted(b[1] for b in best.values())
+        out = {
+            "maxCompensationMs": self.max_compensation * 1000,
+            "sockets": len(best),
+            "rttMs": {k: round(_pct(rtts, q) * 1000, 1) for k, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))},
+            "maxRttMs": round(rtts[-1] * 1000, 1) if rtts else 0.0,
+            "offsetMs": {k: round(_pct(offsets, q) * 1000, 1) for k, q in (("p10", 0.1), ("p50", 0.5), ("p90", 0.9))},
+            "compensated": self.compensated,
+            "compensatedMs": round(self.compensated_total * 1000, 1),
+            "recent": list(reversed(self.audit)),
+        }
+        if clients:
+            out["clients"] = {sid: {"rttMs": round(b[0] * 1000, 1), "offsetMs": round(b[1] * 1000, 1), "samples": len(self._samples[sid])} for sid, b in best.items()}
+        return out
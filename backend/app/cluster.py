@@ -0,0 +1,427 @@
+"""Multi-process mode: several workers sharing one port, sessions sharded by code.
+
+Usage:
+    python -m backend.app.cluster [--workers N] [--host HOST] [--port PORT]
+
+The launcher starts a local broker (broker.py) and N uvicorn workers on a shared
+listening socket. Each session is owned by exactly one worker (crc32(code) % N) and
+only that worker holds its state. Socket.IO emits travel between workers through a
+pub/sub client manager on the broker. Socket events and HTTP requests that reach a
+worker which does not own the session are forwarded to the owner over the same
+connection. Without QUIZ_WORKERS/QUIZ_BROKER_PATH (plain `uvicorn ...`) everything
+runs in-process as before.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import pickle
+import signal
+import socket
+import tempfile
+import traceback
+import uuid
+import zlib
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from .broker import BROADCAST, Broker, encode_frame, read_frame
+from .ingest import ARRIVED_AT
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, merge_exposition
+
+
+# Seconds a forwarded HTTP request waits for the owning worker before answering 503.
+RPC_TIMEOUT = float(os.getenv("QUIZ_RPC_TIMEOUT", "30"))
+RPC_METHOD = "quiz_rpc"
+ALL = "*"  # route target: run on every worker and merge the JSON responses
+
+
+class BrokerManager(AsyncPubSubManager):
+    """Socket.IO client manager that publishes through the local broker.
+
+    Besides the regular pub/sub traffic it carries addressed RPC messages (socket
+    events and HTTP requests forwarded to a session's owner), handed to `on_rpc`.
+    """
+
+    name = "quizbroker"
+
+    def __init__(self, path: str, worker_id: int, on_rpc: Callable[[Dict], None], channel: str = "socketio", write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self._path = path
+        self._worker_id = worker_id
+        self._on_rpc = on_rpc
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    async def _connection(self):
+        if self._writer is not None and not self._writer.is_closing():
+            return self._reader, self._writer
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            while self._writer is None or self._writer.is_closing():
+                try:
+                    reader, writer = await asyncio.open_unix_connection(self._path)
+                except OSError:
+                    await asyncio.sleep(0.5)
+                    continue
+                writer.write(encode_frame(self._worker_id, b""))
+                self._reader, self._writer = reader, writer
+        return self._reader, self._writer
+
+    async def send(self, target: int, message: Dict) -> None:
+        _, writer = await self._connection()
+        writer.write(encode_frame(target, pickle.dumps(message)))
+        await writer.drain()
+
+    async def _publish(self, data):
+        await self.send(BROADCAST, data)
+
+    async def _listen(self):
+        while True:
+            reader, writer = await self._connection()
+            try:
+                _, payload = await read_frame(reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                writer.close()
+                continue
+            try:
+                message = pickle.loads(payload)
+            except Exception:
+                continue
+            if isinstance(message, dict) and message.get("method") == RPC_METHOD:
+                self._on_rpc(message)
+            else:
+                yield message
+
+
+class Cluster:
+    """Session ownership and forwarding for one worker (a no-op in single-process mode)."""
+
+    def __init__(self, workers: Optional[int] = None, worker_id: Optional[int] = None, broker_path: Optional[str] = None):
+        workers = int(os.getenv("QUIZ_WORKERS", "1")) if workers is None else workers
+        worker_id = int(os.getenv("QUIZ_WORKER_ID", "0")) if worker_id is None else worker_id
+        broker_path = os.getenv("QUIZ_BROKER_PATH", "") if broker_path is None else broker_path
+        self.enabled = workers > 1 and bool(broker_path)
+        self.workers = workers if self.enabled else 1
+        self.worker_id = worker_id if self.enabled else 0
+        self.manager = BrokerManager(broker_path, self.worker_id, self._on_rpc) if self.enabled else None
+        self._handlers: Dict[str, Callable[..., Awaitable[Any]]] = {}
+        self._sid_codes: Dict[str, str] = {}
+        self._chains: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._app = None
+        self.stats = {"forwardedEvents": 0, "forwardedRequests": 0, "servedEvents": 0, "servedRequests": 0}
+
+    # --- ownership ---
+    def owner_of(self, code: str) -> int:
+        return zlib.crc32(str(code).encode("utf-8")) % self.workers
+
+    def owns(self, code: str) -> bool:
+        return not self.enabled or self.owner_of(code) == self.worker_id
+
+    # --- socket events ---
+    def register(self, name: str, handler: Callable[..., Awaitable[Any]]) -> None:
+        self._handlers[name] = handler
+
+    def bind(self, sid: str, code: str) -> Optional[str]:
+        """Record which session a local socket belongs to; returns the previous one."""
+        prev = self._sid_codes.get(sid)
+        self._sid_codes[sid] = code
+        return prev
+
+    def code_of(self, sid: str) -> Optional[str]:
+        return self._sid_codes.get(sid)
+
+    def unbind(self, sid: str) -> Optional[str]:
+        return self._sid_codes.pop(sid, None)
+
+    async def dispatch(self, name: str, code: str, sid: str, data: Any = None) -> None:
+        """Run a registered socket handler on the worker that owns `code`."""
+        if self.owns(code):
+            await self._handlers[name](sid, data)
+            return
+        self.stats["forwardedEvents"] += 1
+        await self.manager.send(self.owner_of(code), {"method": RPC_METHOD, "kind": "event", "name": name, "sid": sid, "data": data, "at": ARRIVED_AT.get()})
+
+    def _on_rpc(self, message: Dict) -> None:
+        kind = message.get("kind")
+        if kind == "reply":
+            fut = self._pending.pop(message.get("id"), None)
+            if fut is not None and not fut.done():
+                fut.set_result(message.get("response"))
+        elif kind == "event":
+            self.stats["servedEvents"] += 1
+            # keep each socket's events in order, like a local connection
+            self._serial(message.get("sid"), self._run_event(message))
+        elif kind == "http":
+            self.stats["servedRequests"] += 1
+            asyncio.ensure_future(self._serve_http(message))
+
+    def _serial(self, key: str, coro: Awaitable[Any]) -> None:
+        prev = self._chains.get(key)
+
+        async def run():
+            if prev is not None:
+                await asyncio.wait([prev])
+            await coro
+
+        task = asyncio.ensure_future(run())
+        self._chains[key] = task
+        task.add_done_callback(partial(self._chain_done, key))
+
+    def _chain_done(self, key: str, task: asyncio.Task) -> None:
+        if self._chains.get(key) is task:
+            del self._chains[key]
+
+    async def _run_event(self, message: Dict) -> None:
+        handler = self._handlers.get(message.get("name"))
+        if handler is None:
+            return
+        token = ARRIVED_AT.set(message.get("at"))  # frame arrival on the receiving worker
+        try:
+            await handler(message.get("sid"), message.get("data"))
+        except Exception:
+            traceback.print_exc()
+        finally:
+            ARRIVED_AT.reset(token)
+
+    # --- HTTP ---
+    def asgi(self, app, route: Callable[[str, str, bytes], Optional[str]]):
+        """Wrap an ASGI app so requests for sessions owned elsewhere are forwarded.
+
+        `route(method, path, body)` returns the session code a request belongs to,
+        ALL for requests that span every session, or None to serve it locally.
+        """
+        self._app = app
+        if not self.enabled:
+            return app
+
+        async def router(scope, receive, send):
+            if scope["type"] != "http":
+                return await app(scope, receive, send)
+            body = await _read_body(receive)
+            target = route(scope["method"], scope["path"], body)
+            if target is None or (target != ALL and self.owns(target)):
+                return await app(scope, _body_receiver(body), send)
+            request = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b""),
+                "headers": [list(h) for h in scope.get("headers") or []],
+                "body": body,
+            }
+            self.stats["forwardedRequests"] += 1
+            if target == ALL:
+                others = [w for w in range(self.workers) if w != self.worker_id]
+                responses = await asyncio.gather(self._run_local(request), *(self._call(w, request) for w in others))
+                response = _merge_responses(list(responses))
+            else:
+                response = await self._call(self.owner_of(target), request)
+            await _send_response(send, response)
+
+        return router
+
+    async def _call(self, worker: int, request: Dict) -> Dict:
+        rid = uuid.uuid4().hex
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[rid] = fut
+        await self.manager.send(worker, {"method": RPC_METHOD, "kind": "http", "id": rid, "from": self.worker_id, "request": request})
+        try:
+            return await asyncio.wait_for(fut, RPC_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._pending.pop(rid, None)
+            return _json_response(503, {"detail": "Quiz worker unavailable"})
+
+    async def _serve_http(self, message: Dict) -> None:
+        try:
+            response = await self._run_local(message["request"])
+        except Exception:
+            traceback.print_exc()
+            response = _json_response(500, {"detail": "Internal Server Error"})
+        await self.manager.send(message["from"], {"method": RPC_METHOD, "kind": "reply", "id": message["id"], "response": response})
+
+    async def _run_local(self, request: Dict) -> Dict:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request["method"],
+            "scheme": "http",
+            "path": request["path"],
+            "raw_path": request["path"].encode("utf-8"),
+            "root_path": "",
+            "query_string": request["query"],
+            "headers": [tuple(h) for h in request["headers"]],
+            "client": None,
+            "server": None,
+        }
+        response: Dict[str, Any] = {"status": 500, "headers": [], "body": b""}
+        chunks: List[bytes] = []
+
+        async def send(event):
+            if event["type"] == "http.response.start":
+                response["status"] = event["status"]
+                response["headers"] = [list(h) for h in event.get("headers") or []]
+            elif event["type"] == "http.response.body":
+                chunks.append(event.get("body", b""))
+
+        await self._app(scope, _body_receiver(request["body"]), send)
+        response["body"] = b"".join(chunks)
+        return response
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        event = await receive()
+        if event["type"] != "http.request":
+            break
+        chunks.append(event.get("body", b""))
+        if not event.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+def _body_receiver(body: bytes):
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    return receive
+
+
+async def _send_response(send, response: Dict) -> None:
+    await send({"type": "http.response.start", "status": response["status"], "headers": [tuple(h) for h in response["headers"]]})
+    await send({"type": "http.response.body", "body": response["body"]})
+
+
+def _json_response(status: int, data: Any) -> Dict:
+    body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    headers = [[b"content-type", b"application/json"], [b"content-length", str(len(body)).encode()]]
+    return {"status": status, "headers": headers, "body": body}
+
+
+def _merge_json(a: Any, b: Any) -> Any:
+    # lists concatenate, counters add up, flags must all hold; anything else keeps the first
+    if isinstance(a, dict) and isinstance(b, dict):
+        out = dict(a)
+        for k, v in b.items():
+            out[k] = _merge_json(out[k], v) if k in out else v
+        return out
+    if isinstance(a, list) and isinstance(b, list):
+        return a + b
+    if isinstance(a, bool) or isinstance(b, bool):
+        return bool(a) and bool(b)
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a + b
+    return a
+
+
+def _content_type(response: Dict) -> str:
+    for name, value in response["headers"]:
+        if bytes(name).lower() == b"content-type":
+            return bytes(value).decode("latin-1")
+    return ""
+
+
+def _merge_responses(responses: List[Dict]) -> Dict:
+    for r in responses:
+        if r["status"] >= 400:
+            return r
+    content_type = _content_type(responses[0])
+    if content_type == METRICS_CONTENT_TYPE:
+        # metrics scrapes: one exposition with every worker's samples
+        body = merge_exposition([r["body"].decode("utf-8") for r in responses]).encode("utf-8")
+        headers = [[b"content-type", METRICS_CONTENT_TYPE.encode()], [b"content-length", str(len(body)).encode()]]
+        return {"status": 200, "headers": headers, "body": body}
+    if content_type.startswith("text/plain"):
+        # line-oriented text (collapsed profiler stacks): concatenated
+        body = b"".join(r["body"] for r in responses)
+        headers = [[b"content-type", content_type.encode("latin-1")], [b"content-length", str(len(body)).encode()]]
+        return {"status": 200, "headers": headers, "body": body}
+    merged: Any = None
+    for i, r in enumerate(responses):
+        try:
+            data = json.loads(r["body"] or b"null")
+        except ValueError:
+            return responses[0]
+        merged = data if i == 0 else _merge_json(merged, data)
+    return _json_response(200, merged)
+
+
+# --- Launcher ---
+def _run_worker(worker_id: int, workers: int, broker_path: str, sock: socket.socket, log_level: str) -> None:
+    # Set before the app module is imported: main.py builds its Cluster from these
+    os.environ["QUIZ_WORKERS"] = str(workers)
+    os.environ["QUIZ_WORKER_ID"] = str(worker_id)
+    os.environ["QUIZ_BROKER_PATH"] = broker_path
+    import uvicorn
+
+    config = uvicorn.Config("backend.app.main:asgi_app", log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+async def _supervise(workers: int, broker_path: str, sock: socket.socket, log_level: str) -> None:
+    broker = Broker(broker_path)
+    await broker.start()
+    ctx = multiprocessing.get_context("spawn")
+    procs: Dict[int, Any] = {}
+
+    def spawn(i: int) -> None:
+        p = ctx.Process(target=_run_worker, args=(i, workers, broker_path, sock, log_level), name=f"quiz-worker-{i}")
+        p.start()
+        procs[i] = p
+
+    for i in range(workers):
+        spawn(i)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), 1.0)
+        except asyncio.TimeoutError:
+            pass
+        for i, p in list(procs.items()):
+            if not p.is_alive() and not stop.is_set():
+                # the replacement takes over the same sessions (ownership is by worker id)
+                print(f"Worker {i} exited with code {p.exitcode}; restarting")
+                spawn(i)
+    for p in procs.values():
+        p.terminate()
+    for p in procs.values():
+        await loop.run_in_executor(None, p.join, 15)
+    await broker.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the quiz backend on several worker processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--broker", default=None, help="Broker Unix socket path (default: QUIZ_BROKER_PATH or a private temp dir)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    broker_path = args.broker or os.getenv("QUIZ_BROKER_PATH") or os.path.join(tempfile.mkdtemp(prefix="quizzer-"), "broker.sock")
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.set_inheritable(True)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers (broker {broker_path})")
+    asyncio.run(_supervise(max(1, args.workers), broker_path, sock, args.log_level))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from engineio import packet as eio_packet
+from socketio import packet as sio_packet
+
+
+# Max per-player sends in flight at once.
+FANOUT_CONCURRENCY = int(os.getenv("QUIZ_FANOUT_CONCURRENCY", "256"))
+# Report progress every N recipients (0 disables intermediate progress).
+FANOUT_PROGRESS_EVERY = int(os.getenv("QUIZ_FANOUT_PROGRESS_EVERY", "1000"))
+
+FanOutItem = Tuple[str, str, Any]  # (sid, event, payload)
+
+
+class FanOut:
+    """Send many per-player messages in one go.
+
+    Each distinct payload is encoded to Socket.IO/Engine.IO packets once; items that
+    pass the *same payload object* share the encoding. Packets for local sockets are
+    queued directly on the Engine.IO socket with bounded concurrency; sids not
+    connected to this process fall back to a regular emit.
+    """
+
+    def __init__(self, sio, concurrency: int = FANOUT_CONCURRENCY, namespace: str = "/"):
+        self._sio = sio
+        self._concurrency = max(1, concurrency)
+        self._namespace = namespace
+        self.last_stats: Optional[Dict] = None
+        self._heads: Dict[str, str] = {}  # event -> packet text before the payload
+
+    def encode(self, event: str, payload: Any) -> List[eio_packet.Packet]:
+        try:
+            # JSON-only payloads skip Socket.IO's recursive binary scan; bytes make
+            # dumps raise and take the attachment-aware path below
+            return self.encode_json(event, self._sio.packet_class.json.dumps(payload, separators=(",", ":")))
+        except TypeError:
+            pass
+        pkt = self._sio.packet_class(sio_packet.EVENT, namespace=self._namespace, data=[event, payload])
+        encoded = pkt.encode()
+        if not isinstance(encoded, list):
+            encoded = [encoded]
+        return [eio_packet.Packet(eio_packet.MESSAGE, p) for p in encoded]
+
+    def encode_json(self, event: str, data_json: str) -> List[eio_packet.Packet]:
+        """Like encode(), for a single argument that is already JSON text."""
+        head = self._heads.get(event)
+        if head is None:
+            head = str(sio_packet.EVENT)
+            if self._namespace != "/":
+                head += self._namespace + ","
+            head = self._heads[event] = head + "[" + json.dumps(event) + ","
+        return [eio_packet.Packet(eio_packet.MESSAGE, head + data_json + "]")]
+
+    async def emit_json(self, sid: str, event: str, data_json: str) -> None:
+        """Send pre-serialized JSON to one sid without re-encoding it."""
+        eio_sid = self._sio.manager.eio_sid_from_sid(sid, self._namespace)
+        if eio_sid is None:
+            await self._sio.emit(event, json.loads(data_json), to=sid, namespace=self._namespace)
+            return
+        for p in self.encode_json(event, data_json):
+            await self._sio.eio.send_packet(eio_sid, p)
+
+    async def send(
+        self,
+        items: Iterable[FanOutItem],
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+        progress_every: int = FANOUT_PROGRESS_EVERY,
+    ) -> Dict:
+        started = time.perf_counter()
+        items = list(items)  # keeps payload objects alive so id() stays unique
+        encodings: Dict[Tuple[str, int], List[eio_packet.Packet]] = {}
+        local: List[Tuple[str, List[eio_packet.Packet]]] = []
+        remote: List[FanOutItem] = []
+        manager = self._sio.manager
+        for sid, event, payload in items:
+            eio_sid = manager.eio_sid_from_sid(sid, self._namespace)
+            if eio_sid is None:
+                remote.append((sid, event, payload))
+                continue
+            key = (event, id(payload))
+            pkts = encodings.get(key)
+            if pkts is None:
+                pkts = self.encode(event, payload)
+                encodings[key] = pkts
+            local.append((eio_sid, pkts))
+        encoded_at = time.perf_counter()
+
+        total = len(items)
+        state = {"sent": 0, "failed": 0}
+        eio = self._sio.eio
+        sio = self._sio
+        next_report = progress_every if progress_every > 0 else None
+
+        async def _after_send() -> None:
+            nonlocal next_report
+            state["sent"] += 1
+            if on_progress is not None and next_report is not None and state["sent"] >= next_report:
+                next_report += progress_every
+                try:
+                    await on_progress(state["sent"], total)
+                except Exception:
+                    pass
+
+        local_iter = iter(local)
+        remote_iter = iter(remote)
+
+        async def worker() -> None:
+            # workers share the iterators; next() never awaits, so no item is sent twice
+            for eio_sid, pkts in local_iter:
+                try:
+                    for p in pkts:
+                        await eio.send_packet(eio_sid, p)
+                except Exception:
+                    state["failed"] += 1
+                    continue
+                await _after_send()
+            for sid, event, payload in remote_iter:
+                try:
+                    await sio.emit(event, payload, to=sid, namespace=self._namespace)
+                except Exception:
+                    state["failed"] += 1
+                    continue
+                await _after_send()
+
+        workers = min(self._concurrency, total)
+        if workers:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finished = time.perf_counter()
+        stats = {
+            "total": total,
+            "sent": state["sent"],
+            "failed": state["failed"],
+            "remote": len(remote),
+            "encodings": len(encodings),
+            "encodeMs": round((encoded_at - started) * 1000, 3),
+            "ms": round((finished - started) * 1000, 3),
+        }
+        self.last_stats = stats
+        return stats
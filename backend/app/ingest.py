@@ -0,0 +1,120 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import os
+import time
+import traceback
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Seconds the consumer lingers after the first queued answer, so a burst lands in one batch
+BATCH_LINGER = float(os.getenv("QUIZ_ANSWER_BATCH_MS", "2")) / 1000.0
+# Most answers handled in one batch
+BATCH_MAX = max(1, int(os.getenv("QUIZ_ANSWER_BATCH_MAX", "1000")))
+
+# When the Socket.IO frame being handled came off the socket (time.time()). Tasks copy
+# the context they were created in, so the stamp follows the frame into its handler.
+ARRIVED_AT: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("arrived_at", default=None)
+
+
+def arrived_at() -> float:
+    """Arrival time of the frame being handled (now, outside a socket event)."""
+    return ARRIVED_AT.get() or time.time()
+
+
+class ArrivalStampMixin:
+    """Engine.IO server mixin stamping each message before its handler task is queued.
+
+    Engine.IO starts one task per message; the stamp is taken before that, so time a
+    frame spends waiting for the event loop is not counted against it.
+    """
+
+    async def _trigger_event(self, event, *args, **kwargs):
+        if event != "message":
+            return await super()._trigger_event(event, *args, **kwargs)
+        token = ARRIVED_AT.set(time.time())
+        try:
+            return await super()._trigger_event(event, *args, **kwargs)
+        finally:
+            ARRIVED_AT.reset(token)
+
+
+Batch = List[Any]
+
+
+class AnswerIngest:
+    """Per-session answer queue with one consumer task draining it in batches.
+
+    put() only appends, so the socket handler returns at once. The consumer waits
+    `linger` seconds after the first item, then hands up to `max_batch` items at a
+    time to `process(code, batch)`. process must lock the whole batch before its first
+    await: flush() relies on that to make every answer queued so far visible, e.g.
+    right before a reveal.
+    """
+
+    def __init__(self, process: Callable[[str, Batch], Awaitable[None]], linger: float = BATCH_LINGER, max_batch: int = BATCH_MAX):
+        self._process = process
+        self.linger = max(0.0, linger)
+        self.max_batch = max(1, max_batch)
+        self._queues: Dict[str, Batch] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.batches = 0
+        self.items = 0
+
+    def put(self, code: str, item: Any) -> None:
+        queue = self._queues.get(code)
+        if queue is None:
+            queue = self._queues[code] = []
+        queue.append(item)
+        if code not in self._tasks:
+            self._tasks[code] = asyncio.create_task(self._consume(code))
+
+    def depth(self, code: Optional[str] = None) -> int:
+        if code is not None:
+            return len(self._queues.get(code) or ())
+        return sum(len(q) for q in self._queues.values())
+
+    def _take(self, code: str) -> Batch:
+        queue = self._queues.get(code) or []
+        batch = queue[:self.max_batch]
+        del queue[:self.max_batch]
+        if not queue:
+            self._queues.pop(code, None)
+        return batch
+
+    async def _run(self, code: str, batch: Batch) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            await self._process(code, batch)
+        except Exception:
+            traceback.print_exc()
+
+    async def _consume(self, code: str) -> None:
+        try:
+            while self._queues.get(code):
+                if self.linger:
+                    await asyncio.sleep(self.linger)
+                batch = self._take(code)  # empty if a flush() got there first
+                if batch:
+                    await self._run(code, batch)
+        finally:
+            self._tasks.pop(code, None)
+
+    async def flush(self, code: str) -> None:
+        """Process everything queued for `code` now, without waiting for the consumer."""
+        while self._queues.get(code):
+            await self._run(code, self._take(code))
+
+    def discard(self, code: Optional[str] = None) -> None:
+        """Drop queued answers (session deleted or reset)."""
+        codes = [code] if code is not None else list(self._queues)
+        for c in codes:
+            self._queues.pop(c, None)
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.depth(),
+            "batches": self.batches,
+            "answers": self.items,
+            "avgBatch": round(self.items / self.batches, 1) if self.batches else 0.0,
+        }
@@ -0,0 +1,173 @@
+from __future__ import annotations
+import json
+import os
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from . import storage
+
+
+# Number of journal records after which a session snapshot (compaction) is requested.
+JOURNAL_COMPACT_EVERY = int(os.getenv("QUIZ_JOURNAL_COMPACT_EVERY", "500"))
+# fsync every record (survives power loss, not just a process crash). Off by default.
+JOURNAL_FSYNC = os.getenv("QUIZ_JOURNAL_FSYNC", "0").lower() in ("1", "true", "yes")
+
+
+def _journal_dir() -> str:
+    path = os.path.join(storage.get_data_dir(), "journal")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _journal_path(code: str) -> str:
+    return os.path.join(_journal_dir(), f"{str(code).upper()}.log")
+
+
+def _rotated(code: str) -> List[Tuple[int, str]]:
+    """(last sequence, path) of the logs rotated aside for a snapshot, oldest first."""
+    prefix = f"{str(code).upper()}.log."
+    out = []
+    for name in os.listdir(_journal_dir()):
+        if not name.startswith(prefix):
+            continue
+        suffix = name[len(prefix):]
+        if suffix == "old":  # rotated by older versions: predates every numbered log
+            out.append((-1, os.path.join(_journal_dir(), name)))
+        elif suffix.isdigit():
+            out.append((int(suffix), os.path.join(_journal_dir(), name)))
+    out.sort()
+    return out
+
+
+class SessionJournal:
+    """Append-only per-session event log (JSON lines) under QUIZ_DATA_DIR/journal.
+
+    Every record carries a per-session sequence number. A session snapshot stores the
+    last sequence it contains (QuizSession.journal_seq), so replay only applies newer
+    records. Compaction renames the live log to `<code>.log.<seq>` right before a
+    snapshot is taken; the persist thread deletes it once the snapshot is on disk.
+    If that write fails the rotated logs stay and are replayed in sequence order.
+    """
+
+    def __init__(self, compact_every: int = JOURNAL_COMPACT_EVERY, fsync: bool = JOURNAL_FSYNC):
+        self._compact_every = max(1, compact_every)
+        self._fsync = fsync
+        self._seq: Dict[str, int] = {}
+        self._since_compact: Dict[str, int] = {}
+        self._files: Dict[str, IO[str]] = {}
+
+    def seq(self, code: str) -> int:
+        return self._seq.get(code, 0)
+
+    def set_seq(self, code: str, seq: int) -> None:
+        self._seq[code] = max(self._seq.get(code, 0), int(seq))
+
+    def append(self, code: str, op: str, **fields) -> bool:
+        """Append one record. Returns True when the session is due for compaction."""
+        seq = self._seq.get(code, 0) + 1
+        self._seq[code] = seq
+        f = self._files.get(code)
+        if f is None:
+            f = open(_journal_path(code), "a", encoding="utf-8")
+            self._files[code] = f
+        fields["s"] = seq
+        fields["op"] = op
+        f.write(json.dumps(fields, separators=(",", ":"), ensure_ascii=False) + "\n")
+        f.flush()
+        if self._fsync:
+            os.fsync(f.fileno())
+        n = self._since_compact.get(code, 0) + 1
+        self._since_compact[code] = n
+        return n >= self._compact_every
+
+    def append_many(self, code: str, op: str, records: List[Dict]) -> bool:
+        """Append several records of one op with a single write (and fsync)."""
+        if not records:
+            return False
+        seq = self._seq.get(code, 0)
+        lines = []
+        for fields in records:
+            seq += 1
+            fields["s"] = seq
+            fields["op"] = op
+            lines.append(json.dumps(fields, separators=(",", ":"), ensure_ascii=False) + "\n")
+        self._seq[code] = seq
+        f = self._files.get(code)
+        if f is None:
+            f = open(_journal_path(code), "a", encoding="utf-8")
+            self._files[code] = f
+        f.write("".join(lines))
+        f.flush()
+        if self._fsync:
+            os.fsync(f.fileno())
+        n = self._since_compact.get(code, 0) + len(records)
+        self._since_compact[code] = n
+        return n >= self._compact_every
+
+    def _close(self, code: str) -> None:
+        f = self._files.pop(code, None)
+        if f is not None:
+            f.close()
+
+    def begin_compaction(self, code: str) -> int:
+        """Rotate the live log aside; returns the last sequence number it covers.
+
+        The log is renamed to `<code>.log.<seq>` (no data is copied), so records
+        appended from now on go to a fresh live log. Runs on the event loop.
+        """
+        self._close(code)
+        self._since_compact[code] = 0
+        seq = self._seq.get(code, 0)
+        live = _journal_path(code)
+        try:
+            os.replace(live, f"{live}.{seq}")
+        except FileNotFoundError:
+            pass
+        return seq
+
+    def end_compaction(self, code: str, seq: int) -> None:
+        """Delete the rotated logs a snapshot up to `seq` made redundant. Only touches
+        rotated files, so it can run on the thread that wrote the snapshot."""
+        for n, path in _rotated(code):
+            if n <= seq:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def read(self, code: str, after: int = 0) -> Iterator[Dict]:
+        """Yield records with sequence > `after`, oldest first. Torn trailing lines are skipped."""
+        # rotated logs a failed snapshot left behind come first, then the live one
+        paths = [path for _, path in _rotated(code)] + [_journal_path(code)]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except Exception:
+                        continue
+                    if int(rec.get("s") or 0) > after:
+                        yield rec
+
+    def codes(self) -> list:
+        out = set()
+        for name in os.listdir(_journal_dir()):
+            code, sep, _ = name.partition(".log")
+            if sep:
+                out.add(code)
+        return sorted(out)
+
+    def delete(self, code: Optional[str] = None) -> None:
+        codes = [code] if code is not None else list(set(self._seq) | set(self.codes()))
+        for c in codes:
+            self._close(c)
+            self._seq.pop(c, None)
+            self._since_compact.pop(c, None)
+            for path in [_journal_path(c)] + [path for _, path in _rotated(c)]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def close(self) -> None:
+        for code in list(self._files):
+            self._close(code)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+
+def leaderboard_key(p: Any) -> Tuple:
+    # Sort by: score desc, correct_firsts desc, cumulative_answer_time asc, name asc (id keeps keys unique)
+    return (
+        -(p.score or 0),
+        -(p.correct_firsts or 0),
+        (p.cumulative_answer_time or 0.0),
+        (p.name or ""),
+        p.id,
+    )
+
+
+def leaderboard_row(p: Any) -> Dict:
+    return {
+        "id": p.id,
+        "name": p.name,
+        "email": p.email,
+        "score": p.score,
+        "participantCode": p.participant_code,
+        "firsts": p.correct_firsts,
+        "cumTime": round(float(p.cumulative_answer_time or 0.0), 3),
+    }
+
+
+def public_row(row: Dict, rank: int) -> Dict:
+    # what every player may see about another player: no email / participant code
+    return {"id": row["id"], "name": row["name"], "score": row["score"], "rank": rank}
+
+
+class LeaderboardIndex:
+    """Players ranked by leaderboard_key, maintained incrementally.
+
+    update() is O(log n) per changed player; rank() is O(log n); top-K and full
+    iteration walk the sorted keys without re-sorting. Serialized rows are cached per
+    player and only rebuilt after that player changes.
+    """
+
+    def __init__(self, players: Iterable[Any] = ()):
+        self._sorted = SortedList()
+        self._keys: Dict[str, Tuple] = {}
+        self._players: Dict[str, Any] = {}
+        self._rows: Dict[str, Dict] = {}
+        self.rebuild(players)
+
+    def rebuild(self, players: Iterable[Any]) -> None:
+        self._players = {p.id: p for p in players}
+        self._keys = {pid: leaderboard_key(p) for pid, p in self._players.items()}
+        self._sorted = SortedList(self._keys.values())
+        self._rows = {}
+
+    def update(self, player: Any) -> None:
+        pid = player.id
+        key = leaderboard_key(player)
+        old = self._keys.get(pid)
+        self._players[pid] = player
+        self._rows.pop(pid, None)
+        if old == key:
+            return
+        if old is not None:
+            self._sorted.remove(old)
+        self._sorted.add(key)
+        self._keys[pid] = key
+
+    def update_many(self, players: Iterable[Any]) -> None:
+        """update() for a batch of players (e.g. everyone scored on a reveal).
+
+        A large batch re-sorts the index once instead of moving each key.
+        """
+        players = list(players)
+        if len(players) * 8 < len(self._sorted):
+            for p in players:
+                self.update(p)
+            return
+        for p in players:
+            self._players[p.id] = p
+            self._keys[p.id] = leaderboard_key(p)
+            self._rows.pop(p.id, None)
+        self._sorted = SortedList(self._keys.values())
+
+    def remove(self, pid: str) -> None:
+        old = self._keys.pop(pid, None)
+        if old is not None:
+            self._sorted.remove(old)
+        self._players.pop(pid, None)
+        self._rows.pop(pid, None)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def __contains__(self, pid: str) -> bool:
+        return pid in self._keys
+
+    def rank(self, pid: str) -> Optional[int]:
+        """1-based position of the player, or None if unknown."""
+        key = self._keys.get(pid)
+        if key is None:
+            return None
+        return self._sorted.index(key) + 1
+
+    def ids(self, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        for key in self._sorted.islice(start, stop):
+            yield key[-1]
+
+    def top(self, k: int) -> List[str]:
+        return list(self.ids(0, max(0, int(k))))
+
+    def players(self, start: int = 0, stop: Optional[int] = None) -> List[Any]:
+        return [self._players[pid] for pid in self.ids(start, stop)]
+
+    def row(self, pid: str) -> Dict:
+        row = self._rows.get(pid)
+        if row is None:
+            row = leaderboard_row(self._players[pid])
+            self._rows[pid] = row
+        return row
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Dict]:
+        """Full leaderboard rows in rank order (cached dicts: copy before mutating)."""
+        return [self.row(pid) for pid in self.ids(start, stop)]
+
+    def public_rows(self, start: int = 0, stop: Optional[int] = None) -> List[Dict]:
+        """Ranked rows without contact details, for broadcasts to players."""
+        return [public_row(self.row(pid), start + i + 1) for i, pid in enumerate(self.ids(start, stop))]
+
+    def standings(self, pids: Iterable[str], neighbours: int = 1) -> Iterator[Tuple[str, Dict]]:
+        """(playerId, {rank, score, total, neighbours}) for each of `pids` that is ranked.
+
+        O(log n) per player, so the cost follows the players asked about (e.g. the
+        connected ones), not the size of the quiz; when most players are asked about,
+        one walk in rank order is used instead. `neighbours` lists up to that many
+        players directly above and below.
+        """
+        total = len(self._sorted)
+        public: Dict[int, Dict] = {}  # rows shared by players with common neighbours
+
+        def at(i: int, key: Tuple) -> Dict:
+            row = public.get(i)
+            if row is None:
+                row = public[i] = public_row(self.row(key[-1]), i + 1)
+            return row
+
+        if not isinstance(pids, (set, dict)):
+            pids = set(pids)
+        if len(pids) * 4 >= total:
+            # most players asked about: one walk in rank order beats a lookup each
+            order = list(self._sorted)
+            for i, key in enumerate(order):
+                pid = key[-1]
+                if pid in pids:
+                    around = [at(j, order[j]) for j in range(max(0, i - neighbours), min(total, i + neighbours + 1)) if j != i]
+                    yield pid, {"rank": i + 1, "score": self._players[pid].score, "total": total, "neighbours": around}
+            return
+        for pid in pids:
+            key = self._keys.get(pid)
+            if key is None:
+                continue
+            i = self._sorted.index(key)
+            lo = max(0, i - neighbours)
+            around = [at(lo + j, k) for j, k in enumerate(self._sorted.islice(lo, i + neighbours + 1)) if lo + j != i]
+            yield pid, {"rank": i + 1, "score": self._players[pid].score, "total": total, "neighbours": around}
@@ -0,0 +1,184 @@
+from __future__ import annotations
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Deque, Dict, Optional
+
+from . import metrics
+
+# Seconds between heartbeats of the event loop (each one is also a lag sample)
+LAG_INTERVAL = float(os.getenv("QUIZ_LOOP_LAG_INTERVAL", "0.1"))
+# A heartbeat this late (ms) counts as a stall and the blocking stack is captured (0 = off)
+STALL_THRESHOLD_MS = float(os.getenv("QUIZ_LOOP_STALL_MS", "100"))
+# Stall records kept for GET /api/admin/loop/stalls
+STALL_HISTORY = int(os.getenv("QUIZ_LOOP_STALL_HISTORY", "50"))
+STACK_LIMIT = 40
+
+
+class LoopMonitor:
+    """Measures event-loop lag and captures what blocked the loop during a stall.
+
+    A heartbeat task notes the time every `interval` seconds and records how late it
+    woke up. A watchdog thread checks the heartbeat. When the heartbeat is more than
+    `threshold_ms` overdue, the loop is stuck in synchronous code: the thread takes
+    the loop thread's stack at that moment, together with the activity the running
+    task was tracked under (socket event or HTTP route, session code). Once the loop
+    is back, the heartbeat adds the full stall length to the record.
+
+    Handlers report what they are doing through activity(). That costs one dict store
+    per call, keyed by the current asyncio task.
+    """
+
+    def __init__(self, interval: float = LAG_INTERVAL, threshold_ms: float = STALL_THRESHOLD_MS, history: int = STALL_HISTORY):
+        self.interval = max(0.01, interval)
+        self.threshold = max(0.0, threshold_ms) / 1000.0
+        self.stalls: Deque[Dict] = collections.deque(maxlen=max(1, history))
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        # code -> extra fields for a stall record (e.g. player count); set by the app
+        self.describe: Optional[Callable[[Optional[str]], Dict]] = None
+        self._active: Dict[Any, Dict] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._beat = 0.0
+        self._pending: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # --- activity tracking (loop thread) ---
+    def enter(self, info: Dict) -> Any:
+        task = asyncio.current_task()
+        prev = self._active.get(task)
+        self._active[task] = info
+        return task, prev
+
+    def exit(self, token: Any) -> None:
+        task, prev = token
+        if prev is None:
+            self._active.pop(task, None)
+        else:
+            self._active[task] = prev
+
+    def track(self, name: str, handler: Callable, code_of: Callable[..., Optional[str]]) -> Callable:
+        """Wrap an async socket handler so stalls inside it are attributed to `name`."""
+
+        async def tracked(*args, **kwargs):
+            token = self.enter({"kind": "event", "name": name, "code": code_of(*args)})
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                self.exit(token)
+
+        tracked.__name__ = getattr(handler, "__name__", name)
+        return tracked
+
+    # --- lifecycle ---
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat())
+        if self.threshold > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._beat - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            metrics.LOOP_LAG_SECONDS.observe(lag)
+            metrics.LOOP_LAG_LAST.set(lag)
+            pending, self._pending = self._pending, None
+            if pending is not None:
+                pending["lagMs"] = round(lag * 1000, 1)
+            elif self.threshold and lag > self.threshold:
+                # shorter than the watchdog's poll: no stack, but still on record
+                self.stalls.append({"at": time.time(), "lagMs": round(lag * 1000, 1), "blockedMs": None, "stack": None})
+
+    # --- watchdog (own thread) ---
+    def _watch(self) -> None:
+        poll = max(0.005, min(self.threshold, self.interval) / 4)
+        captured_beat = None
+        while not self._stop.wait(poll):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue <= self.threshold or beat == captured_beat:
+                continue
+            captured_beat = beat
+            try:
+                record = self._capture(overdue)
+            except Exception:
+                continue
+            self._pending = record
+            self.stalls.append(record)
+
+    def _capture(self, overdue: float) -> Dict:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.format_stack(frame, limit=STACK_LIMIT) if frame is not None else []
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        info = dict(self._active.get(task) or {})
+        scope = info.pop("scope", None)
+        if scope is not None:
+            # HTTP: the route is matched after the request was tracked, read it now
+            route = scope.get("route")
+            info["name"] = getattr(route, "path", None) or scope.get("path")
+            info["code"] = (scope.get("path_params") or {}).get("code")
+        record = {
+            "at": time.time(),
+            "lagMs": None,
+            "blockedMs": round(overdue * 1000, 1),
+            "task": task.get_name() if task is not None else None,
+            "kind": info.get("kind"),
+            "name": info.get("name"),
+            "code": info.get("code"),
+            "stack": [line.rstrip("\n") for line in stack],
+        }
+        if self.describe is not None:
+            try:
+                record.update(self.describe(info.get("code")))
+            except Exception:
+                pass
+        return record
+
+    def snapshot(self) -> Dict:
+        return {
+            "thresholdMs": self.threshold * 1000,
+            "lastLagMs": round(self.last_lag * 1000, 1),
+            "maxLagMs": round(self.max_lag * 1000, 1),
+            "stalls": list(reversed(self.stalls)),
+        }
+
+
+class ActivityMiddleware:
+    """ASGI middleware tracking each HTTP request as the running task's activity."""
+
+    def __init__(self, app, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = self.monitor.enter({"kind": "http", "scope": scope})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.exit(token)
@@ -1,20 +1,63 @@
 from __future__ import annotations
-from fastapi import FastAPI, Depends, Header, HTTPException
+from fastapi import FastAPI, Depends, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+import engineio
 import socketio
+import asyncio
+import json
+import math
 import os
 import secrets
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 import random
+import re
 import time
-from typing import Dict, List, Optional
-from . import storage
+from typing import Annotated, Dict, Iterable, List, Optional
+from . import metrics, storage
+from .admission import AdmissionControl, Shed
+from .clocksync import ClockSync
+from .cluster import ALL, Cluster
+from .fanout import FanOut
+from .ingest import AnswerIngest, ArrivalStampMixin, arrived_at
+from .journal import SessionJournal
+from .leaderboard import LeaderboardIndex
+from .loop_monitor import ActivityMiddleware, LoopMonitor
+from .profiler import SamplingProfiler
+from .progress import PROGRESS_HZ, AnswersProgress
+from .question_cache import CachedQuestion, QuestionCache, QuestionSetCache, ValidatedQuestionSet
+from .scoring import ProvisionalScores, ScoreTable
+from .session_registry import SessionRegistry
+from .persistence import SessionPersister
 
 
 # --- FastAPI app ---
-GLOBAL_CODE = "GLOBAL"  # single quiz identifier (internal)
-QUIZ_ROOM = "quiz"
-ADMIN_ROOM = "admin"
+GLOBAL_CODE = "GLOBAL"  # default quiz identifier (code-less endpoints and socket joins)
+SESSION_CODE_RE = re.compile(r"^[A-Z0-9_-]{1,32}$")
+
+
+def _session_code(value) -> str:
+    code = str(value or "").strip().upper()
+    return code or GLOBAL_CODE
+
+
+def _path_code(code: str) -> str:
+    return _session_code(code)
+
+
+# {code} of a quiz route, normalized the way socket events normalize data["code"]
+QuizCode = Annotated[str, Depends(_path_code)]
+
+
+# Socket.IO rooms are scoped per session so a broadcast only reaches that quiz's audience
+def quiz_room(code: str) -> str:
+    return f"quiz:{code}"
+
+
+def admin_room(code: str) -> str:
+    return f"admin:{code}"
+
+
 app = FastAPI(title="Quizzer API")
 # CORS: allow ALL origins explicitly (no cookies used, so this is safe)
 app.add_middleware(
@@ -24,9 +67,20 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Event-loop lag and stall capture (see loop_monitor.py); requests are tracked as activities
+loop_monitor = LoopMonitor()
+app.add_middleware(ActivityMiddleware, monitor=loop_monitor)
+# On-demand sampling profiler (see profiler.py); no thread runs until an admin starts it
+profiler = SamplingProfiler()
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 # Per-question max points awarded proportional to remaining time (granular scoring)
 MAX_POINTS_PER_QUESTION = int(os.getenv("MAX_POINTS_PER_QUESTION", "1000"))
+# Leaderboard rows broadcast to players; admins always get the full list
+LEADERBOARD_TOP_K = max(1, int(os.getenv("QUIZ_LEADERBOARD_TOP_K", "20")))
+# Players above/below included in each player's personal leaderboard_rank message
+LEADERBOARD_NEIGHBOURS = 1
 
 
 @app.get("/health")
@@ -79,19 +133,158 @@ class QuizSession(BaseModel):
     # Sudden-death control: restrict answering to a subset of players
     sudden_death_active: bool = False
     sudden_death_allowed: Optional[List[str]] = None
-
-
-def _sort_players_for_leaderboard(players: List[Player]) -> List[Player]:
-    # Sort by: score desc, correct_firsts desc, cumulative_answer_time asc, name asc
-    return sorted(
-        players,
-        key=lambda p: (
-            -(p.score or 0),
-            -(p.correct_firsts or 0),
-            (p.cumulative_answer_time or 0.0),
-            (p.name or ""),
-        ),
-    )
+    # Last journal sequence number contained in this snapshot (see journal.py)
+    journal_seq: int = 0
+    # Ranked player index (not persisted; rebuilt on load). Call ranking.update(p) after
+    # changing a player's score, firsts, cumulative time, name or email.
+    _ranking: LeaderboardIndex = PrivateAttr(default_factory=LeaderboardIndex)
+    # Versioned answers-progress feed for admins (see progress.py)
+    _progress: AnswersProgress = PrivateAttr(default_factory=AnswersProgress)
+    # O(1) registration lookups: lowercased email -> playerId, and the normalized allow-list
+    _email_index: Dict[str, str] = PrivateAttr(default_factory=dict)
+    _allowed_set: set = PrivateAttr(default_factory=set)
+    # (question index, results) of the last reveal, reused for late joiners
+    _reveal_table: Optional[tuple] = PrivateAttr(default=None)
+    # Current question's results, scored as answers are locked (see provisional_scores)
+    _provisional: Optional[ProvisionalScores] = PrivateAttr(default=None)
+    # Player-safe question payloads serialized once per index; invalidate when questions change
+    _question_cache: QuestionCache = PrivateAttr(default_factory=QuestionCache)
+    # Players changed since the last save (None: all of them), so a save can write only
+    # their rows. Call touch([pid]) after changing a player, touch_all() after bulk edits.
+    _dirty_players: Optional[set] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context) -> None:
+        self._ranking.rebuild(self.players.values())
+        self._email_index = {}
+        for p in self.players.values():
+            self.index_email(p)
+        self._allowed_set = {e.lower() for e in self.allowed_emails}
+
+    def index_email(self, player: Player) -> None:
+        key = (player.email or '').lower()
+        if key:
+            # first registration wins, like the previous linear scan
+            self._email_index.setdefault(key, player.id)
+
+    def player_by_email(self, email: str) -> Optional[Player]:
+        pid = self._email_index.get(email.strip().lower())
+        return self.players.get(pid) if pid else None
+
+    def email_allowed(self, email: str) -> bool:
+        # empty list => open registration
+        return not self.allowed_emails or email.strip().lower() in self._allowed_set
+
+    def set_allowed_emails(self, emails: List[str]) -> None:
+        self.allowed_emails = emails
+        self._allowed_set = {e.lower() for e in emails}
+
+    def touch(self, pids: Iterable[str]) -> None:
+        if self._dirty_players is not None:
+            self._dirty_players.update(pids)
+
+    def touch_all(self) -> None:
+        self._dirty_players = None
+
+    def take_dirty_players(self) -> Optional[set]:
+        """Players changed since the previous call (None: all of them), for a save."""
+        dirty, self._dirty_players = self._dirty_players, set()
+        return dirty
+
+    @property
+    def ranking(self) -> LeaderboardIndex:
+        return self._ranking
+
+    @property
+    def progress(self) -> AnswersProgress:
+        return self._progress
+
+    def set_questions(self, questions: List[Question]) -> None:
+        self.questions = questions
+        self._question_cache.invalidate()
+
+    def cached_question(self, index: int) -> CachedQuestion:
+        return self._question_cache.get(index, self.questions[index])
+
+    def provisional_scores(self) -> ProvisionalScores:
+        """The current question's result table, seeded from the locked answers when it
+        belongs to another round (new question, restart, questions replaced)."""
+        q = self.questions[self.current_index]
+        key = (self.current_index, self.question_started_at, q.answer, q.duration)
+        prov = self._provisional
+        if prov is None or prov.key != key:
+            prov = ProvisionalScores(key, q.answer, self.question_started_at, q.duration, MAX_POINTS_PER_QUESTION, self.paused_accumulated)
+            for pid, ans in self.current_answers.items():
+                if pid in self.players:
+                    prov.add(pid, ans, self.current_answer_times.get(pid))
+            self._provisional = prov
+        return prov
+
+    def lock_answer(self, pid: str, answer: str, t: float) -> None:
+        """Record a locked answer and score it provisionally (committed on reveal)."""
+        prov = self.provisional_scores() if 0 <= self.current_index < len(self.questions) else None
+        self.current_answers[pid] = answer
+        self.current_answer_times[pid] = t
+        if prov is not None and pid in self.players:
+            prov.add(pid, answer, t)
+
+    def repause_scores(self) -> None:
+        """Re-derive provisional points after the question's paused total grew."""
+        if self._provisional is not None:
+            self._provisional.repause(self.paused_accumulated)
+
+    def score_table(self) -> ScoreTable:
+        prov = self.provisional_scores()
+        if len(prov) != len(self.current_answers):
+            # answers changed without going through lock_answer: re-seed from them
+            self._provisional = None
+            prov = self.provisional_scores()
+        prov.repause(self.paused_accumulated)
+        return prov.table()
+
+    def reveal_table(self) -> ScoreTable:
+        """Results of the revealed question, computed once (e.g. after a restart)."""
+        cached = self._reveal_table
+        if cached is not None and cached[0] == self.current_index:
+            return cached[1]
+        table = self.score_table()
+        self._reveal_table = (self.current_index, table)
+        return table
+
+    def commit_scores(self) -> ScoreTable:
+        """Award points for the current question and mark it revealed (no I/O).
+
+        Applies the provisional results in one pass and re-ranks the scored players
+        as one batch. Shared by reveal and journal replay so both produce identical
+        scores.
+        """
+        table = self.score_table()
+        players = self.players
+        # Track first-correct for tie-breaks
+        if table.ranked:
+            first_player = players.get(table.ranked[0])
+            if first_player:
+                first_player.correct_firsts = int(first_player.correct_firsts or 0) + 1
+                self.touch((first_player.id,))
+        scored = []
+        for pid, correct, elapsed, awarded in zip(table.player_ids, table.correct, table.elapsed, table.awarded):
+            if not correct:
+                continue
+            player = players[pid]
+            player.score += awarded
+            player.cumulative_answer_time = float(player.cumulative_answer_time or 0.0) + elapsed
+            scored.append(player)
+        self._ranking.update_many(scored)
+        self.touch(p.id for p in scored)
+        self.revealed = True
+        self._reveal_table = (self.current_index, table)
+        return table
+
+
+def _final_results_rows(session: QuizSession) -> List[Dict]:
+    return [
+        {"id": r["id"], "name": r["name"], "score": r["score"], "firsts": r["firsts"], "cumTime": r["cumTime"]}
+        for r in session.ranking.rows()
+    ]
 
 
 # --- Request / Response Models (declared early to avoid forward-ref issues) ---
@@ -105,9 +298,150 @@ def _sort_players_for_leaderboard(players: List[Player]) -> List[Player]:
 ## (Removed duplicate LifelinesPayload definition moved earlier)
 
 
-SESSIONS: Dict[str, QuizSession] = {}
+def _load_session(code: str) -> Optional[QuizSession]:
+    """Build a stored session on first access: snapshot, then its journal replayed on top."""
+    try:
+        data = storage.load_session_dict(code)
+        # a session can exist only as a journal if its first snapshot never made it to disk
+        session = QuizSession(**data) if data is not None else QuizSession(code=code)
+    except Exception:
+        # skip corrupt sessions
+        return None
+    if _replay_journal(session):
+        print(f"Replayed journal for {code}")
+        persister.mark_dirty(code)
+    return session
+
+
+# Only GLOBAL is loaded at startup; other stored sessions load on first access
+SESSIONS = SessionRegistry(_load_session)
 ACTIVE_PLAYER_SOCKETS: Dict[str, str] = {}  # playerId -> sid
 SID_TO_PLAYER: Dict[str, str] = {}  # sid -> playerId
+SOCKET_SESSIONS: Dict[str, Dict] = {}  # sid -> {"code", "playerId", "name", "admin"}, kept by the session owner
+# Session ownership across worker processes (single process unless started via cluster.py)
+cluster = Cluster()
+if cluster.enabled:
+    metrics.set_const_labels({"worker": str(cluster.worker_id)})
+
+
+def _new_session_code() -> str:
+    # 6 chars without look-alikes (0/O, 1/I) so codes are easy to read out in a room
+    alphabet = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+    while True:
+        code = "".join(secrets.choice(alphabet) for _ in range(6))
+        # in multi-worker mode only codes this worker owns (uniqueness is then local)
+        if code not in SESSIONS and cluster.owns(code):
+            return code
+
+
+# Append-only journal for events between snapshots (registrations, answers, lifelines, transitions)
+journal = SessionJournal()
+# Write-behind session persistence: handlers mark sessions dirty, writes are coalesced off-loop
+persister = SessionPersister(SESSIONS.get, journal=journal)
+# Question sets already validated into Question models, keyed by content hash
+question_sets = QuestionSetCache()
+
+
+def _journal(code: str, op: str, **fields) -> None:
+    try:
+        if journal.append(code, op, **fields):
+            persister.mark_dirty(code)
+    except Exception as e:
+        # Fall back to a snapshot so the event is not lost
+        print("Journal append failed:", e)
+        persister.mark_dirty(code)
+
+
+def _journal_many(code: str, op: str, records: List[Dict]) -> None:
+    try:
+        if journal.append_many(code, op, records):
+            persister.mark_dirty(code)
+    except Exception as e:
+        print("Journal append failed:", e)
+        persister.mark_dirty(code)
+
+
+def _journal_state(session: QuizSession, clear_answers: bool = False, reset_lifelines: bool = False) -> None:
+    """Journal an admin transition as absolute values so replay is order-safe."""
+    _journal(
+        session.code,
+        "state",
+        index=session.current_index,
+        active=session.is_active,
+        paused=session.paused,
+        revealed=session.revealed,
+        startedAt=session.question_started_at,
+        pausedAt=session.paused_at,
+        pausedAcc=session.paused_accumulated,
+        sd=session.sudden_death_active,
+        sdAllowed=session.sudden_death_allowed,
+        clear=clear_answers,
+        resetLifelines=reset_lifelines,
+    )
+
+
+def _apply_journal_record(session: QuizSession, rec: Dict) -> None:
+    op = rec.get("op")
+    if op == "register":
+        pid = rec.get("pid")
+        if pid and pid not in session.players:
+            session.players[pid] = Player(id=pid, name=rec.get("name") or "", email=rec.get("email"), participant_code=rec.get("pc"))
+            session.ranking.update(session.players[pid])
+            session.index_email(session.players[pid])
+            session.touch((pid,))
+    elif op == "email":
+        p = session.players.get(rec.get("pid"))
+        if p:
+            p.email = rec.get("email")
+            p.participant_code = rec.get("pc")
+            session.ranking.update(p)
+            session.index_email(p)
+            session.touch((p.id,))
+    elif op == "answer":
+        pid = rec.get("pid")
+        if pid in session.players and rec.get("idx") == session.current_index and pid not in session.current_answers:
+            session.lock_answer(pid, str(rec.get("a")), float(rec.get("t") or 0.0))
+    elif op == "lifeline":
+        p = session.players.get(rec.get("pid"))
+        if p:
+            p.lifelines[rec.get("l")] = False
+            session.touch((p.id,))
+    elif op == "state":
+        session.current_index = int(rec.get("index", session.current_index))
+        session.is_active = bool(rec.get("active"))
+        session.paused = bool(rec.get("paused"))
+        session.revealed = bool(rec.get("revealed"))
+        session.question_started_at = rec.get("startedAt")
+        session.paused_at = rec.get("pausedAt")
+        session.paused_accumulated = float(rec.get("pausedAcc") or 0.0)
+        session.sudden_death_active = bool(rec.get("sd"))
+        session.sudden_death_allowed = rec.get("sdAllowed")
+        if rec.get("clear"):
+            session.current_answers = {}
+            session.progress.reset()
+            session.current_answer_times = {}
+        if rec.get("resetLifelines"):
+            for p in session.players.values():
+                p.lifelines = {"5050": True, "hint": True}
+            session.touch_all()
+    elif op == "reveal":
+        if rec.get("idx") == session.current_index and not session.revealed:
+            session.commit_scores()
+
+
+def _replay_journal(session: QuizSession) -> int:
+    """Apply journal records newer than the snapshot; returns how many were applied."""
+    applied = 0
+    last = session.journal_seq
+    for rec in journal.read(session.code, after=session.journal_seq):
+        try:
+            _apply_journal_record(session, rec)
+            applied += 1
+        except Exception:
+            continue
+        last = max(last, int(rec.get("s") or 0))
+    journal.set_seq(session.code, last)
+    return applied
 
 
 def require_admin(x_admin_token: str = Header(default="")):
@@ -162,79 +496,266 @@ class AllowedEmailsPayload(BaseModel):
 class SnapshotFilePayload(BaseModel):
     file: str
 
+class SnapshotCompactPayload(BaseModel):
+    keep: int = Field(ge=0)
+
 
 class SuddenDeathStartPayload(BaseModel):
     playerIds: Optional[List[str]] = None  # if omitted, include all current top-scoring ones or all players
     topN: Optional[int] = None  # if provided, pick top N by leaderboard
 
 
-@app.post("/api/admin/sudden_death/start")
-async def sudden_death_start(payload: SuddenDeathStartPayload | None = None, _: None = Depends(require_admin)):
-    session = SESSIONS.get(GLOBAL_CODE)
+class ProfileStartPayload(BaseModel):
+    seconds: float = Field(default=10, gt=0)
+    intervalMs: float = Field(default=5, ge=1)
+    function: Optional[str] = None  # only samples with this function on the stack, e.g. submit_answer
+    allThreads: bool = False  # also sample the persister / executor threads
+    wait: bool = False  # answer with the report once the profile is done
+
+
+class CreateQuizPayload(BaseModel):
+    code: Optional[str] = None  # omitted => the global quiz; "" => generate a new code
+
+
+@app.post("/api/admin/quiz/{code}/sudden_death/start")
+async def sudden_death_start(code: QuizCode, payload: SuddenDeathStartPayload | None = None, _: None = Depends(require_admin)):
+    session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
     # Choose eligible players
-    players_sorted = _sort_players_for_leaderboard(list(session.players.values()))
     if payload and payload.playerIds:
         allowed = [pid for pid in payload.playerIds if pid in session.players]
     elif payload and payload.topN:
-        allowed = [p.id for p in players_sorted[: max(0, int(payload.topN))]]
+        allowed = session.ranking.top(payload.topN)
     else:
         # default: all players currently in session
-        allowed = [p.id for p in players_sorted]
+        allowed = list(session.ranking.ids())
     session.sudden_death_active = True
     session.sudden_death_allowed = allowed
-    storage.save_session_dict(GLOBAL_CODE, session.model_dump())
-    await sio.emit("sudden_death", {"active": True, "allowed": allowed}, room=QUIZ_ROOM)
+    _journal_state(session)
+    persister.mark_dirty(code)
+    await sio.emit("sudden_death", {"active": True, "allowed": allowed}, room=quiz_room(code))
     return {"ok": True, "count": len(allowed)}
 
 
-@app.post("/api/admin/sudden_death/stop")
-async def sudden_death_stop(_: None = Depends(require_admin)):
-    session = SESSIONS.get(GLOBAL_CODE)
+@app.post("/api/admin/quiz/{code}/sudden_death/stop")
+async def sudden_death_stop(code: QuizCode, _: None = Depends(require_admin)):
+    session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
     session.sudden_death_active = False
     session.sudden_death_allowed = None
-    storage.save_session_dict(GLOBAL_CODE, session.model_dump())
-    await sio.emit("sudden_death", {"active": False}, room=QUIZ_ROOM)
+    _journal_state(session)
+    persister.mark_dirty(code)
+    await sio.emit("sudden_death", {"active": False}, room=quiz_room(code))
     return {"ok": True}
 
 
-@app.get("/api/admin/final_results")
-async def final_results(_: None = Depends(require_admin)):
-    session = SESSIONS.get(GLOBAL_CODE)
+@app.get("/api/admin/quiz/{code}/final_results")
+async def final_results(code: QuizCode, _: None = Depends(require_admin)):
+    session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
-    lb = _sort_players_for_leaderboard(list(session.players.values()))
     # Provide tie-break info in admin result
-    out = [
-        {
-            "id": p.id,
-            "name": p.name,
-            "score": p.score,
-            "firsts": p.correct_firsts,
-            "cumTime": round(float(p.cumulative_answer_time or 0.0), 3),
-        }
-        for p in lb
-    ]
-    await sio.emit("final_results", {"leaderboard": out}, room=ADMIN_ROOM)
+    out = _final_results_rows(session)
+    await sio.emit("final_results", {"leaderboard": out}, room=admin_room(code))
     return {"leaderboard": out}
 
 
 @app.post("/api/admin/quiz", response_model=CreateQuizResponse)
-async def create_quiz(_: None = Depends(require_admin)):
-    # Backwards compatibility: returns existing global code
-    if GLOBAL_CODE not in SESSIONS:
-        SESSIONS[GLOBAL_CODE] = QuizSession(code=GLOBAL_CODE)
-        storage.save_session_dict(GLOBAL_CODE, SESSIONS[GLOBAL_CODE].model_dump())
-    return {"code": GLOBAL_CODE}
+async def create_quiz(payload: CreateQuizPayload | None = None, _: None = Depends(require_admin)):
+    # Backwards compatibility: without a code, returns the existing global code
+    code = GLOBAL_CODE if payload is None or payload.code is None else payload.code.strip().upper()
+    if not code:
+        code = _new_session_code()
+    elif not SESSION_CODE_RE.match(code):
+        raise HTTPException(422, "Invalid quiz code")
+    if code not in SESSIONS:
+        SESSIONS[code] = QuizSession(code=code)
+        persister.mark_dirty(code)
+    return {"code": code}
+
+
+@app.get("/api/admin/quizzes")
+async def list_quizzes(_: None = Depends(require_admin)):
+    items = []
+    for code in SESSIONS.keys():
+        if not SESSIONS.is_loaded(code):
+            # stored but not touched since startup: listing must not load it
+            items.append({"code": code, "loaded": False})
+            continue
+        session = SESSIONS[code]
+        items.append({
+            "code": code,
+            "players": len(session.players),
+            "questions": len(session.questions),
+            "index": session.current_index,
+            "active": session.is_active,
+            "loaded": True,
+        })
+    return {"items": items}
+
+
+@app.delete("/api/admin/quiz/{code}")
+async def delete_quiz(code: QuizCode, _: None = Depends(require_admin)):
+    if code == GLOBAL_CODE:
+        raise HTTPException(422, "The global quiz cannot be deleted")
+    if code not in SESSIONS:
+        raise HTTPException(404, "Quiz not found")
+    session = SESSIONS.pop(code)
+    if session is not None:  # a quiz nobody loaded has no one connected
+        await _disconnect_session_players(session)
+    answers_in.discard(code)
+    persister.discard(code)
+    journal.delete(code)
+    try:
+        storage.delete_session(code)
+    except Exception:
+        pass
+    await sio.emit("reset", {"code": code}, room=quiz_room(code))
+    return {"ok": True}
 
 # --- Question set management (global) ---
+def _validated_question_set(name: str) -> Optional[ValidatedQuestionSet]:
+    """Load and validate a saved set, or reuse the cached models if its content is unchanged."""
+    meta = storage.question_set_meta(name)
+    if meta is None:
+        return None
+    entry = question_sets.get(meta["name"], meta["hash"])
+    if entry is not None:
+        return entry
+    try:
+        found = storage.read_question_set(name)
+        if found is None:
+            return None
+        meta, arr = found
+        questions = [Question(**item) for item in arr]
+    except Exception:
+        raise HTTPException(422, "Invalid question set format")
+    return question_sets.put(meta["name"], meta["hash"], questions)
+
+
 @app.get("/api/admin/question_sets")
 async def qsets_list(_: None = Depends(require_admin)):
-    items = storage.list_question_sets()
-    return {"items": [{"name": n, "count": c} for n, c in items]}
+    # metadata index: sets are only re-read after their mtime/size changes
+    return {"items": storage.list_question_set_meta()}
+
+
+@app.get("/api/admin/question_sets/cache")
+async def qsets_cache_stats(_: None = Depends(require_admin)):
+    return question_sets.stats()
+
+
+# Sampled when /api/admin/metrics is scraped
+_ROOM_SOCKETS = metrics.Gauge("quiz_connected_sockets", "Sockets in each quiz/admin room", ("room",))
+_SESSIONS = metrics.Gauge("quiz_sessions", "Sessions known to this worker", ("state",))
+_SESSION_LOADS = metrics.Counter("quiz_session_loads_total", "Stored sessions loaded on first access")
+_PLAYERS = metrics.Gauge("quiz_players", "Registered players per loaded session", ("code",))
+_PERSIST_PENDING = metrics.Gauge("quiz_persist_pending", "Sessions waiting for a snapshot write")
+_QSET_CACHE = metrics.Counter("quiz_question_set_cache_total", "Validated question set cache lookups", ("result",))
+_FANOUT_LAST = metrics.Gauge("quiz_fanout_last_seconds", "Duration of the most recent per-player fan-out")
+_ADMIT_QUEUED = metrics.Gauge("quiz_admission_queued", "Player events waiting for a handler slot", ("event",))
+_ADMIT_ACTIVE = metrics.Gauge("quiz_admission_active", "Player event handlers running")
+_ADMIT_SHED = metrics.Counter("quiz_admission_shed_total", "Player events rejected with retry_after", ("event", "reason"))
+_ANSWERS_QUEUED = metrics.Gauge("quiz_answer_queue", "Answers waiting for their batch")
+_ANSWER_BATCHES = metrics.Counter("quiz_answer_batches_total", "Answer batches processed")
+
+
+@metrics.REGISTRY.collector
+def _collect_metrics():
+    rooms = sio.manager.rooms.get("/", {})
+    yield _ROOM_SOCKETS, [((room,), len(sids)) for room, sids in list(rooms.items()) if room and room.startswith(("quiz:", "admin:"))]
+    loaded = SESSIONS.items()
+    yield _SESSIONS, [(("loaded",), len(loaded)), (("known",), len(SESSIONS))]
+    yield _SESSION_LOADS, [((), SESSIONS.loads)]
+    yield _PLAYERS, [((code,), len(session.players)) for code, session in loaded]
+    yield _PERSIST_PENDING, [((), persister.pending)]
+    qstats = question_sets.stats()
+    yield _QSET_CACHE, [(("hit",), qstats["hits"]), (("miss",), qstats["misses"])]
+    if fanout.last_stats:
+        yield _FANOUT_LAST, [((), fanout.last_stats["ms"] / 1000.0)]
+    yield _ADMIT_QUEUED, [((event,), n) for event, n in list(admission.waiting.items())]
+    yield _ADMIT_ACTIVE, [((), admission.active)]
+    yield _ADMIT_SHED, list(admission.shed.items())
+    yield _ANSWERS_QUEUED, [((), answers_in.depth())]
+    yield _ANSWER_BATCHES, [((), answers_in.batches)]
+
+
+def _describe_stall(code: Optional[str]) -> Dict:
+    # runs on the monitor thread: only look at sessions that are already loaded
+    if not code or not SESSIONS.is_loaded(code):
+        return {}
+    session = SESSIONS.get(code)
+    return {"players": len(session.players), "answers": len(session.current_answers)}
+
+
+loop_monitor.describe = _describe_stall
+
+
+@app.get("/api/admin/loop/stalls")
+async def loop_stalls(_: None = Depends(require_admin)):
+    """Event-loop lag and the most recent stalls with the stack that blocked the loop."""
+    worker = {"worker": cluster.worker_id, **loop_monitor.snapshot()}
+    stalls = worker.pop("stalls")
+    for stall in stalls:
+        stall["worker"] = cluster.worker_id
+    return {"stalls": stalls, "workers": [worker]}
+
+
+@app.get("/api/admin/admission")
+async def admission_stats(_: None = Depends(require_admin)):
+    """Player-lane queue depth, running handlers and shed counts per worker."""
+    return {"workers": [{"worker": cluster.worker_id, **admission.stats(), "answerQueue": answers_in.stats()}]}
+
+
+@app.get("/api/admin/clock")
+async def clock_stats(clients: bool = False, _: None = Depends(require_admin)):
+    """Client round trips and clock offsets, and the answer compensations applied, per worker."""
+    return {"workers": [{"worker": cluster.worker_id, **clock.stats(clients)}]}
+
+
+def _profile_report(top: int = 30) -> Dict:
+    return {"workers": [{"worker": cluster.worker_id, **profiler.report(top)}]}
+
+
+@app.post("/api/admin/profile/start")
+async def profile_start(payload: ProfileStartPayload | None = None, _: None = Depends(require_admin)):
+    """Sample the event loop (optionally one function's stacks) for `seconds` on every worker."""
+    payload = payload or ProfileStartPayload()
+    if not profiler.start(payload.seconds, payload.intervalMs, payload.function, all_threads=payload.allThreads):
+        raise HTTPException(409, "Profiler already running")
+    if payload.wait:
+        while profiler.running:
+            await asyncio.sleep(0.1)
+    return _profile_report()
+
+
+@app.post("/api/admin/profile/stop")
+async def profile_stop(_: None = Depends(require_admin)):
+    await asyncio.to_thread(profiler.stop)
+    return _profile_report()
+
+
+@app.get("/api/admin/profile")
+async def profile_report(top: int = Query(default=30, ge=1, le=500), _: None = Depends(require_admin)):
+    """Top functions of the current or last profile (self/total sample counts)."""
+    return _profile_report(top)
+
+
+@app.get("/api/admin/profile/collapsed")
+async def profile_collapsed(_: None = Depends(require_admin)):
+    """Collapsed stacks of the current or last profile, for flamegraph.pl or speedscope."""
+    body = profiler.collapsed()
+    if cluster.enabled:
+        body = "".join(f"worker:{cluster.worker_id};{line}\n" for line in body.splitlines())
+    return PlainTextResponse(body)
+
+
+@app.get("/api/admin/metrics")
+async def metrics_endpoint(_: None = Depends(require_admin)):
+    if not metrics.ENABLED:
+        return PlainTextResponse("# metrics disabled (QUIZ_METRICS=0)\n", media_type=metrics.CONTENT_TYPE)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.post("/api/admin/question_sets/save")
@@ -245,15 +766,10 @@ async def qsets_save(payload: QuestionSetSavePayload, _: None = Depends(require_
 
 @app.post("/api/admin/question_sets/load")
 async def qsets_load(payload: QuestionSetNamePayload, _: None = Depends(require_admin)):
-    arr = storage.load_question_set(payload.name)
-    if arr is None:
+    entry = _validated_question_set(payload.name)
+    if entry is None:
         raise HTTPException(404, "Question set not found")
-    # validate/parse into Question models
-    try:
-        questions = [Question(**item) for item in arr]
-    except Exception:
-        raise HTTPException(422, "Invalid question set format")
-    return {"questions": [q.model_dump() for q in questions]}
+    return {"questions": entry.dumped()}
 
 
 @app.delete("/api/admin/question_sets/{name}")
@@ -264,27 +780,33 @@ async def qsets_delete(name: str, _: None = Depends(require_admin)):
     return {"ok": True}
 
 
-@app.post("/api/admin/question_sets/apply")
-async def qsets_apply(payload: QuestionSetNamePayload, _: None = Depends(require_admin)):
-    # load the set and set it as current questions for the global quiz
-    session = SESSIONS.get(GLOBAL_CODE)
+@app.post("/api/admin/quiz/{code}/question_sets/apply")
+async def qsets_apply(code: QuizCode, payload: QuestionSetNamePayload, _: None = Depends(require_admin)):
+    # load the set and set it as current questions for the quiz
+    session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
-    arr = storage.load_question_set(payload.name)
-    if arr is None:
+    entry = _validated_question_set(payload.name)
+    if entry is None:
         raise HTTPException(404, "Question set not found")
-    try:
-        session.questions = [Question(**item) for item in arr]
-    except Exception:
-        raise HTTPException(422, "Invalid question set format")
-    storage.save_session_dict(GLOBAL_CODE, session.model_dump())
+    session.set_questions(list(entry.questions))
+    persister.mark_dirty(code)
+    await persister.flush(code)
     return {"ok": True, "count": len(session.questions)}
 
-# --- Global (code-less) admin endpoints ---
+# --- Global (code-less) admin endpoints: the GLOBAL quiz ---
+@app.post("/api/admin/question_sets/apply")
+async def qsets_apply_global(payload: QuestionSetNamePayload, _: None = Depends(require_admin)):
+    return await qsets_apply(GLOBAL_CODE, payload, _)
+
 @app.post("/api/admin/questions")
 async def upload_questions_global(payload: QuestionsPayload, _: None = Depends(require_admin)):
     return await upload_questions(GLOBAL_CODE, payload, _)
 
+@app.post("/api/admin/questions/export")
+async def export_questions_global(_: None = Depends(require_admin)):
+    return await export_questions(GLOBAL_CODE, _)
+
 @app.post("/api/admin/start")
 async def start_quiz_global(payload: StartPayload | None = None, _: None = Depends(require_admin)):
     return await start_quiz(GLOBAL_CODE, payload, _)
@@ -313,29 +835,90 @@ async def reset_quiz_global(_: None = Depends(require_admin)):
 async def lifelines_global(payload: LifelinesPayload, _: None = Depends(require_admin)):
     return await set_lifelines(GLOBAL_CODE, payload, _)
 
+@app.post("/api/admin/sudden_death/start")
+async def sudden_death_start_global(payload: SuddenDeathStartPayload | None = None, _: None = Depends(require_admin)):
+    return await sudden_death_start(GLOBAL_CODE, payload, _)
+
+@app.post("/api/admin/sudden_death/stop")
+async def sudden_death_stop_global(_: None = Depends(require_admin)):
+    return await sudden_death_stop(GLOBAL_CODE, _)
+
+@app.get("/api/admin/final_results")
+async def final_results_global(_: None = Depends(require_admin)):
+    return await final_results(GLOBAL_CODE, _)
+
 @app.get("/api/admin/leaderboard")
 async def leaderboard_global(_: None = Depends(require_admin)):
     return await leaderboard(GLOBAL_CODE, _)
 
 @app.post("/api/admin/leaderboard/show")
 async def leaderboard_show_global(_: None = Depends(require_admin)):
-    session = SESSIONS.get(GLOBAL_CODE)
+    return await leaderboard_show(GLOBAL_CODE, _)
+
+@app.post("/api/admin/leaderboard/hide")
+async def leaderboard_hide_global(_: None = Depends(require_admin)):
+    return await leaderboard_hide(GLOBAL_CODE, _)
+
+@app.get("/api/admin/leaderboard/snapshots")
+async def leaderboard_snapshots_list_global(offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1, le=1000), _: None = Depends(require_admin)):
+    return await leaderboard_snapshots_list(GLOBAL_CODE, offset, limit, _)
+
+@app.post("/api/admin/leaderboard/snapshots/apply")
+async def leaderboard_snapshot_apply_global(payload: SnapshotFilePayload, _: None = Depends(require_admin)):
+    return await leaderboard_snapshot_apply(GLOBAL_CODE, payload, _)
+
+@app.post("/api/admin/leaderboard/snapshots/compact")
+async def leaderboard_snapshots_compact_global(payload: SnapshotCompactPayload, _: None = Depends(require_admin)):
+    return await leaderboard_snapshots_compact(GLOBAL_CODE, payload, _)
+
+@app.post("/api/admin/leaderboard/snapshots/clear")
+async def leaderboard_snapshots_clear_global(_: None = Depends(require_admin)):
+    return await leaderboard_snapshots_clear(GLOBAL_CODE, _)
+
+@app.post("/api/admin/leaderboard/reset")
+async def leaderboard_reset_global(_: None = Depends(require_admin)):
+    return await leaderboard_reset(GLOBAL_CODE, _)
+
+@app.get("/api/admin/allowed_emails")
+async def get_allowed_emails_global(_: None = Depends(require_admin)):
+    return await get_allowed_emails(GLOBAL_CODE, _)
+
+@app.post("/api/admin/allowed_emails")
+async def set_allowed_emails_global(payload: AllowedEmailsPayload, _: None = Depends(require_admin)):
+    return await set_allowed_emails(GLOBAL_CODE, payload, _)
+
+@app.get("/api/quiz/validate")
+async def validate_global():
+    return {"valid": True}
+
+@app.post("/api/quiz/register", response_model=RegisterResponse)
+async def register_global(payload: RegisterPayload):
+    return await register_user(GLOBAL_CODE, payload)
+
+@app.get("/api/quiz/leaderboard")
+async def public_leaderboard_global(offset: int = Query(0, ge=0), limit: int = Query(LEADERBOARD_TOP_K, ge=1, le=500)):
+    return await public_leaderboard(GLOBAL_CODE, offset, limit)
+
+# --- Per-session leaderboard / snapshot endpoints ---
+@app.post("/api/admin/quiz/{code}/leaderboard/show")
+async def leaderboard_show(code: QuizCode, _: None = Depends(require_admin)):
+    session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
-    lb = _sort_players_for_leaderboard(list(session.players.values()))
-    payload = [{"id": pl.id, "name": pl.name, "email": pl.email, "score": pl.score, "participantCode": pl.participant_code, "firsts": pl.correct_firsts, "cumTime": round(float(pl.cumulative_answer_time or 0.0), 3)} for pl in lb]
-    await sio.emit("leaderboard_show", payload, room=QUIZ_ROOM)
+    await _broadcast_leaderboard(session, "leaderboard_show")
     return {"ok": True}
 
-@app.post("/api/admin/leaderboard/hide")
-async def leaderboard_hide_global(_: None = Depends(require_admin)):
-    await sio.emit("leaderboard_hide", {}, room=QUIZ_ROOM)
+@app.post("/api/admin/quiz/{code}/leaderboard/hide")
+async def leaderboard_hide(code: QuizCode, _: None = Depends(require_admin)):
+    await sio.emit("leaderboard_hide", {}, room=quiz_room(code))
     return {"ok": True}
 
-@app.get("/api/admin/leaderboard/snapshots")
-async def leaderboard_snapshots_list(_: None = Depends(require_admin)):
-    items = storage.list_leaderboard_snapshots(GLOBAL_CODE)
-    return {"items": items}
+@app.get("/api/admin/quiz/{code}/leaderboard/snapshots")
+async def leaderboard_snapshots_list(code: QuizCode, offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1, le=1000), _: None = Depends(require_admin)):
+    # Served from the snapshot manifest; snapshot files are only opened by load/apply
+    items = storage.list_leaderboard_snapshots(code, offset, limit)
+    total = storage.count_leaderboard_snapshots(code)
+    return {"items": items, "total": total, "offset": offset, "limit": limit}
 
 @app.post("/api/admin/leaderboard/snapshots/load")
 async def leaderboard_snapshot_load(payload: SnapshotFilePayload, _: None = Depends(require_admin)):
@@ -344,9 +927,9 @@ async def leaderboard_snapshot_load(payload: SnapshotFilePayload, _: None = Depe
         raise HTTPException(404, "Snapshot not found")
     return data
 
-@app.post("/api/admin/leaderboard/snapshots/apply")
-async def leaderboard_snapshot_apply(payload: SnapshotFilePayload, _: None = Depends(require_admin)):
-    session = SESSIONS.get(GLOBAL_CODE)
+@app.post("/api/admin/quiz/{code}/leaderboard/snapshots/apply")
+async def leaderboard_snapshot_apply(code: QuizCode, payload: SnapshotFilePayload, _: None = Depends(require_admin)):
+    session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
     data = storage.load_leaderboard_snapshot(payload.file)
@@ -360,32 +943,33 @@ async def leaderboard_snapshot_apply(payload: SnapshotFilePayload, _: None = Dep
     for p in session.players.values():
         key = (p.participant_code or '').lower()
         p.score = code_to_score.get(key, 0)
-    storage.save_session_dict(GLOBAL_CODE, session.model_dump())
+    session.ranking.rebuild(session.players.values())
+    session.touch_all()
+    persister.mark_dirty(code)
+    await persister.flush(code)
     # emit refreshed leaderboard
-    new_lb = sorted(session.players.values(), key=lambda pl: pl.score, reverse=True)
-    payload_out = [{"id": pl.id, "name": pl.name, "email": pl.email, "score": pl.score, "participantCode": pl.participant_code} for pl in new_lb]
-    await sio.emit("leaderboard", payload_out, room=ADMIN_ROOM)
-    await sio.emit("leaderboard", payload_out, room=QUIZ_ROOM)
-    return {"ok": True, "applied": len(new_lb)}
+    payload_out = session.ranking.rows()
+    await _broadcast_leaderboard(session, admin_rows=payload_out)
+    return {"ok": True, "applied": len(payload_out)}
 
-@app.post("/api/admin/leaderboard/reset")
-async def leaderboard_reset_global(_: None = Depends(require_admin)):
-    session = SESSIONS.get(GLOBAL_CODE)
+@app.post("/api/admin/quiz/{code}/leaderboard/reset")
+async def leaderboard_reset(code: QuizCode, _: None = Depends(require_admin)):
+    session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
     # Zero scores for all players
     for p in session.players.values():
         p.score = 0
-    p.correct_firsts = 0
-    p.cumulative_answer_time = 0.0
-    storage.save_session_dict(GLOBAL_CODE, session.model_dump())
+        p.correct_firsts = 0
+        p.cumulative_answer_time = 0.0
+    session.ranking.rebuild(session.players.values())
+    session.touch_all()
+    persister.mark_dirty(code)
+    await persister.flush(code)
     # Broadcast updated leaderboard snapshot
-    lb = sorted(session.players.values(), key=lambda pl: pl.score, reverse=True)
-    payload = [{"id": pl.id, "name": pl.name, "email": pl.email, "score": pl.score, "participantCode": pl.participant_code} for pl in lb]
-    await sio.emit("leaderboard", payload, room=ADMIN_ROOM)
-    await sio.emit("leaderboard", payload, room=QUIZ_ROOM)
+    await _broadcast_leaderboard(session, admin_rows=session.ranking.rows())
     # Ensure any overlay is hidden unless host shows again
-    await sio.emit("leaderboard_hide", {}, room=QUIZ_ROOM)
+    await sio.emit("leaderboard_hide", {}, room=quiz_room(code))
     return {"ok": True}
 
 @app.post("/api/admin/full_reset")
@@ -402,9 +986,18 @@ async def full_reset_global(_: None = Depends(require_admin)):
         pass
     ACTIVE_PLAYER_SOCKETS.clear()
     SID_TO_PLAYER.clear()
-    # Delete persisted sessions and reset in-memory
+    # Delete persisted sessions and journals and reset in-memory (drop any pending writes first)
+    answers_in.discard()
+    persister.discard()
+    codes = list(SESSIONS.keys())
+    if cluster.enabled:
+        # each worker only clears the sessions it owns
+        for code in set(codes) | {c for c in journal.codes() if cluster.owns(c)}:
+            journal.delete(code)
+    else:
+        journal.delete()
     try:
-        for code in list(SESSIONS.keys()):
+        for code in codes:
             try:
                 storage.delete_session(code)
             except Exception:
@@ -412,17 +1005,35 @@ async def full_reset_global(_: None = Depends(require_admin)):
     except Exception:
         pass
     SESSIONS.clear()
-    SESSIONS[GLOBAL_CODE] = QuizSession(code=GLOBAL_CODE)
-    storage.save_session_dict(GLOBAL_CODE, SESSIONS[GLOBAL_CODE].model_dump())
-    # Notify displays/anyone listening
-    await sio.emit("leaderboard_hide", {}, room=QUIZ_ROOM)
-    await sio.emit("reset", {"code": GLOBAL_CODE}, room=QUIZ_ROOM)
+    if cluster.owns(GLOBAL_CODE):
+        SESSIONS[GLOBAL_CODE] = QuizSession(code=GLOBAL_CODE)
+        persister.mark_dirty(GLOBAL_CODE)
+        await persister.flush(GLOBAL_CODE)
+    # Notify displays/anyone listening, in every session's room
+    for code in codes:
+        await sio.emit("leaderboard_hide", {}, room=quiz_room(code))
+        await sio.emit("reset", {"code": code}, room=quiz_room(code))
     return {"ok": True}
 
 
+async def _disconnect_session_players(session: QuizSession) -> int:
+    count = 0
+    for pid in session.players:
+        sid = ACTIVE_PLAYER_SOCKETS.pop(pid, None)
+        if not sid:
+            continue
+        SID_TO_PLAYER.pop(sid, None)
+        try:
+            await sio.disconnect(sid)
+            count += 1
+        except Exception:
+            pass
+    return count
+
+
 @app.post("/api/admin/disconnect_all")
 async def disconnect_all(_: None = Depends(require_admin)):
-    """Disconnect all connected quiz clients (players and displays)."""
+    """Disconnect all connected quiz clients (players and displays) of every quiz."""
     count = 0
     # Disconnect all tracked player sockets
     for sid in list(ACTIVE_PLAYER_SOCKETS.values()):
@@ -433,175 +1044,207 @@ async def disconnect_all(_: None = Depends(require_admin)):
             pass
     ACTIVE_PLAYER_SOCKETS.clear()
     SID_TO_PLAYER.clear()
-    # Also try to clear quiz room by emitting a reset notice (clients may voluntarily disconnect)
-    try:
-        await sio.emit("reset", {"code": GLOBAL_CODE}, room=QUIZ_ROOM)
-    except Exception:
-        pass
+    # Also try to clear quiz rooms by emitting a reset notice (clients may voluntarily disconnect)
+    for code in list(SESSIONS.keys()):
+        try:
+            await sio.emit("reset", {"code": code}, room=quiz_room(code))
+        except Exception:
+            pass
     return {"ok": True, "disconnected": count}
 
 
-@app.post("/api/admin/leaderboard/snapshots/clear")
-async def leaderboard_snapshots_clear(_: None = Depends(require_admin)):
-    """Delete all leaderboard snapshots for the global quiz."""
+@app.post("/api/admin/quiz/{code}/disconnect_all")
+async def disconnect_session(code: QuizCode, _: None = Depends(require_admin)):
+    """Disconnect the connected players of one quiz."""
+    session = SESSIONS.get(code)
+    if not session:
+        raise HTTPException(404, "Quiz not found")
+    count = await _disconnect_session_players(session)
+    await sio.emit("reset", {"code": code}, room=quiz_room(code))
+    return {"ok": True, "disconnected": count}
+
+
+@app.post("/api/admin/quiz/{code}/leaderboard/snapshots/compact")
+async def leaderboard_snapshots_compact(code: QuizCode, payload: SnapshotCompactPayload, _: None = Depends(require_admin)):
+    """Keep only the newest `keep` snapshots of the quiz."""
+    deleted = storage.compact_leaderboard_snapshots(code, payload.keep)
+    return {"ok": True, "deleted": deleted}
+
+
+@app.post("/api/admin/quiz/{code}/leaderboard/snapshots/clear")
+async def leaderboard_snapshots_clear(code: QuizCode, _: None = Depends(require_admin)):
+    """Delete all leaderboard snapshots for the quiz."""
     try:
-        deleted = storage.delete_leaderboard_snapshots(GLOBAL_CODE)
+        deleted = storage.delete_leaderboard_snapshots(code)
     except Exception:
         deleted = 0
     return {"ok": True, "deleted": deleted}
 
-@app.get("/api/admin/allowed_emails")
-async def get_allowed_emails_global(_: None = Depends(require_admin)):
-    sess = SESSIONS.get(GLOBAL_CODE)
+@app.get("/api/admin/quiz/{code}/allowed_emails")
+async def get_allowed_emails(code: QuizCode, _: None = Depends(require_admin)):
+    sess = SESSIONS.get(code)
     if not sess:
         raise HTTPException(404, "Quiz not found")
     return {"emails": sess.allowed_emails}
 
-@app.post("/api/admin/allowed_emails")
-async def set_allowed_emails_global(payload: AllowedEmailsPayload, _: None = Depends(require_admin)):
-    sess = SESSIONS.get(GLOBAL_CODE)
+@app.post("/api/admin/quiz/{code}/allowed_emails")
+async def set_allowed_emails(code: QuizCode, payload: AllowedEmailsPayload, _: None = Depends(require_admin)):
+    sess = SESSIONS.get(code)
     if not sess:
         raise HTTPException(404, "Quiz not found")
     normalized = [e.strip().lower() for e in payload.emails if e.strip()]
     if payload.mode == "append":
         existing = set(sess.allowed_emails)
+        merged = list(sess.allowed_emails)
         for e in normalized:
             if e not in existing:
-                sess.allowed_emails.append(e)
+                existing.add(e)
+                merged.append(e)
+        sess.set_allowed_emails(merged)
     elif payload.mode == "remove":
         remove_set = set(normalized)
-        sess.allowed_emails = [e for e in sess.allowed_emails if e not in remove_set]
+        sess.set_allowed_emails([e for e in sess.allowed_emails if e not in remove_set])
     else:  # replace
-        sess.allowed_emails = normalized
-    storage.save_session_dict(GLOBAL_CODE, sess.model_dump())
+        sess.set_allowed_emails(normalized)
+    persister.mark_dirty(code)
     return {"emails": sess.allowed_emails, "count": len(sess.allowed_emails)}
 
-@app.get("/api/quiz/validate")
-async def validate_global():
-    return {"valid": True}
-
-@app.post("/api/quiz/register", response_model=RegisterResponse)
-async def register_global(payload: RegisterPayload):
-    return await register_user(GLOBAL_CODE, payload)
-
 
 ## (removed duplicate QuestionsPayload definition)
 
 
 @app.post("/api/admin/quiz/{code}/questions")
-async def upload_questions(code: str, payload: QuestionsPayload, _: None = Depends(require_admin)):
+async def upload_questions(code: QuizCode, payload: QuestionsPayload, _: None = Depends(require_admin)):
     session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
-    session.questions = payload.questions
-    storage.save_session_dict(code, session.model_dump())
+    session.set_questions(payload.questions)
+    persister.mark_dirty(code)
+    await persister.flush(code)
     return {"ok": True, "count": len(session.questions)}
 
 
-@app.post("/api/admin/questions/export")
-async def export_questions(_: None = Depends(require_admin)):
-    session = SESSIONS.get(GLOBAL_CODE)
+@app.post("/api/admin/quiz/{code}/questions/export")
+async def export_questions(code: QuizCode, _: None = Depends(require_admin)):
+    session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
     return {"questions": [q.model_dump() for q in session.questions]}
 
 
 @app.get("/api/quiz/{code}/validate")
-async def validate_quiz(code: str):
-    # legacy path param still returns True for backwards compatibility
-    return {"valid": True}
+async def validate_quiz(code: QuizCode):
+    return {"valid": code in SESSIONS}
 
 
 ## (removed duplicate RegisterPayload / RegisterResponse definitions)
 
 
 @app.post("/api/quiz/{code}/register", response_model=RegisterResponse)
-async def register_user(code: str, payload: RegisterPayload):  # legacy path; still supported
+async def register_user(code: QuizCode, payload: RegisterPayload):  # legacy path; still supported
+    try:
+        return await admission.run("register", (payload.email or "").strip().lower() or None, _register_user, code, payload)
+    except Shed as e:
+        raise HTTPException(429, {"message": "Too many registrations, retry shortly", "retryAfter": e.retry_after}, headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+
+async def _register_user(code: str, payload: RegisterPayload):
     session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
     if not payload.email:
         raise HTTPException(422, "Email required")
-    # Allowed list check (case-insensitive)
-    if session.allowed_emails:
-        if payload.email.strip().lower() not in {e.lower() for e in session.allowed_emails}:
-            raise HTTPException(403, "Email not allowed")
+    # Allowed list check (case-insensitive, O(1) set lookup)
+    if not session.email_allowed(payload.email):
+        raise HTTPException(403, "Email not allowed")
     normalized_email = payload.email.strip().lower()
     # Reuse existing player if email already registered (allow reconnect)
-    existing = next((p for p in session.players.values() if (p.email or '').lower() == normalized_email), None)
+    existing = session.player_by_email(normalized_email)
     if existing:
         return {"playerId": existing.id, "participantCode": existing.participant_code or normalized_email}
     # Create new player
     pid = secrets.token_hex(8)
     player = Player(id=pid, name=payload.name, email=payload.email, participant_code=normalized_email)
     session.players[pid] = player
-    # Defer disk write to reduce I/O under load; registration will be persisted
-    # by the next lifecycle event (start/goto/next/reveal/reset) or periodic snapshot.
+    session.ranking.update(player)
+    session.index_email(player)
+    session.touch((pid,))
+    session.progress.record_player(pid, player.name)
+    # Journal instead of a full snapshot; the journal is compacted into the next snapshot.
+    _journal(code, "register", pid=pid, name=player.name, email=player.email, pc=player.participant_code)
     return {"playerId": pid, "participantCode": player.participant_code}
 
 
 @app.get("/api/admin/quiz/{code}/leaderboard")
-async def leaderboard(code: str, _: None = Depends(require_admin)):
+async def leaderboard(code: QuizCode, _: None = Depends(require_admin)):
     session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
-    lb = _sort_players_for_leaderboard(list(session.players.values()))
-    return [{"id": p.id, "name": p.name, "email": p.email, "score": p.score, "participantCode": p.participant_code, "online": bool(ACTIVE_PLAYER_SOCKETS.get(p.id)), "firsts": p.correct_firsts, "cumTime": round(float(p.cumulative_answer_time or 0.0), 3)} for p in lb]
+    return [dict(r, online=bool(ACTIVE_PLAYER_SOCKETS.get(r["id"]))) for r in session.ranking.rows()]
 
 
-@app.get("/api/quiz/leaderboard")
-async def public_leaderboard():
-    session = SESSIONS.get(GLOBAL_CODE)
+@app.get("/api/quiz/{code}/leaderboard")
+async def public_leaderboard(code: QuizCode, offset: int = Query(0, ge=0), limit: int = Query(LEADERBOARD_TOP_K, ge=1, le=500)):
+    session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
-    lb = _sort_players_for_leaderboard(list(session.players.values()))
-    return [{"name": p.name, "score": p.score} for p in lb]
+    items = session.ranking.public_rows(offset, offset + limit)
+    return {"items": items, "total": len(session.ranking), "offset": offset, "limit": limit}
 
 
 ## (removed duplicate StartPayload definition)
 
 
 @app.post("/api/admin/quiz/{code}/start")
-async def start_quiz(code: str, payload: StartPayload | None = None, _: None = Depends(require_admin)):
+async def start_quiz(code: QuizCode, payload: StartPayload | None = None, _: None = Depends(require_admin)):
     session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
+    await _settle_answers(session)  # answers that arrived first still count
     session.is_active = True
     session.paused = False
     # If no questions uploaded yet, guard
     if not session.questions:
         session.current_index = -1
-        storage.save_session_dict(code, session.model_dump())
+        _journal_state(session)
+        persister.mark_dirty(code)
         return {"ok": False, "message": "No questions uploaded"}
     session.current_index = payload.index if payload and payload.index is not None else 0
     session.revealed = False
     session.current_answers = {}
+    session.progress.reset()
     session.question_started_at = time.time()
     session.paused_at = None
     session.paused_accumulated = 0.0
     session.current_answer_times = {}
     # Reset per-player lifelines for the new round (once per round)
+    fresh_status = {"5050": True, "hint": True}  # one shared payload => encoded once
+    notify = []
     for p in session.players.values():
-        p.lifelines = {"5050": True, "hint": True}
+        if p.lifelines != fresh_status:
+            p.lifelines = {"5050": True, "hint": True}
+            session.touch((p.id,))
         # notify connected player of fresh lifeline status
         sid = ACTIVE_PLAYER_SOCKETS.get(p.id)
         if sid:
-            try:
-                await sio.emit("lifeline_status", p.lifelines, to=sid)
-            except Exception:
-                pass
+            notify.append((sid, "lifeline_status", fresh_status))
+    # Journal the new round before the first await: answers ingested meanwhile are
+    # journalled after it and survive its answer reset on replay
+    _journal_state(session, clear_answers=True, reset_lifelines=True)
     # Persist on lifecycle to amortize disk writes.
-    storage.save_session_dict(code, session.model_dump())
+    persister.mark_dirty(code)
+    await fanout.send(notify)
     await emit_current_question(code)
     await _emit_answers_progress(session)
     return {"ok": True}
 
 
 @app.post("/api/admin/quiz/{code}/goto")
-async def goto_question(code: str, payload: GotoPayload, _: None = Depends(require_admin)):
+async def goto_question(code: QuizCode, payload: GotoPayload, _: None = Depends(require_admin)):
     session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
+    await _settle_answers(session)  # answers that arrived first still count
     if not session.questions:
         return {"ok": False, "message": "No questions"}
     target = int(payload.index)
@@ -612,31 +1255,35 @@ async def goto_question(code: str, payload: GotoPayload, _: None = Depends(requi
     session.current_index = target
     session.revealed = False
     session.current_answers = {}
+    session.progress.reset()
     session.current_answer_times = {}
     session.question_started_at = time.time()
     session.paused = False
     session.paused_at = None
     session.paused_accumulated = 0.0
+    _journal_state(session, clear_answers=True)
     # Persist on lifecycle to amortize disk writes.
-    storage.save_session_dict(code, session.model_dump())
+    persister.mark_dirty(code)
     # Hide overlays and broadcast the selected question
-    await sio.emit("leaderboard_hide", {}, room=QUIZ_ROOM)
+    await sio.emit("leaderboard_hide", {}, room=quiz_room(code))
     await emit_current_question(code)
     await _emit_answers_progress(session)
     return {"ok": True, "index": target}
 
 
 @app.post("/api/admin/quiz/{code}/next")
-async def next_question(code: str, _: None = Depends(require_admin)):
+async def next_question(code: QuizCode, _: None = Depends(require_admin)):
     session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
+    await _settle_answers(session)  # answers that arrived first still count
     if not session.questions:
         return {"ok": False, "message": "No questions"}
     # If not yet revealed, do a reveal (once) and do not advance yet
     if not session.revealed and 0 <= session.current_index < len(session.questions):
         await _reveal_answers(session)
-        storage.save_session_dict(code, session.model_dump())
+        persister.mark_dirty(code)
+        await persister.flush(code)
         return {"ok": True, "revealed": True}
     # First next after reset: set to 0 if currently -1
     if session.current_index < 0:
@@ -646,35 +1293,39 @@ async def next_question(code: str, _: None = Depends(require_admin)):
     # Reset per-question state for the new index
     session.revealed = False
     session.current_answers = {}
+    session.progress.reset()
     session.question_started_at = time.time()
     session.paused = False
     session.paused_at = None
     session.paused_accumulated = 0.0
     session.current_answer_times = {}
+    _journal_state(session, clear_answers=True)
     # Persist on lifecycle to amortize disk writes.
-    storage.save_session_dict(code, session.model_dump())
+    persister.mark_dirty(code)
     # Ensure leaderboard is hidden when moving to the next question
-    await sio.emit("leaderboard_hide", {}, room=QUIZ_ROOM)
+    await sio.emit("leaderboard_hide", {}, room=quiz_room(code))
     await emit_current_question(code)
     await _emit_answers_progress(session)
     return {"ok": True}
 
 
 @app.post("/api/admin/quiz/{code}/reveal")
-async def reveal_only(code: str, _: None = Depends(require_admin)):
+async def reveal_only(code: QuizCode, _: None = Depends(require_admin)):
     session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
+    await _settle_answers(session)  # answers that arrived first still count
     if not (0 <= session.current_index < len(session.questions)):
         return {"ok": False, "message": "No active question"}
     await _reveal_answers(session)
-    # Persist on lifecycle to amortize disk writes.
-    storage.save_session_dict(code, session.model_dump())
+    # Scores changed: make sure they are on disk before acknowledging.
+    persister.mark_dirty(code)
+    await persister.flush(code)
     return {"ok": True, "revealed": True}
 
 
 @app.post("/api/admin/quiz/{code}/pause")
-async def pause_quiz(code: str, _: None = Depends(require_admin)):
+async def pause_quiz(code: QuizCode, _: None = Depends(require_admin)):
     session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
@@ -682,40 +1333,46 @@ async def pause_quiz(code: str, _: None = Depends(require_admin)):
     if not session.paused:
         session.paused = True
         session.paused_at = time.time()
-        await sio.emit("paused", {"code": code}, room=QUIZ_ROOM)
+        await sio.emit("paused", {"code": code}, room=quiz_room(code))
     else:
         session.paused = False
         now = time.time()
         if session.paused_at:
             session.paused_accumulated += max(0.0, now - session.paused_at)
         session.paused_at = None
-        await sio.emit("resumed", {"code": code}, room=QUIZ_ROOM)
-    storage.save_session_dict(code, session.model_dump())
+        session.repause_scores()
+        await sio.emit("resumed", {"code": code}, room=quiz_room(code))
+    _journal_state(session)
+    persister.mark_dirty(code)
     return {"ok": True}
 
 
 @app.post("/api/admin/quiz/{code}/reset")
-async def reset_quiz(code: str, _: None = Depends(require_admin)):
+async def reset_quiz(code: QuizCode, _: None = Depends(require_admin)):
     session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
     # Keep players, but clear all questions and per-question state
-    session.questions = []
+    session.set_questions([])
     session.current_index = -1
     session.is_active = False
     session.paused = False
     session.revealed = False
     session.current_answers = {}
+    session.progress.reset()
     session.current_answer_times = {}
     session.question_started_at = None
     session.paused_at = None
     session.paused_accumulated = 0.0
     session.sudden_death_active = False
     session.sudden_death_allowed = None
+    _journal_state(session, clear_answers=True)
     # Hide any overlays and send everyone back to lobby
-    await sio.emit("leaderboard_hide", {}, room=QUIZ_ROOM)
-    await sio.emit("reset", {"code": code}, room=QUIZ_ROOM)
-    storage.save_session_dict(code, session.model_dump())
+    await sio.emit("leaderboard_hide", {}, room=quiz_room(code))
+    await sio.emit("reset", {"code": code}, room=quiz_room(code))
+    await _emit_answers_progress(session)
+    persister.mark_dirty(code)
+    await persister.flush(code)
     return {"ok": True}
 
 
@@ -723,24 +1380,132 @@ async def reset_quiz(code: str, _: None = Depends(require_admin)):
 
 
 @app.post("/api/admin/quiz/{code}/lifelines")
-async def set_lifelines(code: str, payload: LifelinesPayload, _: None = Depends(require_admin)):
+async def set_lifelines(code: QuizCode, payload: LifelinesPayload, _: None = Depends(require_admin)):
     session = SESSIONS.get(code)
     if not session:
         raise HTTPException(404, "Quiz not found")
     allowed_keys = {"5050", "hint"}
     filtered = {k: bool(v) for k, v in payload.lifelines.items() if k in allowed_keys}
     session.lifelines_enabled.update(filtered)
-    await sio.emit("lifelines", session.lifelines_enabled, room=ADMIN_ROOM)
-    storage.save_session_dict(code, session.model_dump())
+    await sio.emit("lifelines", session.lifelines_enabled, room=admin_room(code))
+    persister.mark_dirty(code)
     return {"ok": True, "lifelines": session.lifelines_enabled}
 
 
 # --- Socket.IO server (ASGI) ---
-sio = socketio.AsyncServer(
+# The Engine.IO server stamps each incoming frame's arrival (see ingest.py); with
+# metrics on it also counts outgoing messages and bytes per event.
+class QuizEngineIOServer(ArrivalStampMixin, metrics.MeteredEngineIOServer if metrics.ENABLED else engineio.AsyncServer):
+    pass
+
+
+class QuizSocketServer(socketio.AsyncServer):
+    def _engineio_server_class(self):
+        return QuizEngineIOServer
+
+
+sio = QuizSocketServer(
     async_mode="asgi",
     cors_allowed_origins="*",
     transports=["websocket"],  # reduce overhead: disable long-polling
+    client_manager=cluster.manager,  # broker pub/sub in multi-worker mode, else in-memory
 )
+# Batched per-player sends (shared encodings, bounded concurrency)
+fanout = FanOut(sio)
+# Player events (answers, joins, registrations) are rate limited and queued so that
+# admin and display events are not stuck behind a storm (see admission.py)
+admission = AdmissionControl()
+# Round trip per socket from clock_ping exchanges, taken off answer times (see clocksync.py)
+clock = ClockSync()
+
+
+async def _broadcast_leaderboard(session: QuizSession, event: str = "leaderboard", admin_rows: Optional[List[Dict]] = None):
+    """Full rows to admins (when given), the top-K without emails to the quiz room and
+    each connected player's own {rank, score, total, neighbours} as leaderboard_rank."""
+    code = session.code
+    if admin_rows is not None:
+        await sio.emit("leaderboard", admin_rows, room=admin_room(code))
+    await sio.emit(event, session.ranking.public_rows(0, LEADERBOARD_TOP_K), room=quiz_room(code))
+    # only connected players are ranked; the socket map is kept by the session owner
+    connected = {pid: sid for pid, sid in list(ACTIVE_PLAYER_SOCKETS.items()) if pid in session.players}
+    items = [(connected[pid], "leaderboard_rank", standing) for pid, standing in session.ranking.standings(connected, LEADERBOARD_NEIGHBOURS)]
+    stats = await fanout.send(items)
+    await _report_fanout(code, "leaderboard_rank", stats["sent"], stats["total"], stats)
+
+
+async def _report_fanout(code: str, event: str, sent: int, total: int, stats: Optional[Dict] = None):
+    payload = {"event": event, "sent": sent, "total": total}
+    if stats:
+        payload.update(ms=stats["ms"], failed=stats["failed"])
+    await sio.emit("fanout", payload, room=admin_room(code))
+
+
+def _socket_code(sid, data=None) -> Optional[str]:
+    sess = SOCKET_SESSIONS.get(sid)
+    if sess:
+        return sess.get("code")
+    return _session_code(data.get("code")) if isinstance(data, dict) else None
+
+
+async def _reply_shed(sid: str, shed: Shed):
+    if shed.event == "submit_answer":
+        await sio.emit("answer_rejected", {"reason": "busy", "retryAfter": shed.retry_after}, to=sid)
+    else:
+        await sio.emit("retry_after", {"event": shed.event, "reason": shed.reason, "retryAfter": shed.retry_after}, to=sid)
+
+
+def session_event(joins: bool = False):
+    """Register a socket handler that runs on the worker owning the socket's session.
+
+    Join events (joins=True) pick the session from data["code"]; other events use the
+    session the socket last joined. A socket that switches sessions leaves the previous
+    session's rooms and is forgotten by its owner first. On the owner, player events
+    pass admission control before the handler runs.
+    """
+    def decorator(handler):
+        name = handler.__name__
+        timed = metrics.timed_handler(name, loop_monitor.track(name, handler, _socket_code))
+
+        async def admitted(sid, data=None):
+            try:
+                return await admission.run(name, sid, timed, sid, data)
+            except Shed as e:
+                await _reply_shed(sid, e)
+
+        cluster.register(name, admitted)
+
+        async def entry(sid, data=None):
+            if joins:
+                code = _session_code(data.get("code") if isinstance(data, dict) else None)
+                prev = cluster.bind(sid, code)
+                if prev is not None and prev != code:
+                    await sio.leave_room(sid, quiz_room(prev))
+                    await sio.leave_room(sid, admin_room(prev))
+                    await cluster.dispatch("_forget_socket", prev, sid)
+            else:
+                code = cluster.code_of(sid) or GLOBAL_CODE
+            await cluster.dispatch(name, code, sid, data)
+
+        sio.on(name, entry)
+        return handler
+    return decorator
+
+
+def _current_question_broadcast(session: QuizSession):
+    """Cached question entry plus the time-dependent fields for sending it now."""
+    entry = session.cached_question(session.current_index)
+    now = time.time()
+    total_paused = session.paused_accumulated + ((now - session.paused_at) if session.paused_at else 0.0)
+    elapsed = (now - session.question_started_at) - total_paused if session.question_started_at else 0.0
+    remaining = max(0.0, float(entry.duration) - max(0.0, elapsed))
+    status_payload = {"index": session.current_index, "total": len(session.questions), "paused": session.paused, "revealed": session.revealed, "duration": entry.duration, "startedAt": session.question_started_at, "serverTime": now, "remaining": remaining}
+    return entry, now, remaining, status_payload
+
+
+async def _send_current_question(session: QuizSession, sid: str):
+    entry, now, remaining, status_payload = _current_question_broadcast(session)
+    await fanout.emit_json(sid, "question", entry.payload_json(session.question_started_at, now, remaining))
+    await sio.emit("status", status_payload, to=sid)
 
 
 async def emit_current_question(code: str):
@@ -748,55 +1513,41 @@ async def emit_current_question(code: str):
     if not session:
         return
     if 0 <= session.current_index < len(session.questions):
-        q = session.questions[session.current_index]
-        q_player = q.model_dump()
-        if "answer" in q_player:
-            q_player["answer"] = None
-        # compute remaining
-        now = time.time()
-        total_paused = session.paused_accumulated + ((now - session.paused_at) if session.paused_at else 0.0)
-        elapsed = (now - session.question_started_at) - total_paused if session.question_started_at else 0.0
-        remaining = max(0.0, float(q.duration) - max(0.0, elapsed))
-        await sio.emit("question", {"question": q_player, "index": session.current_index, "duration": q.duration, "startedAt": session.question_started_at, "serverTime": now, "remaining": remaining}, room=QUIZ_ROOM)
-        status_payload = {"index": session.current_index, "total": len(session.questions), "paused": session.paused, "revealed": session.revealed, "duration": q.duration, "startedAt": session.question_started_at, "serverTime": now, "remaining": remaining}
-        await sio.emit("status", status_payload, room=ADMIN_ROOM)
-        await sio.emit("status", status_payload, room=QUIZ_ROOM)
+        entry, now, remaining, status_payload = _current_question_broadcast(session)
+        await sio.emit("question", entry.payload(session.question_started_at, now, remaining), room=quiz_room(code))
+        await sio.emit("status", status_payload, room=admin_room(code))
+        await sio.emit("status", status_payload, room=quiz_room(code))
     else:
         if session.is_active:
-            await sio.emit("complete", {}, room=QUIZ_ROOM)
+            await sio.emit("complete", {}, room=quiz_room(code))
         session.is_active = False
         # Emit final results (with tie-break info) to admins
-        lb = _sort_players_for_leaderboard(list(session.players.values())) if session.players else []
-        out = [
-            {
-                "id": p.id,
-                "name": p.name,
-                "score": p.score,
-                "firsts": p.correct_firsts,
-                "cumTime": round(float(p.cumulative_answer_time or 0.0), 3),
-            }
-            for p in lb
-        ]
-        await sio.emit("final_results", {"leaderboard": out}, room=ADMIN_ROOM)
+        out = _final_results_rows(session)
+        await sio.emit("final_results", {"leaderboard": out}, room=admin_room(code))
         # End sudden-death if any
         session.sudden_death_active = False
         session.sudden_death_allowed = None
-    storage.save_session_dict(code, session.model_dump())
+        _journal_state(session)
+    persister.mark_dirty(code)
 
 
 async def _emit_answers_progress(session: QuizSession, to_sid: Optional[str] = None):
-    """Send how many and which players have locked answers to admins (or to a specific SID)."""
+    """Send a full answers-progress snapshot to admins (or to a specific SID).
+
+    O(players): only used on question changes, admin join and resync requests.
+    Answer intake feeds the batched deltas flushed by _answers_progress_ticker.
+    """
     try:
         locked_ids = list(session.current_answers.keys())
-        items = []
-        for pid in locked_ids:
-            p = session.players.get(pid)
-            if p:
-                items.append({"id": pid, "name": p.name})
-        players_list = [{"id": p.id, "name": p.name} for p in session.players.values()]
+        # one entry per player, shared by the players/locked/unlocked lists
+        entries = {pid: {"id": pid, "name": p.name} for pid, p in session.players.items()}
+        players_list = list(entries.values())
+        items = [entries[pid] for pid in locked_ids if pid in entries]
         locked_set = set(locked_ids)
         unlocked = [pl for pl in players_list if pl["id"] not in locked_set]
         payload = {
+            "epoch": session.progress.epoch,
+            "version": session.progress.version,
             "lockedCount": len(locked_ids),
             "playersCount": len(session.players),
             "locked": items,
@@ -806,11 +1557,25 @@ async def _emit_answers_progress(session: QuizSession, to_sid: Optional[str] = N
         if to_sid:
             await sio.emit("answers_progress", payload, to=to_sid)
         else:
-            await sio.emit("answers_progress", payload, room=ADMIN_ROOM)
+            await sio.emit("answers_progress", payload, room=admin_room(session.code))
     except Exception:
         pass
 
 
+async def _answers_progress_ticker():
+    interval = 1.0 / max(0.1, PROGRESS_HZ)
+    while True:
+        await asyncio.sleep(interval)
+        for session in list(SESSIONS.values()):
+            delta = session.progress.take_delta(len(session.current_answers), len(session.players))
+            if delta is None:
+                continue
+            try:
+                await sio.emit("answers_progress_delta", delta, room=admin_room(session.code))
+            except Exception:
+                pass
+
+
 @sio.event
 async def connect(sid, environ, auth):
     print("Client connected", sid)
@@ -819,15 +1584,27 @@ async def connect(sid, environ, auth):
 @sio.event
 async def disconnect(sid):
     print("Client disconnected", sid)
-    # clean active socket tracking
+    code = cluster.unbind(sid)
+    if code is not None:
+        await cluster.dispatch("_forget_socket", code, sid)
+
+
+async def _forget_socket(sid, data=None):
+    # clean active socket tracking (runs on the session owner)
+    SOCKET_SESSIONS.pop(sid, None)
+    admission.forget(sid)
+    clock.forget(sid)
     player_id = SID_TO_PLAYER.pop(sid, None)
     if player_id and ACTIVE_PLAYER_SOCKETS.get(player_id) == sid:
         ACTIVE_PLAYER_SOCKETS.pop(player_id, None)
 
 
-@sio.event
+cluster.register("_forget_socket", _forget_socket)
+
+
+@session_event(joins=True)
 async def join_quiz(sid, data):
-    code = data.get("code") or GLOBAL_CODE
+    code = _session_code(data.get("code"))
     name = data.get("name")
     pid = data.get("playerId")
     email = data.get("email")
@@ -840,6 +1617,7 @@ async def join_quiz(sid, data):
         return
     player = session.players.get(pid)
     if player and email:
+        before = (player.email, player.participant_code)
         # Always sync email & participant_code to email (or keep existing unique variant)
         if not player.email:
             player.email = email
@@ -848,8 +1626,12 @@ async def join_quiz(sid, data):
             pass
         elif not player.participant_code:
             player.participant_code = player.email.lower()
-        storage.save_session_dict(code, session.model_dump())
-    await sio.save_session(sid, {"code": code, "playerId": pid, "name": name, "admin": False})
+        if (player.email, player.participant_code) != before:
+            session.ranking.update(player)
+            session.index_email(player)
+            session.touch((pid,))
+            _journal(code, "email", pid=pid, email=player.email, pc=player.participant_code)
+    SOCKET_SESSIONS[sid] = {"code": code, "playerId": pid, "name": name, "admin": False}
     # Enforce single active socket per player: disconnect prior if exists
     prev_sid = ACTIVE_PLAYER_SOCKETS.get(pid)
     if prev_sid and prev_sid != sid:
@@ -860,7 +1642,7 @@ async def join_quiz(sid, data):
             pass
     ACTIVE_PLAYER_SOCKETS[pid] = sid
     SID_TO_PLAYER[sid] = pid
-    await sio.enter_room(sid, QUIZ_ROOM)
+    await sio.enter_room(sid, quiz_room(code))
     await sio.emit("joined", {"ok": True, "participantCode": player.participant_code if player else None}, to=sid)
     # send current lifeline status to this player
     if player:
@@ -868,100 +1650,130 @@ async def join_quiz(sid, data):
     # If a quiz is already active, send the current question immediately so late joiners see it
     if session.is_active and 0 <= session.current_index < len(session.questions):
         q = session.questions[session.current_index]
-        q_player = q.model_dump()
-        if "answer" in q_player:
-            q_player["answer"] = None
-        now = time.time()
-        total_paused = session.paused_accumulated + ((now - session.paused_at) if session.paused_at else 0.0)
-        elapsed = (now - session.question_started_at) - total_paused if session.question_started_at else 0.0
-        remaining = max(0.0, float(q.duration) - max(0.0, elapsed))
-        await sio.emit("question", {"question": q_player, "index": session.current_index, "duration": q.duration, "startedAt": session.question_started_at, "serverTime": now, "remaining": remaining}, to=sid)
-        await sio.emit("status", {"index": session.current_index, "total": len(session.questions), "paused": session.paused, "revealed": session.revealed, "duration": q.duration, "startedAt": session.question_started_at, "serverTime": now, "remaining": remaining}, to=sid)
+        await _send_current_question(session, sid)
         # If player had previously locked, reflect that for seamless reconnection
         if pid in session.current_answers:
             await sio.emit("answer_locked", {"locked": True, "answer": session.current_answers.get(pid)}, to=sid)
         # If already revealed, replay reveal and player's result
         if session.revealed:
             await sio.emit("reveal", {"correctAnswer": q.answer}, to=sid)
-            correct_ids: List[str] = []
-            for ppid, ans in session.current_answers.items():
-                corr = q.answer is None or str(ans).strip().lower() == str(q.answer).strip().lower()
-                if corr:
-                    correct_ids.append(ppid)
-            correct_ids.sort(key=lambda ppid: session.current_answer_times.get(ppid, float('inf')))
-            rank = (correct_ids.index(pid) + 1) if (pid in correct_ids) else None
             player_obj = session.players.get(pid)
             if player_obj is not None:
-                ans = session.current_answers.get(pid)
-                is_correct = q.answer is None or (ans is not None and str(ans).strip().lower() == str(q.answer).strip().lower())
-                # Compute time-based bonus consistent with reveal scoring
-                submit_ts = session.current_answer_times.get(pid, session.question_started_at or time.time())
-                paused_total = session.paused_accumulated or 0.0
-                elapsed = 0.0
-                if session.question_started_at:
-                    elapsed = max(0.0, submit_ts - session.question_started_at - paused_total)
-                dur = float(q.duration or 0)
-                clamped_elapsed = min(max(elapsed, 0.0), dur if dur > 0 else elapsed)
-                if is_correct and dur > 0:
-                    rem = max(0.0, dur - clamped_elapsed)
-                    bonus = int(round(MAX_POINTS_PER_QUESTION * (rem / dur)))
-                else:
-                    bonus = 0
-                await sio.emit("answer_result", {"correct": bool(is_correct), "score": player_obj.score, "rank": rank, "bonus": bonus}, to=sid)
-        # Update admins with latest counts when someone (re)joins
-        await _emit_answers_progress(session)
+                row = session.reveal_table().row(pid)
+                if row is None:
+                    row = {"correct": q.answer is None, "rank": None, "awarded": 0}
+                await sio.emit("answer_result", {"correct": bool(row["correct"]), "score": player_obj.score, "rank": row["rank"], "bonus": row["awarded"]}, to=sid)
 
 
-@sio.event
+@session_event()
 async def submit_answer(sid, data):
-    sess = await sio.get_session(sid)
+    sess = SOCKET_SESSIONS.get(sid)
     code = sess.get("code") if sess else None
     pid = sess.get("playerId") if sess else None
-    answer = data.get("answer")
     if not code or not pid:
         await sio.emit("error", {"message": "Not in quiz"}, to=sid)
         return
-    # Evaluate
-    session = SESSIONS.get(code)
-    if not session:
-        return
+    # Judged by frame arrival, not by when the batch gets to it (see _ingest_answers)
+    answers_in.put(code, (arrived_at(), sid, pid, data.get("answer")))
+
+
+def _answer_rejection(session: QuizSession, pid: str, now: float) -> Optional[str]:
+    """Why an answer that arrived at `now` cannot be locked (None: it can)."""
+    if (session.paused and (session.paused_at or 0) <= now) or session.revealed:
+        return "paused_or_revealed"
     idx = session.current_index
-    p = session.players.get(pid)
-    # Validation checks
-    if session.paused or session.revealed:
-        await sio.emit("answer_rejected", {"reason": "paused_or_revealed"}, to=sid)
-        return
     if not (0 <= idx < len(session.questions)):
-        await sio.emit("answer_rejected", {"reason": "no_active_question"}, to=sid)
-        return
-    q = session.questions[idx]
+        return "no_active_question"
     # Sudden-death eligibility gating: only allow listed players to answer when active
-    if session.sudden_death_active:
-        allowed = set(session.sudden_death_allowed or [])
-        if pid not in allowed:
-            await sio.emit("answer_rejected", {"reason": "sudden_death_not_allowed"}, to=sid)
-            return
+    if session.sudden_death_active and pid not in (session.sudden_death_allowed or ()):
+        return "sudden_death_not_allowed"
     # Time expiry (account for paused time)
-    now = time.time()
-    total_paused = session.paused_accumulated + ((now - session.paused_at) if session.paused_at else 0.0)
-    if session.question_started_at and (now - session.question_started_at - total_paused) > q.duration:
-        await sio.emit("answer_rejected", {"reason": "time_expired"}, to=sid)
-        return
-    # Lock answer if not already answered
+    total_paused = session.paused_accumulated + (max(0.0, now - session.paused_at) if session.paused_at else 0.0)
+    if session.question_started_at and (now - session.question_started_at - total_paused) > session.questions[idx].duration:
+        return "time_expired"
     if pid in session.current_answers:
-        await sio.emit("answer_rejected", {"reason": "already_locked"}, to=sid)
-        return
-    session.current_answers[pid] = str(answer)
-    session.current_answer_times[pid] = time.time()
-    # Do NOT persist per-answer to avoid heavy I/O; answers will be saved on reveal/next.
-    await sio.emit("answer_submitted", {"playerId": pid, "name": p.name if p else "?"}, room=ADMIN_ROOM)
-    await sio.emit("answer_locked", {"locked": True, "answer": str(answer)}, to=sid)
-    await _emit_answers_progress(session)
+        return "already_locked"
+    return None
 
 
-@sio.event
+async def _ingest_answers(code: str, batch: List) -> None:
+    """Validate and lock a batch of (arrivedAt, sid, pid, answer) in arrival order, then
+    journal them in one append and send the acks/rejections as one fan-out. Each
+    answer's time is its arrival less the sender's measured network delay.
+
+    Everything up to the fan-out is synchronous (AnswerIngest.flush relies on it).
+    """
+    session = SESSIONS.get(code)
+    if session is None:
+        return
+    batch.sort(key=lambda item: item[0])
+    idx = session.current_index
+    replies = []
+    records = []
+    # one payload object per distinct reply, so the fan-out encodes each once
+    locked: Dict[str, Dict] = {}
+    rejected: Dict[str, Dict] = {}
+    started = session.question_started_at
+    for arrived, sid, pid, answer in batch:
+        # judged as if the player had no network delay (bounded, see ClockSync);
+        # never before the question started, and not at all without a start time
+        comp = min(clock.compensation(sid), max(0.0, arrived - (started or arrived)))
+        now = arrived - comp
+        reason = _answer_rejection(session, pid, now)
+        if reason is not None:
+            payload = rejected.get(reason)
+            if payload is None:
+                payload = rejected[reason] = {"reason": reason}
+            replies.append((sid, "answer_rejected", payload))
+            continue
+        answer = str(answer)
+        session.lock_answer(pid, answer, now)
+        # Journal the locked answer (one small record) instead of rewriting the session.
+        record = {"pid": pid, "idx": idx, "a": answer, "t": now}
+        if comp:
+            record["c"] = round(comp, 4)  # audit: arrived at t + c
+            clock.record(code, pid, idx, arrived, comp)
+        records.append(record)
+        # O(1) per answer: admins receive it in the next batched answers_progress_delta
+        p = session.players.get(pid)
+        session.progress.record_lock(pid, p.name if p else "?")
+        payload = locked.get(answer)
+        if payload is None:
+            payload = locked[answer] = {"locked": True, "answer": answer}
+        replies.append((sid, "answer_locked", payload))
+    if records:
+        metrics.ANSWERS.inc((code,), len(records))
+        _journal_many(code, "answer", records)
+    await fanout.send(replies)
+
+
+async def _settle_answers(session: QuizSession) -> None:
+    """Lock every answer that arrived before now; call before ending or changing a question."""
+    await admission.drain("submit_answer")
+    await answers_in.flush(session.code)
+
+
+# Answers are queued per session and locked in batches
+answers_in = AnswerIngest(_ingest_answers)
+
+
+@session_event()
+async def clock_ping(sid, data=None):
+    """First leg of a clock exchange: reply with the server's receive and send times."""
+    t0 = data.get("t0") if isinstance(data, dict) else None
+    await sio.emit("clock_pong", clock.pong(sid, t0, arrived_at()), to=sid)
+
+
+@session_event()
+async def clock_sync(sid, data=None):
+    """Last leg: the client echoes the pong with its receive time; no reply."""
+    if isinstance(data, dict):
+        clock.sync(sid, data, arrived_at())
+
+
+@session_event()
 async def lifeline_request(sid, data):
-    sess = await sio.get_session(sid)
+    sess = SOCKET_SESSIONS.get(sid)
     code = sess.get("code") if sess else GLOBAL_CODE
     pid = sess.get("playerId") if sess else None
     lifeline = data.get("lifeline")
@@ -980,7 +1792,9 @@ async def lifeline_request(sid, data):
         return
     # Mark used and notify admin; clients implement effects client-side
     player.lifelines[lifeline] = False
-    await sio.emit("lifeline_used", {"playerId": pid, "name": player.name, "lifeline": lifeline}, room=ADMIN_ROOM)
+    session.touch((pid,))
+    _journal(code, "lifeline", pid=pid, l=lifeline)
+    await sio.emit("lifeline_used", {"playerId": pid, "name": player.name, "lifeline": lifeline}, room=admin_room(code))
     # notify player of current lifeline availability
     await sio.emit("lifeline_status", player.lifelines, to=sid)
     # Server-driven effects
@@ -1000,20 +1814,18 @@ async def lifeline_request(sid, data):
         await sio.emit("lifeline_hint", {"hint": q.hint or ""}, to=sid)
     else:
         await sio.emit("lifeline_ack", {"lifeline": lifeline}, to=sid)
-    # Persist lifeline usage with lifecycle batching; optional immediate persist could be enabled if needed.
-    storage.save_session_dict(code, session.model_dump())
 
 
-@sio.event
+@session_event(joins=True)
 async def admin_join(sid, data):
-    code = data.get("code") or GLOBAL_CODE
+    code = _session_code(data.get("code"))
     token = data.get("token")
     secret = os.getenv("ADMIN_SECRET", "changeme")
     if not code or token != secret:
         await sio.emit("error", {"message": "Unauthorized"}, to=sid)
         return
-    await sio.save_session(sid, {"code": code, "admin": True})
-    await sio.enter_room(sid, ADMIN_ROOM)
+    SOCKET_SESSIONS[sid] = {"code": code, "admin": True}
+    await sio.enter_room(sid, admin_room(code))
     await sio.emit("admin_joined", {"ok": True}, to=sid)
     # send snapshot of current answers progress
     session = SESSIONS.get(code)
@@ -1021,9 +1833,21 @@ async def admin_join(sid, data):
         await _emit_answers_progress(session, to_sid=sid)
 
 
-@sio.event
+@session_event()
+async def answers_progress_sync(sid, data=None):
+    """Admin asks for a full progress snapshot (e.g. after missing a delta)."""
+    sess = SOCKET_SESSIONS.get(sid)
+    if not sess or not sess.get("admin"):
+        await sio.emit("error", {"message": "Unauthorized"}, to=sid)
+        return
+    session = SESSIONS.get(sess.get("code") or GLOBAL_CODE)
+    if session:
+        await _emit_answers_progress(session, to_sid=sid)
+
+
+@session_event()
 async def admin_command(sid, data):
-    sess = await sio.get_session(sid)
+    sess = SOCKET_SESSIONS.get(sid)
     if not sess or not sess.get("admin"):
         await sio.emit("error", {"message": "Unauthorized"}, to=sid)
         return
@@ -1036,55 +1860,106 @@ async def admin_command(sid, data):
     elif action == "reveal":
         session = SESSIONS.get(code)
         if session:
+            await _settle_answers(session)
             await _reveal_answers(session)
-            storage.save_session_dict(code, session.model_dump())
+            persister.mark_dirty(code)
+            await persister.flush(code)
     elif action == "show_leaderboard":
         session = SESSIONS.get(code)
         if session:
-            lb = _sort_players_for_leaderboard(list(session.players.values()))
-            payload = [{"id": pl.id, "name": pl.name, "email": pl.email, "score": pl.score, "participantCode": pl.participant_code} for pl in lb]
-            await sio.emit("leaderboard_show", payload, room=QUIZ_ROOM)
+            await _broadcast_leaderboard(session, "leaderboard_show")
     elif action == "hide_leaderboard":
-        await sio.emit("leaderboard_hide", {}, room=QUIZ_ROOM)
+        await sio.emit("leaderboard_hide", {}, room=quiz_room(code))
 
 
-@sio.event
+@session_event(joins=True)
 async def display_join(sid, data=None):
     """Allow a display client to receive quiz-room broadcasts without being a player."""
-    code = (data or {}).get("code") if isinstance(data, dict) else None
-    code = code or GLOBAL_CODE
+    code = _session_code((data or {}).get("code") if isinstance(data, dict) else None)
     session = SESSIONS.get(code)
-    await sio.enter_room(sid, QUIZ_ROOM)
+    await sio.enter_room(sid, quiz_room(code))
     # Send current question and status immediately, if active
     if session and session.is_active and 0 <= session.current_index < len(session.questions):
-        q = session.questions[session.current_index]
-        q_player = q.model_dump()
-        if "answer" in q_player:
-            q_player["answer"] = None
-        now = time.time()
-        total_paused = session.paused_accumulated + ((now - session.paused_at) if session.paused_at else 0.0)
-        elapsed = (now - session.question_started_at) - total_paused if session.question_started_at else 0.0
-        remaining = max(0.0, float(q.duration) - max(0.0, elapsed))
-        await sio.emit("question", {"question": q_player, "index": session.current_index, "duration": q.duration, "startedAt": session.question_started_at, "serverTime": now, "remaining": remaining}, to=sid)
-        await sio.emit("status", {"index": session.current_index, "total": len(session.questions), "paused": session.paused, "revealed": session.revealed, "duration": q.duration, "startedAt": session.question_started_at, "serverTime": now, "remaining": remaining}, to=sid)
+        await _send_current_question(session, sid)
+
+
+def _http_route(method: str, path: str, body: bytes) -> Optional[str]:
+    """Session code an HTTP request belongs to (ALL: every session; None: any worker)."""
+    parts = path.strip("/").split("/")
+    if len(parts) < 2 or parts[0] != "api":
+        return None
+    if parts[1] == "quiz":  # /api/quiz/{code}/... or the code-less global routes
+        return _session_code(parts[2]) if len(parts) >= 4 else GLOBAL_CODE
+    if parts[1] != "admin" or len(parts) < 3:
+        return None
+    section = parts[2]
+    if section == "quiz":
+        if len(parts) >= 4:
+            return _session_code(parts[3])
+        # create: the body names the session ("" => generated by whichever worker serves it)
+        try:
+            code = (json.loads(body or b"null") or {}).get("code")
+        except (ValueError, AttributeError):
+            return GLOBAL_CODE
+        if code is None:
+            return GLOBAL_CODE
+        return str(code).strip().upper() or None
+    if section in ("quizzes", "full_reset", "disconnect_all"):
+        return ALL
+    if section == "question_sets" and parts[-1] == "cache":
+        return ALL  # per-worker caches, counters summed
+    if section == "loop":
+        return ALL  # per-worker monitors, lists concatenated
+    if section == "admission":
+        return ALL  # per-worker lanes
+    if section == "clock":
+        return ALL  # estimates live on the worker owning each socket's session
+    if section == "profile":
+        return ALL  # each worker profiles itself; reports and stacks are joined
+    if section == "metrics":
+        return ALL  # one scrape per worker, joined (samples carry a worker label)
+    if section == "question_sets" and parts[-1] != "apply":
+        return None  # shared question set library
+    if section == "leaderboard" and parts[-1] == "load":
+        return None
+    return GLOBAL_CODE
 
 
 # Compose ASGI app so that both HTTP and Socket.IO share the same server
-asgi_app = socketio.ASGIApp(sio, other_asgi_app=app, socketio_path="/ws/socket.io")
+# (in multi-worker mode HTTP requests are routed to the worker owning the session first)
+asgi_app = socketio.ASGIApp(sio, other_asgi_app=cluster.asgi(app, _http_route), socketio_path="/ws/socket.io")
+
+_progress_task: Optional[asyncio.Task] = None
+
 
 # Load persisted sessions on startup
 @app.on_event("startup")
 async def _load_sessions():
-    data = storage.load_all_session_dicts()
-    for code, sess_dict in data.items():
-        try:
-            SESSIONS[code] = QuizSession(**sess_dict)
-        except Exception:
-            # skip corrupt sessions
-            continue
-    if GLOBAL_CODE not in SESSIONS:
+    global _progress_task
+    persister.start()
+    _progress_task = asyncio.create_task(_answers_progress_ticker())
+    loop_monitor.start()
+    if cluster.enabled and not sio.manager_initialized:
+        # start listening on the broker now, not on the first socket connection:
+        # this worker must serve forwarded requests even with no clients of its own
+        sio.manager_initialized = True
+        sio.manager.initialize()
+    # Only list what is stored (other workers' sessions are skipped); nothing is parsed yet
+    SESSIONS.discover(code for code in storage.list_session_codes() if cluster.owns(code))
+    SESSIONS.discover(code for code in journal.codes() if cluster.owns(code))
+    if cluster.owns(GLOBAL_CODE) and SESSIONS.get(GLOBAL_CODE) is None:
         SESSIONS[GLOBAL_CODE] = QuizSession(code=GLOBAL_CODE)
-        storage.save_session_dict(GLOBAL_CODE, SESSIONS[GLOBAL_CODE].model_dump())
+        persister.mark_dirty(GLOBAL_CODE)
+
+
+@app.on_event("shutdown")
+async def _flush_sessions():
+    if _progress_task is not None:
+        _progress_task.cancel()
+    loop_monitor.stop()
+    await persister.stop()
+    journal.close()
+    storage.set_backend(None)
 
 # Run with: uvicorn backend.app.main:asgi_app --reload --app-dir .
 
@@ -1093,83 +1968,30 @@ async def _reveal_answers(session: QuizSession):
     if session.revealed or not (0 <= session.current_index < len(session.questions)):
         return
     q = session.questions[session.current_index]
-    # Evaluate all locked answers with rank-based bonus
-    correct_ids: List[str] = []
-    for pid, ans in session.current_answers.items():
-        player = session.players.get(pid)
-        if not player:
-            continue
-        correct = q.answer is None or str(ans).strip().lower() == str(q.answer).strip().lower()
-        if correct:
-            correct_ids.append(pid)
-    # Sort correct responders by submission time (earlier is better)
-    correct_ids.sort(key=lambda pid: session.current_answer_times.get(pid, float('inf')))
-    # Track first-correct for tie-breaks
-    if correct_ids:
-        first_pid = correct_ids[0]
-        first_player = session.players.get(first_pid)
-        if first_player:
-            first_player.correct_firsts = int(first_player.correct_firsts or 0) + 1
-    # Award scores purely based on remaining time and capture cumulative time for correct answers
-    per_player_awarded: Dict[str, int] = {}
-    for pid in correct_ids:
-        player = session.players.get(pid)
-        if not player:
-            continue
-        submit_ts = session.current_answer_times.get(pid, session.question_started_at or time.time())
-        paused_total = session.paused_accumulated or 0.0
-        elapsed = 0.0
-        if session.question_started_at:
-            elapsed = max(0.0, submit_ts - session.question_started_at - paused_total)
-        # Clamp to question duration
-        dur = float(q.duration or 0)
-        clamped_elapsed = min(max(elapsed, 0.0), dur if dur > 0 else elapsed)
-        if dur > 0:
-            rem = max(0.0, dur - clamped_elapsed)
-            awarded = int(round(MAX_POINTS_PER_QUESTION * (rem / dur)))
-        else:
-            awarded = 0
-        player.score += awarded
-        per_player_awarded[pid] = awarded
-        player.cumulative_answer_time = float(player.cumulative_answer_time or 0.0) + float(clamped_elapsed)
-    session.revealed = True
+    table = session.commit_scores()
+    _journal(session.code, "reveal", idx=session.current_index)
     # Emit reveal to players (include correct answer id/text)
     reveal_payload = {"correctAnswer": q.answer}
-    await sio.emit("reveal", reveal_payload, room=QUIZ_ROOM)
-    # Send per-player answer result (include rank/bonus for correct answers)
-    for pid, ans in session.current_answers.items():
-        player = session.players.get(pid)
-        if not player:
-            continue
-        correct = q.answer is None or str(ans).strip().lower() == str(q.answer).strip().lower()
+    await sio.emit("reveal", reveal_payload, room=quiz_room(session.code))
+    # Send per-player answer result (include rank/bonus for correct answers) straight from the table
+    results = []
+    for pid, correct, awarded, rank in zip(table.player_ids, table.correct, table.awarded, table.rank):
         sid = ACTIVE_PLAYER_SOCKETS.get(pid)
         if sid:
-            rank = (correct_ids.index(pid) + 1) if correct and pid in correct_ids else None
-            # Informational: report awarded points based on the player submission
-            submit_ts = session.current_answer_times.get(pid, session.question_started_at or time.time())
-            paused_total = session.paused_accumulated or 0.0
-            elapsed = 0.0
-            if session.question_started_at:
-                elapsed = max(0.0, submit_ts - session.question_started_at - paused_total)
-            dur = float(q.duration or 0)
-            clamped_elapsed = min(max(elapsed, 0.0), dur if dur > 0 else elapsed)
-            if correct and dur > 0:
-                rem = max(0.0, dur - clamped_elapsed)
-                awarded = int(round(MAX_POINTS_PER_QUESTION * (rem / dur)))
-            else:
-                awarded = 0
             # Keep legacy 'bonus' field for compatibility; add 'awarded'
-            await sio.emit("answer_result", {"correct": correct, "score": player.score, "rank": rank, "bonus": awarded, "awarded": awarded}, to=sid)
+            results.append((sid, "answer_result", {"correct": correct, "score": session.players[pid].score, "rank": rank, "bonus": awarded, "awarded": awarded}))
+
+    async def _progress(sent: int, total: int):
+        await _report_fanout(session.code, "answer_result", sent, total)
+
+    stats = await fanout.send(results, on_progress=_progress)
+    await _report_fanout(session.code, "answer_result", stats["sent"], stats["total"], stats)
     # Update leaderboard for admins
-    lb = _sort_players_for_leaderboard(list(session.players.values()))
-    lb_payload = [{"id": pl.id, "name": pl.name, "email": pl.email, "score": pl.score, "participantCode": pl.participant_code, "firsts": pl.correct_firsts, "cumTime": round(float(pl.cumulative_answer_time or 0.0), 3)} for pl in lb]
-    try:
-        storage.save_leaderboard_snapshot(session.code, lb_payload)
-    except Exception:
-        pass
-    await sio.emit("leaderboard", lb_payload, room=ADMIN_ROOM)
-    await sio.emit("leaderboard", lb_payload, room=QUIZ_ROOM)
+    lb_payload = session.ranking.rows()
+    # encoded and written on the persist thread (rows are never mutated once built)
+    persister.submit(storage.save_leaderboard_snapshot, session.code, lb_payload)
+    await _broadcast_leaderboard(session, admin_rows=lb_payload)
     # Update status for admins and players
     status_payload = {"index": session.current_index, "total": len(session.questions), "paused": session.paused, "revealed": session.revealed}
-    await sio.emit("status", status_payload, room=ADMIN_ROOM)
-    await sio.emit("status", status_payload, room=QUIZ_ROOM)
+    await sio.emit("status", status_payload, room=admin_room(session.code))
+    await sio.emit("status", status_payload, room=quiz_room(session.code))
@@ -0,0 +1,282 @@
+from __future__ import annotations
+import bisect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import engineio
+
+# QUIZ_METRICS=0 turns every metric call below into an early return and leaves the
+# socket server, handlers and HTTP app unwrapped.
+ENABLED = os.getenv("QUIZ_METRICS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+# Labels added to every sample (the worker id in multi-worker mode)
+_const_labels: Dict[str, str] = {}
+
+
+def set_const_labels(labels: Dict[str, str]) -> None:
+    _const_labels.clear()
+    _const_labels.update(labels)
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [(k, v) for k, v in _const_labels.items()]
+    pairs.extend(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), value: float = 1) -> None:
+        if not ENABLED:
+            return
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in list(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, labels: Tuple = ()) -> None:
+        if not ENABLED:
+            return
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; observe() is a bisect plus two additions.
+
+    Storage writes observe from the persister's worker thread, hence the lock.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = SECONDS_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, List[float]] = {}  # labels -> per-bucket counts + [+Inf, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple = ()) -> None:
+        if not ENABLED:
+            return
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for labels, series in items:
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                running += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, ('le', _fmt(bound)))} {_fmt(running)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {_fmt(running)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        # callables returning [(metric, [(labels, value)])], sampled at scrape time
+        self._collectors: List[Callable[[], Iterable[Tuple[_Metric, Iterable[Tuple[Tuple, float]]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable) -> Callable:
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        for fn in self._collectors:
+            try:
+                families = list(fn())
+            except Exception:
+                continue
+            for metric, samples in families:
+                lines.extend(metric.header())
+                lines.extend(f"{metric.name}{_labels(metric.labelnames, k)} {_fmt(v)}" for k, v in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labelnames))
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = SECONDS_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+SOCKET_EVENT_SECONDS = histogram("quiz_socket_event_seconds", "Socket.IO event handler duration", ("event",))
+SOCKET_EVENT_ERRORS = counter("quiz_socket_event_errors_total", "Socket.IO event handlers that raised", ("event",))
+HTTP_SECONDS = histogram("quiz_http_request_seconds", "HTTP request duration by route", ("method", "route", "status"))
+SESSION_SAVE_SECONDS = histogram("quiz_session_save_seconds", "storage.save_session_dict duration")
+SESSION_SAVE_BYTES = histogram("quiz_session_save_bytes", "Encoded session snapshot size", buckets=BYTES_BUCKETS)
+SNAPSHOT_WRITE_SECONDS = histogram("quiz_leaderboard_snapshot_write_seconds", "Leaderboard snapshot write duration")
+SNAPSHOT_WRITE_BYTES = histogram("quiz_leaderboard_snapshot_write_bytes", "Stored leaderboard snapshot record size", buckets=BYTES_BUCKETS)
+EMITTED_MESSAGES = counter("quiz_socket_messages_sent_total", "Socket.IO messages sent to clients, per recipient", ("event",))
+EMITTED_BYTES = counter("quiz_socket_message_bytes_sent_total", "Encoded bytes of Socket.IO messages sent to clients", ("event",))
+ANSWERS = counter("quiz_answers_total", "Answers locked (rate() gives answers per second)", ("code",))
+LOOP_LAG_SECONDS = histogram("quiz_event_loop_lag_seconds", "How late the event loop ran a timer", buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+LOOP_LAG_LAST = gauge("quiz_event_loop_lag_last_seconds", "Most recent event-loop lag sample")
+CLOCK_RTT_SECONDS = histogram("quiz_client_rtt_seconds", "Client round trips measured by clock sync", buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+ANSWER_COMPENSATION_SECONDS = histogram("quiz_answer_compensation_seconds", "Network delay taken off locked answers' times", buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+
+_PACKET_KINDS = {"0": "connect", "1": "disconnect", "3": "ack", "4": "connect_error"}
+
+
+def _event_name(data: Any) -> str:
+    # Socket.IO text packet: <type>[<namespace>,][<id>]["event",...]
+    if not isinstance(data, str):
+        return "binary"
+    if data[:1] != "2":
+        return _PACKET_KINDS.get(data[:1], "other")
+    start = data.find('["')
+    if start < 0:
+        return "other"
+    end = data.find('"', start + 2)
+    return data[start + 2:end] if end > 0 else "other"
+
+
+class MeteredEngineIOServer(engineio.AsyncServer):
+    """Engine.IO server counting every outgoing message and its bytes by event name.
+
+    Both regular emits and the fan-out sender end up in send_packet, once per recipient.
+    """
+
+    async def send_packet(self, sid, pkt):
+        data = pkt.data
+        event = _event_name(data)
+        EMITTED_MESSAGES.inc((event,))
+        EMITTED_BYTES.inc((event,), len(data) if isinstance(data, (str, bytes)) else 0)
+        return await super().send_packet(sid, pkt)
+
+
+def timed_handler(name: str, handler: Callable) -> Callable:
+    """Wrap an async socket handler to record its duration (unchanged when disabled)."""
+    if not ENABLED:
+        return handler
+
+    async def timed(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        except Exception:
+            SOCKET_EVENT_ERRORS.inc((name,))
+            raise
+        finally:
+            SOCKET_EVENT_SECONDS.observe(time.perf_counter() - t0, (name,))
+
+    timed.__name__ = getattr(handler, "__name__", name)
+    return timed
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing HTTP requests, labelled by the matched route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_SECONDS.observe(time.perf_counter() - t0, (scope["method"], path, str(status[0])))
+
+
+def merge_exposition(bodies: Sequence[str]) -> str:
+    """Join several workers' scrapes into one, keeping each metric family contiguous."""
+    order: List[str] = []
+    headers: Dict[str, List[str]] = {}
+    samples: Dict[str, List[str]] = {}
+    for body in bodies:
+        family = None
+        for line in body.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                family = line.split(" ", 3)[2]
+                if family not in headers:
+                    order.append(family)
+                    headers[family] = []
+                    samples[family] = []
+                if line not in headers[family]:
+                    headers[family].append(line)
+            elif line and family is not None:
+                samples[family].append(line)
+    lines: List[str] = []
+    for family in order:
+        lines.extend(headers[family])
+        lines.extend(samples[family])
+    return "\n".join(lines) + "\n"
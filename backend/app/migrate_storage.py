@@ -0,0 +1,54 @@
+"""Import an existing JSON data directory into the SQLite backend.
+
+Usage:
+    python -m backend.app.migrate_storage [--data-dir DIR] [--db PATH]
+
+Defaults to QUIZ_DATA_DIR (or backend/data) and QUIZ_SQLITE_PATH (or <data-dir>/quizzer.db).
+Existing rows with the same keys are overwritten, so the import can be re-run.
+"""
+from __future__ import annotations
+import argparse
+import os
+
+from .sqlite_storage import SqliteBackend
+from .storage import JsonFileBackend, get_data_dir
+
+
+def migrate(data_dir: str, db_path: str) -> dict:
+    src = JsonFileBackend(data_dir)
+    dst = SqliteBackend(db_path)
+    counts = {"sessions": 0, "question_sets": 0, "leaderboard_snapshots": 0}
+    try:
+        for code, data in src.load_all_session_dicts().items():
+            dst.save_session_dict(code, data)
+            counts["sessions"] += 1
+        for name, _count in src.list_question_sets():
+            questions = src.load_question_set(name)
+            if isinstance(questions, list):
+                dst.save_question_set(name, questions)
+                counts["question_sets"] += 1
+        # Copied record by record (keyframes and deltas), so snapshot chains stay intact
+        for entry in src.list_leaderboard_snapshots():
+            found = src.get_snapshot(entry["name"])
+            if found is None:
+                continue
+            dst.put_snapshot(entry["name"], entry["code"], found[1] or "", entry["count"], found[2])
+            counts["leaderboard_snapshots"] += 1
+    finally:
+        dst.close()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import the JSON data directory into SQLite")
+    parser.add_argument("--data-dir", default=None, help="JSON data directory (default: QUIZ_DATA_DIR)")
+    parser.add_argument("--db", default=None, help="SQLite database path (default: QUIZ_SQLITE_PATH or <data-dir>/quizzer.db)")
+    args = parser.parse_args()
+    data_dir = os.path.abspath(args.data_dir) if args.data_dir else get_data_dir()
+    db_path = args.db or os.getenv("QUIZ_SQLITE_PATH") or os.path.join(data_dir, "quizzer.db")
+    counts = migrate(data_dir, db_path)
+    print(f"Imported into {db_path}: " + ", ".join(f"{v} {k}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
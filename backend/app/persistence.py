@@ -0,0 +1,145 @@
+from __future__ import annotations
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional, Set
+
+from . import storage
+
+
+# Seconds to wait after the first write request so that bursts collapse into one write.
+PERSIST_DELAY = float(os.getenv("QUIZ_PERSIST_DELAY", "0.5"))
+
+
+def _log_failure(fut: asyncio.Future) -> None:
+    if not fut.cancelled() and fut.exception() is not None:
+        print("Background write failed:", fut.exception())
+
+
+class SessionPersister:
+    """Write-behind persistence for sessions.
+
+    Handlers call mark_dirty(code) instead of writing synchronously. A background
+    task waits PERSIST_DELAY seconds, takes one model_dump() per dirty session on the
+    event loop and hands the JSON encoding + file write to a single worker thread,
+    so writes for the same code stay ordered. Backends with one row per player
+    (storage.saves_players()) only get the players the session reports as changed. flush() is the durability barrier.
+    When a journal is attached, every snapshot also compacts that session's journal:
+    the log is rotated on the loop and deleted by the worker after the write.
+    """
+
+    def __init__(self, resolve: Callable[[str], Any], delay: float = PERSIST_DELAY, journal: Any = None):
+        self._resolve = resolve
+        self._journal = journal
+        self._delay = max(0.0, delay)
+        self._dirty: Set[str] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _ensure_primitives(self) -> None:
+        if self._wake is None:
+            self._wake = asyncio.Event()
+            self._lock = asyncio.Lock()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quiz-persist")
+
+    def start(self) -> None:
+        self._ensure_primitives()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if self._dirty:
+            self._wake.set()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def mark_dirty(self, code: str) -> None:
+        self._dirty.add(code)
+        if self._wake is not None:
+            self._wake.set()
+
+    def discard(self, code: Optional[str] = None) -> None:
+        """Forget pending writes (for one code, or all) e.g. when sessions are deleted."""
+        if code is None:
+            self._dirty.clear()
+        else:
+            self._dirty.discard(code)
+
+    async def flush(self, code: Optional[str] = None) -> None:
+        """Write pending sessions now (all, or only `code`) and wait until they are on disk."""
+        self._ensure_primitives()
+        async with self._lock:
+            if code is None:
+                codes = list(self._dirty)
+            else:
+                codes = [code] if code in self._dirty else []
+            await self._write(codes)
+
+    def submit(self, fn: Callable, *args) -> asyncio.Future:
+        """Run another storage write (e.g. a leaderboard snapshot) on the persist thread,
+        after the session writes already queued there. Failures are logged."""
+        self._ensure_primitives()
+        fut = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        fut.add_done_callback(_log_failure)
+        return fut
+
+    @property
+    def pending(self) -> int:
+        return len(self._dirty)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:  # keep the writer alive; the session stays dirty
+                print("Session persist failed:", e)
+                await asyncio.sleep(1.0)
+                self._wake.set()
+
+    async def _write(self, codes: Iterable[str]) -> None:
+        loop = asyncio.get_running_loop()
+        for code in codes:
+            self._dirty.discard(code)
+            session = self._resolve(code)
+            if session is None:
+                continue
+            seq = None
+            if self._journal is not None:
+                seq = session.journal_seq = self._journal.begin_compaction(code)
+            # Snapshot on the loop so the worker never sees a half-mutated session
+            pids = session.take_dirty_players()
+            if pids is not None and storage.saves_players():
+                head = session.model_dump(exclude={"players"})
+                players = [session.players[pid].model_dump() for pid in pids if pid in session.players]
+                write = (storage.save_players, code, players, head)
+            else:
+                write = (storage.save_session_dict, code, session.model_dump())
+            try:
+                await loop.run_in_executor(self._executor, self._save, code, seq, write)
+            except BaseException:
+                # includes cancellation by stop(): the final flush then rewrites it
+                self._dirty.add(code)
+                session.touch_all()
+                raise
+
+    def _save(self, code: str, seq: Optional[int], write: tuple) -> None:
+        # persist thread: the snapshot, then the journal logs it made redundant
+        write[0](*write[1:])
+        if seq is not None:
+            self._journal.end_compaction(code, seq)
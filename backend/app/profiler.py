@@ -0,0 +1,140 @@
+from __future__ import annotations
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Counter, Dict, List, Optional, Tuple
+
+# Longest profile a single start request may ask for (seconds)
+MAX_SECONDS = float(os.getenv("QUIZ_PROFILE_MAX_SECONDS", "300"))
+MAX_DEPTH = 128
+
+Frame = Tuple[str, str]  # (file, function)
+
+
+def _frame_label(frame: Frame) -> str:
+    path, func = frame
+    return f"{os.path.basename(path)}:{func}"
+
+
+class SamplingProfiler:
+    """Statistical profiler: a thread samples the running stacks every few ms.
+
+    Nothing is installed while it is stopped (no tracing hooks, no wrappers), so the
+    idle cost is zero. While running, each sample walks the sampled thread's frames
+    once. With `function` set, only samples taken while that function is on the
+    stack count, and their stacks start at it. That way one handler can be profiled
+    (submit_answer, _reveal_answers, ...) without the rest of the server.
+
+    Results are kept until the next start: collapsed() is the flamegraph.pl /
+    speedscope input ("a;b;c count" per line), report() the top-functions table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter[Tuple[Frame, ...]] = collections.Counter()
+        self.samples = 0
+        self.meta: Dict = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval_ms: float = 5.0, function: Optional[str] = None, thread_id: Optional[int] = None, all_threads: bool = False) -> bool:
+        """Start sampling `thread_id` (default: the caller's thread) for `seconds`; False if already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._stacks = collections.Counter()
+            self.samples = 0
+            self.meta = {
+                "function": function or None,
+                "intervalMs": max(1.0, float(interval_ms)),
+                "seconds": min(max(0.1, float(seconds)), MAX_SECONDS),
+                "allThreads": bool(all_threads),
+                "startedAt": time.time(),
+                "elapsed": 0.0,
+            }
+            target = threading.get_ident() if thread_id is None else thread_id
+            self._thread = threading.Thread(target=self._run, args=(target,), name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+
+    def _run(self, target: int) -> None:
+        meta = self.meta
+        interval = meta["intervalMs"] / 1000.0
+        function = meta["function"]
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        started = time.perf_counter()
+        deadline = started + meta["seconds"]
+        while not self._stop.wait(interval):
+            frames = sys._current_frames()
+            if meta["allThreads"]:
+                picked = [(tid, f) for tid, f in frames.items() if tid != me]
+            else:
+                picked = [(target, frames[target])] if target in frames else []
+            for tid, frame in picked:
+                stack = self._walk(frame)
+                if function is not None:
+                    cut = next((i for i, fr in enumerate(stack) if fr[1] == function), None)
+                    if cut is None:
+                        continue
+                    stack = stack[cut:]
+                if meta["allThreads"]:
+                    stack = (("thread", names.get(tid) or str(tid)),) + stack
+                self._stacks[stack] += 1
+            self.samples += 1
+            if time.perf_counter() >= deadline:
+                break
+        meta["elapsed"] = round(time.perf_counter() - started, 3)
+
+    @staticmethod
+    def _walk(frame) -> Tuple[Frame, ...]:
+        out: List[Frame] = []
+        while frame is not None and len(out) < MAX_DEPTH:
+            code = frame.f_code
+            out.append((code.co_filename, code.co_name))
+            frame = frame.f_back
+        out.reverse()  # root first
+        return tuple(out)
+
+    def collapsed(self) -> str:
+        lines = []
+        for stack, count in sorted(self._stacks.items(), key=lambda kv: -kv[1]):
+            lines.append(";".join(_frame_label(f) if f[0] != "thread" else f"thread:{f[1]}" for f in stack) + f" {count}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def report(self, top: int = 30) -> Dict:
+        self_counts: Counter[Frame] = collections.Counter()
+        total_counts: Counter[Frame] = collections.Counter()
+        matched = 0
+        for stack, count in list(self._stacks.items()):
+            matched += count
+            frames = [f for f in stack if f[0] != "thread"]
+            if frames:
+                self_counts[frames[-1]] += count
+            for f in set(frames):
+                total_counts[f] += count
+        rows = []
+        for frame, total in total_counts.most_common(top):
+            rows.append({
+                "function": _frame_label(frame),
+                "file": frame[0],
+                "self": self_counts.get(frame, 0),
+                "total": total,
+                "selfPct": round(100.0 * self_counts.get(frame, 0) / matched, 1) if matched else 0.0,
+                "totalPct": round(100.0 * total / matched, 1) if matched else 0.0,
+            })
+        rows.sort(key=lambda r: (-r["self"], -r["total"]))
+        return {"running": self.running, **self.meta, "samples": self.samples, "matched": matched, "top": rows}
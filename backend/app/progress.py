@@ -0,0 +1,61 @@
+from __future__ import annotations
+import os
+from typing import Dict, List, Optional
+
+
+# How often batched answers-progress deltas are flushed to admins (per second).
+PROGRESS_HZ = float(os.getenv("QUIZ_PROGRESS_HZ", "10"))
+
+
+class AnswersProgress:
+    """Versioned answers-progress feed for one session.
+
+    Every lock (and every newly registered player) bumps `version` and is queued in
+    O(1). take_delta() drains the queue into one `answers_progress_delta` payload.
+    `epoch` changes whenever the per-question answers are cleared; admins then need a
+    fresh full snapshot. Items carry their version so a client that received a
+    snapshot mid-batch can skip what it already has.
+    """
+
+    def __init__(self):
+        self.epoch = 0
+        self.version = 0
+        self._flushed_version = 0
+        self._locked: List[Dict] = []
+        self._players: List[Dict] = []
+
+    def reset(self) -> None:
+        self.epoch += 1
+        self.version = 0
+        self._flushed_version = 0
+        self._locked = []
+        self._players = []
+
+    def record_lock(self, pid: str, name: str) -> None:
+        self.version += 1
+        self._locked.append({"id": pid, "name": name, "v": self.version})
+
+    def record_player(self, pid: str, name: str) -> None:
+        self.version += 1
+        self._players.append({"id": pid, "name": name, "v": self.version})
+
+    @property
+    def pending(self) -> int:
+        return len(self._locked) + len(self._players)
+
+    def take_delta(self, locked_count: int, players_count: int) -> Optional[Dict]:
+        if not self._locked and not self._players:
+            return None
+        delta = {
+            "epoch": self.epoch,
+            "fromVersion": self._flushed_version,
+            "version": self.version,
+            "locked": self._locked,
+            "players": self._players,
+            "lockedCount": locked_count,
+            "playersCount": players_count,
+        }
+        self._flushed_version = self.version
+        self._locked = []
+        self._players = []
+        return delta
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# Validated question sets kept in memory (see QuestionSetCache)
+QSET_CACHE_SIZE = max(0, int(os.getenv("QUIZ_QSET_CACHE_SIZE", "16")))
+
+
+def _dumps(value: Any) -> str:
+    # same separators Socket.IO uses when encoding packets
+    return json.dumps(value, separators=(",", ":"))
+
+
+class CachedQuestion:
+    """Player-safe broadcast of one question, serialized once.
+
+    `question` is the model dump with the answer blanked (shared: do not mutate);
+    `question_json` is its JSON text. Only startedAt/serverTime/remaining vary per
+    send and are filled in by payload()/payload_json().
+    """
+
+    __slots__ = ("index", "duration", "question", "question_json", "_head")
+
+    def __init__(self, index: int, question: Any):
+        q_player = question.model_dump()
+        if "answer" in q_player:
+            q_player["answer"] = None
+        self.index = index
+        self.duration = question.duration
+        self.question = q_player
+        self.question_json = _dumps(q_player)
+        self._head = '{"question":' + self.question_json + ',"index":' + _dumps(index) + ',"duration":' + _dumps(self.duration) + ","
+
+    def payload(self, started_at: Optional[float], now: float, remaining: float) -> Dict:
+        return {"question": self.question, "index": self.index, "duration": self.duration, "startedAt": started_at, "serverTime": now, "remaining": remaining}
+
+    def payload_json(self, started_at: Optional[float], now: float, remaining: float) -> str:
+        # splice the time-dependent tail onto the pre-serialized head
+        return self._head + _dumps({"startedAt": started_at, "serverTime": now, "remaining": remaining})[1:]
+
+
+class QuestionCache:
+    """Per-session CachedQuestion entries keyed by question index.
+
+    Call invalidate() whenever the session's question list is replaced.
+    """
+
+    def __init__(self):
+        self._entries: Dict[int, CachedQuestion] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, index: int, question: Any) -> CachedQuestion:
+        entry = self._entries.get(index)
+        if entry is None:
+            self.misses += 1
+            entry = CachedQuestion(index, question)
+            self._entries[index] = entry
+        else:
+            self.hits += 1
+        return entry
+
+    def invalidate(self) -> None:
+        self._entries = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ValidatedQuestionSet:
+    """A question set already parsed into Question models (shared: do not mutate)."""
+
+    __slots__ = ("questions", "_dumped")
+
+    def __init__(self, questions: Sequence[Any]):
+        self.questions = tuple(questions)
+        self._dumped: Optional[List[Dict]] = None
+
+    def dumped(self) -> List[Dict]:
+        if self._dumped is None:
+            self._dumped = [q.model_dump() for q in self.questions]
+        return self._dumped
+
+
+class QuestionSetCache:
+    """Bounded LRU of ValidatedQuestionSet keyed by (set name, content hash).
+
+    A saved or edited set gets a new hash, so stale entries are never returned; they
+    just age out.
+    """
+
+    def __init__(self, capacity: int = QSET_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: "OrderedDict[Tuple[str, str], ValidatedQuestionSet]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, digest: str) -> Optional[ValidatedQuestionSet]:
+        entry = self._entries.get((name, digest))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end((name, digest))
+        return entry
+
+    def put(self, name: str, digest: str, questions: Sequence[Any]) -> ValidatedQuestionSet:
+        entry = ValidatedQuestionSet(questions)
+        if self.capacity <= 0:
+            return entry
+        self._entries[(name, digest)] = entry
+        self._entries.move_to_end((name, digest))
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> Dict:
+        return {"size": len(self._entries), "capacity": self.capacity, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._entries)
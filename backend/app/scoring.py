@@ -0,0 +1,116 @@
+from __future__ import annotations
+import time
+from typing import Dict, List, Optional
+
+from sortedcontainers import SortedList
+
+
+def normalize_answer(value) -> str:
+    return str(value).strip().lower()
+
+
+class ScoreTable:
+    """Per-answer results of one reveal, in the order answers were locked.
+
+    Columns are parallel lists: player_ids, correct, elapsed (clamped seconds),
+    awarded points and rank (1-based among correct answers, by submit time, else None).
+    `ranked` lists the correct responders fastest first. Both the score update and the
+    per-player answer_result fan-out read from here, so nothing is recomputed.
+    """
+
+    def __init__(self, player_ids: List[str], correct: List[bool], elapsed: List[float], awarded: List[int], rank: List[Optional[int]], ranked: List[str]):
+        self.player_ids = player_ids
+        self.correct = correct
+        self.elapsed = elapsed
+        self.awarded = awarded
+        self.rank = rank
+        self.ranked = ranked
+        self._pos: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.player_ids)
+
+    def row(self, pid: str) -> Optional[Dict]:
+        if self._pos is None:
+            self._pos = {p: i for i, p in enumerate(self.player_ids)}
+        i = self._pos.get(pid)
+        if i is None:
+            return None
+        return {"correct": self.correct[i], "elapsed": self.elapsed[i], "awarded": self.awarded[i], "rank": self.rank[i]}
+
+
+class ProvisionalScores:
+    """Results of the current question, filled in as answers are locked.
+
+    add() scores each answer when it is locked: elapsed = submit - start - paused
+    (>= 0), clamped to the duration; awarded = round(max_points * remaining / duration)
+    for correct answers. Reveal then only commits table(). Correct answers are kept
+    in a SortedList by submit time (then lock order), so one stamped earlier than the
+    last (forwarded from another worker, clock-compensated) costs O(log n) like any
+    other; ranks are numbered once per table() and cached until the next add().
+    An answer without a submit time is scored as submitted at the question start and
+    ranks after all timed ones.
+    Elapsed time excludes all pause time of the question: repause() re-derives
+    elapsed/points when the paused total grows (on resume).
+    `key` identifies the question round the table belongs to.
+    """
+
+    def __init__(self, key: tuple, correct_answer: Optional[str], started_at: Optional[float], duration: float, max_points: int, paused_total: float = 0.0):
+        self.key = key
+        self._target = normalize_answer(correct_answer) if correct_answer is not None else None
+        self._started_at = started_at
+        self._dur = float(duration or 0)
+        self._max_points = max_points
+        self.paused_total = paused_total or 0.0
+        self.player_ids: List[str] = []
+        self.correct: List[bool] = []
+        self.elapsed: List[float] = []
+        self.awarded: List[int] = []
+        self._times: List[float] = []
+        self._ranked = SortedList()  # (submit time, answer index) of correct answers
+        self._table: Optional[ScoreTable] = None
+
+    def __len__(self) -> int:
+        return len(self.player_ids)
+
+    def _score(self, t: float, correct: bool):
+        e = 0.0
+        if self._started_at:
+            e = max(0.0, t - self._started_at - self.paused_total)
+        dur = self._dur
+        e = min(e, dur) if dur > 0 else e
+        pts = int(round(self._max_points * (max(0.0, dur - e) / dur))) if correct and dur > 0 else 0
+        return e, pts
+
+    def add(self, pid: str, answer: str, t: Optional[float]) -> None:
+        correct = True if self._target is None else normalize_answer(answer) == self._target
+        ts = t if t is not None else (self._started_at or time.time())
+        e, pts = self._score(ts, correct)
+        i = len(self.player_ids)
+        self.player_ids.append(pid)
+        self.correct.append(correct)
+        self.elapsed.append(e)
+        self.awarded.append(pts)
+        self._times.append(ts)
+        if correct:
+            self._ranked.add((t if t is not None else float("inf"), i))
+        self._table = None
+
+    def repause(self, paused_total: float) -> None:
+        paused_total = paused_total or 0.0
+        if paused_total == self.paused_total:
+            return
+        self.paused_total = paused_total
+        for i, t in enumerate(self._times):
+            self.elapsed[i], self.awarded[i] = self._score(t, self.correct[i])
+        self._table = None
+
+    def table(self) -> ScoreTable:
+        if self._table is None:
+            rank: List[Optional[int]] = [None] * len(self.player_ids)
+            ranked: List[str] = []
+            for r, (_, i) in enumerate(self._ranked, start=1):
+                rank[i] = r
+                ranked.append(self.player_ids[i])
+            self._table = ScoreTable(self.player_ids, self.correct, self.elapsed, self.awarded, rank, ranked)
+        return self._table
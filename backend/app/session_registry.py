@@ -0,0 +1,75 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+
+class SessionRegistry:
+    """Sessions by code, loaded from storage the first time they are asked for.
+
+    Startup only registers the codes found on disk (discover()); get() calls
+    `loader(code)` once per code to build the session (snapshot plus journal replay).
+    Membership, keys() and len() cover every known code, but values()/items() only
+    visit sessions that are loaded: an archived quiz that nobody touched has no
+    players connected, no timers and nothing to flush.
+    """
+
+    def __init__(self, loader: Callable[[str], Optional[Any]]):
+        self._loader = loader
+        self._loaded: Dict[str, Any] = {}
+        self._known: Set[str] = set()
+        self.loads = 0
+
+    def discover(self, codes: Iterable[str]) -> None:
+        for code in codes:
+            if code not in self._loaded:
+                self._known.add(code)
+
+    def is_loaded(self, code: str) -> bool:
+        return code in self._loaded
+
+    def get(self, code: str, default: Any = None) -> Any:
+        session = self._loaded.get(code)
+        if session is not None:
+            return session
+        if code not in self._known:
+            return default
+        self._known.discard(code)
+        session = self._loader(code)
+        if session is None:
+            return default
+        self.loads += 1
+        self._loaded[code] = session
+        return session
+
+    def __getitem__(self, code: str) -> Any:
+        session = self.get(code)
+        if session is None:
+            raise KeyError(code)
+        return session
+
+    def __setitem__(self, code: str, session: Any) -> None:
+        self._known.discard(code)
+        self._loaded[code] = session
+
+    def __contains__(self, code: object) -> bool:
+        return code in self._loaded or code in self._known
+
+    def __len__(self) -> int:
+        return len(self._loaded) + len(self._known)
+
+    def pop(self, code: str, default: Any = None) -> Any:
+        """Forget `code`. Returns its session if loaded; a cold one is not read just to drop it."""
+        self._known.discard(code)
+        return self._loaded.pop(code, default)
+
+    def clear(self) -> None:
+        self._loaded.clear()
+        self._known.clear()
+
+    def keys(self) -> List[str]:
+        return sorted(self._loaded.keys() | self._known)
+
+    def values(self) -> List[Any]:
+        return list(self._loaded.values())
+
+    def items(self) -> List[tuple]:
+        return list(self._loaded.items())
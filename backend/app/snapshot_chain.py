@@ -0,0 +1,126 @@
+from __future__ import annotations
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# A full keyframe is written at least every N snapshots of a session; the ones in
+# between only store the rows that changed since the previous snapshot.
+KEYFRAME_EVERY = max(1, int(os.getenv("QUIZ_SNAPSHOT_KEYFRAME_EVERY", "20")))
+# Keep at most this many snapshots per session (0 = keep all)
+RETAIN = max(0, int(os.getenv("QUIZ_SNAPSHOT_RETAIN", "0")))
+
+
+def row_sort_key(row: Dict) -> Tuple:
+    # leaderboard.leaderboard_key from a serialized row; cumTime is rounded to 1ms there,
+    # so players tied on score/firsts within 1ms come back in name order
+    return (-(row.get("score") or 0), -(row.get("firsts") or 0), row.get("cumTime") or 0.0, row.get("name") or "", row.get("id") or "")
+
+
+def diff_rows(prev: Dict[str, Dict], rows: List[Dict]) -> Dict:
+    """Delta that turns `prev` (id -> row) into `rows`.
+
+    Changed players only carry their id plus the fields that differ; usually that is
+    score/firsts/cumTime. Rows from LeaderboardIndex are cached per player, so an
+    unchanged player is normally the very same dict and skipped by identity.
+    """
+    changed: List[Dict] = []
+    added = 0
+    for row in rows:
+        old = prev.get(row["id"])
+        if old is row:
+            continue
+        if old is None:
+            changed.append(row)
+            added += 1
+        elif old != row:
+            fields = {k: v for k, v in row.items() if old.get(k) != v}
+            fields["id"] = row["id"]
+            changed.append(fields)
+    removed: List[str] = []
+    if len(prev) > len(rows) - added:
+        current = {row["id"] for row in rows}
+        removed = [pid for pid in prev if pid not in current]
+    return {"set": changed, "del": removed}
+
+
+def apply_delta(state: Dict[str, Dict], delta: Dict) -> None:
+    for pid in delta.get("del") or ():
+        state.pop(pid, None)
+    for fields in delta.get("set") or ():
+        old = state.get(fields["id"])
+        state[fields["id"]] = {**old, **fields} if old is not None else dict(fields)
+
+
+def ordered_rows(state: Dict[str, Dict]) -> List[Dict]:
+    return sorted(state.values(), key=row_sort_key)
+
+
+def is_delta(record: Any) -> bool:
+    return isinstance(record, dict)
+
+
+class _Head:
+    __slots__ = ("name", "state", "depth")
+
+    def __init__(self, name: str, state: Dict[str, Dict], depth: int):
+        self.name = name
+        self.state = state
+        self.depth = depth
+
+
+class SnapshotChains:
+    """Newest snapshot of each session code, kept in memory to diff the next one against.
+
+    A record is either a keyframe (list of leaderboard rows) or a delta
+    ({"base": previous snapshot name, "set": [...], "del": [...]}). Any snapshot is
+    rebuilt by following bases back to a keyframe, at most KEYFRAME_EVERY steps.
+    After a restart the first snapshot of a code is a keyframe again.
+    """
+
+    def __init__(self, keyframe_every: int = KEYFRAME_EVERY):
+        self.keyframe_every = keyframe_every
+        self._heads: Dict[str, _Head] = {}
+
+    def encode(self, code: str, name: str, rows: List[Dict], base_exists) -> Tuple[Any, _Head]:
+        """Record to store for `rows` plus the head to commit() once it is written."""
+        state = {row["id"]: row for row in rows}
+        head = self._heads.get(code)
+        if head is not None and head.depth + 1 < self.keyframe_every and base_exists(head.name):
+            return {"base": head.name, **diff_rows(head.state, rows)}, _Head(name, state, head.depth + 1)
+        return list(rows), _Head(name, state, 0)
+
+    def commit(self, code: str, head: _Head) -> None:
+        self._heads[code] = head
+
+    def head_name(self, code: str) -> Optional[str]:
+        head = self._heads.get(code)
+        return head.name if head is not None else None
+
+    def forget(self, code: Optional[str] = None) -> None:
+        if code is None:
+            self._heads.clear()
+        else:
+            self._heads.pop(code, None)
+
+
+def rebuild(name: str, get_record) -> Optional[Tuple[str, Optional[str], List[Dict]]]:
+    """(code, createdAt, rows) of snapshot `name`; get_record(name) -> (code, createdAt, record) or None."""
+    found = get_record(name)
+    if found is None:
+        return None
+    code, created_at, record = found
+    deltas: List[Dict] = []
+    seen = {name}
+    while is_delta(record):
+        deltas.append(record)
+        base = record.get("base")
+        base_found = get_record(base) if base and base not in seen else None
+        if base_found is None:
+            # broken chain (base deleted outside compact): nothing to rebuild from
+            return None
+        seen.add(base)
+        record = base_found[2]
+    state = {row["id"]: dict(row) for row in record}
+    for delta in reversed(deltas):
+        apply_delta(state, delta)
+    return code, created_at, ordered_rows(state)
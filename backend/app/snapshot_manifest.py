@@ -0,0 +1,192 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process only
+    fcntl = None
+
+
+MANIFEST_DIR = "_manifest"
+SUFFIX = ".jsonl"
+
+
+def snapshot_entry(name: str, code: str, created_at: Optional[str], count: int, body: bytes, human: Optional[str]) -> Dict:
+    return {
+        "name": name,
+        "file": f"{name}.json",
+        "code": code,
+        "createdAt": created_at,
+        "createdAtHuman": human,
+        "count": count,
+        "bytes": len(body),
+        "checksum": "sha256:" + hashlib.sha256(body).hexdigest(),
+    }
+
+
+class SnapshotManifest:
+    """Catalog of the leaderboard snapshot files in one directory.
+
+    One JSON-lines log per session code under <dir>/_manifest holds snapshot
+    metadata, so listing never opens the snapshot files. A save appends one entry
+    line; removals append a {"removed": [names]} line, and the log is rewritten with
+    only the live entries once it holds more dead lines than live ones. Sessions are
+    owned by a single worker in multi-worker mode, but the manifest is also read (and
+    cleared) from other workers: mutations take an flock, and readers only parse the
+    bytes appended since their last read (all of it again after a rewrite).
+    """
+
+    def __init__(self, snapshot_dir: str, describe):
+        # describe(file_name, body) -> entry dict, used to rebuild from the files
+        self._snapshot_dir = snapshot_dir
+        self._dir = os.path.join(snapshot_dir, MANIFEST_DIR)
+        self._describe = describe
+        self._ready = False
+        # code -> (inode, bytes read, live entries, lines read)
+        self._cache: Dict[str, Tuple[int, int, Dict[str, Dict], int]] = {}
+
+    def _path(self, code: str) -> str:
+        return os.path.join(self._dir, f"{code}{SUFFIX}")
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self._dir, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self._dir, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _ensure(self) -> None:
+        if self._ready:
+            return
+        with self._locked():
+            if not any(n.endswith(SUFFIX) for n in os.listdir(self._dir)):
+                self._rebuild()
+        self._ready = True
+
+    def _rebuild(self) -> None:
+        # One-off scan for directories written before the manifest existed, or
+        # that still have the older one-JSON-object-per-code manifests
+        by_code: Dict[str, Dict[str, Dict]] = {}
+        legacy = [n for n in os.listdir(self._dir) if n.endswith(".json")]
+        for fname in legacy:
+            try:
+                with open(os.path.join(self._dir, fname), "rb") as f:
+                    by_code[fname[:-len(".json")]] = json.loads(f.read())
+            except (OSError, ValueError):
+                by_code.clear()
+                break
+        if legacy and by_code:
+            for code, entries in by_code.items():
+                self._rewrite(code, entries)
+            for fname in legacy:
+                os.remove(os.path.join(self._dir, fname))
+            return
+        for fname in os.listdir(self._snapshot_dir):
+            if not fname.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self._snapshot_dir, fname), "rb") as f:
+                    entry = self._describe(fname, f.read())
+            except Exception:
+                continue
+            by_code.setdefault(entry["code"], {})[entry["name"]] = entry
+        for code, entries in by_code.items():
+            self._rewrite(code, entries)
+
+    def _read(self, code: str) -> Dict[str, Dict]:
+        path = self._path(code)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            self._cache.pop(code, None)
+            return {}
+        with f:
+            ino = os.fstat(f.fileno()).st_ino
+            cached = self._cache.get(code)
+            if cached is not None and cached[0] == ino:
+                _, offset, entries, lines = cached
+            else:
+                offset, entries, lines = 0, {}, 0
+            f.seek(offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1  # a line still being written is read next time
+        if end:
+            entries = dict(entries)
+            for line in chunk[:end].splitlines():
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                lines += 1
+                if "removed" in rec:
+                    for name in rec["removed"]:
+                        entries.pop(name, None)
+                else:
+                    entries[rec["name"]] = rec
+        self._cache[code] = (ino, offset + end, entries, lines)
+        return entries
+
+    def _append(self, code: str, records: List[Dict]) -> None:
+        with open(self._path(code), "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, separators=(",", ":"), ensure_ascii=False) + "\n" for r in records))
+
+    def _rewrite(self, code: str, entries: Dict[str, Dict]) -> None:
+        path = self._path(code)
+        self._cache.pop(code, None)
+        if not entries:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, separators=(",", ":"), ensure_ascii=False) + "\n" for e in entries.values()))
+        os.replace(tmp, path)
+
+    def codes(self) -> List[str]:
+        self._ensure()
+        return sorted(n[:-len(SUFFIX)] for n in os.listdir(self._dir) if n.endswith(SUFFIX))
+
+    def add(self, entry: Dict) -> None:
+        self._ensure()
+        with self._locked():
+            self._append(entry["code"], [entry])
+
+    def remove(self, code: str, names: Iterable[str]) -> None:
+        self._ensure()
+        with self._locked():
+            entries = self._read(code)
+            names = [n for n in names if n in entries]
+            if not names:
+                return
+            live = {k: v for k, v in entries.items() if k not in set(names)}
+            if self._cache[code][3] + 1 - len(live) > len(live):
+                # mostly dead lines: keep only the live entries
+                self._rewrite(code, live)
+            else:
+                self._append(code, [{"removed": names}])
+
+    def entries(self, code: Optional[str] = None) -> List[Dict]:
+        """Entries for one code (or every code), newest first."""
+        self._ensure()
+        codes = [code] if code else self.codes()
+        out: List[Dict] = []
+        for c in codes:
+            out.extend(self._read(c).values())
+        out.sort(key=lambda e: e["name"], reverse=True)
+        return out
+
+    def clear(self, code: Optional[str] = None) -> None:
+        self._ensure()
+        with self._locked():
+            for c in ([code] if code else self.codes()):
+                self._rewrite(c, {})
@@ -0,0 +1,326 @@
+from __future__ import annotations
+import json
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import metrics
+from .snapshot_manifest import snapshot_entry
+from .storage import StorageBackend, _human_timestamp, _sanitized_name, decode_session, encode_session, session_format
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    code TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    code TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (code, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS question_sets (
+    name TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    hash TEXT NOT NULL DEFAULT '',
+    updated_at REAL NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leaderboard_snapshots (
+    name TEXT PRIMARY KEY,
+    code TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    checksum TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leaderboard_snapshots_code ON leaderboard_snapshots (code, name);
+"""
+
+# Statements are kept as constants so sqlite3's statement cache reuses the prepared form.
+_UPSERT_SESSION = "INSERT INTO sessions (code, data) VALUES (?, ?) ON CONFLICT(code) DO UPDATE SET data = excluded.data"
+_UPSERT_PLAYER = "INSERT INTO players (code, id, data) VALUES (?, ?, ?) ON CONFLICT(code, id) DO UPDATE SET data = excluded.data"
+_DELETE_PLAYER = "DELETE FROM players WHERE code = ? AND id = ?"
+_SELECT_SESSION = "SELECT data FROM sessions WHERE code = ?"
+_SELECT_PLAYERS = "SELECT id, data FROM players WHERE code = ?"
+_UPSERT_QSET = (
+    "INSERT INTO question_sets (name, count, bytes, hash, updated_at, data) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(name) DO UPDATE SET count = excluded.count, bytes = excluded.bytes, hash = excluded.hash, "
+    "updated_at = excluded.updated_at, data = excluded.data"
+)
+_QSET_META_COLUMNS = "SELECT name, count, updated_at, bytes, hash FROM question_sets"
+# Columns added after the first release, created in place on older databases
+_ADDED_COLUMNS = {
+    "leaderboard_snapshots": {
+        "bytes": "INTEGER NOT NULL DEFAULT 0",
+        "checksum": "TEXT NOT NULL DEFAULT ''",
+    },
+    "question_sets": {
+        "bytes": "INTEGER NOT NULL DEFAULT 0",
+        "hash": "TEXT NOT NULL DEFAULT ''",
+        "updated_at": "REAL NOT NULL DEFAULT 0",
+    },
+}
+_UPSERT_SNAPSHOT = (
+    "INSERT INTO leaderboard_snapshots (name, code, created_at, count, bytes, checksum, data) VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(name) DO UPDATE SET code = excluded.code, created_at = excluded.created_at, count = excluded.count, "
+    "bytes = excluded.bytes, checksum = excluded.checksum, data = excluded.data"
+)
+_SNAPSHOT_COLUMNS = "SELECT name, code, created_at, count, bytes, checksum FROM leaderboard_snapshots"
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _decode(data):
+    # TEXT rows are JSON, BLOB rows are msgpack
+    return json.loads(data) if isinstance(data, str) else decode_session(data)
+
+
+def _qset_meta(row) -> Dict:
+    name, count, updated_at, size, digest = row
+    return {"name": name, "count": int(count), "mtime": updated_at, "size": int(size), "hash": digest}
+
+
+class SqliteBackend(StorageBackend):
+    """SQLite storage (WAL mode). Sessions are split into a session row plus one row
+    per player; save_players() writes the session row plus the given players, and a
+    full save only rewrites the player rows that changed since the previous save,
+    each inside a single transaction. With QUIZ_SESSION_FORMAT=msgpack those
+    rows hold msgpack BLOBs instead of JSON text; reads accept both.
+    """
+
+    saves_players = True
+
+    def __init__(self, path: str, session_fmt: Optional[str] = None):
+        super().__init__()
+        self._session_fmt = session_format(session_fmt)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        # One connection shared by the event loop and the persistence thread
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=128)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            for table, added in _ADDED_COLUMNS.items():
+                columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                for column, ddl in added.items():
+                    if column not in columns:
+                        self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+            # question sets saved before their metadata was tracked
+            for name, data in self._conn.execute("SELECT name, data FROM question_sets WHERE hash = ''").fetchall():
+                body = data.encode("utf-8")
+                self._conn.execute(
+                    "UPDATE question_sets SET bytes = ?, hash = ? WHERE name = ?",
+                    (len(body), hashlib.sha256(body).hexdigest(), name),
+                )
+        # code -> {playerId: player dict as last written}, used to diff player rows
+        self._written_players: Dict[str, Dict[str, Dict]] = {}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        # Callers hold self._lock; the connection runs in autocommit mode otherwise
+        self._conn.execute("BEGIN")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    # --- Sessions ---
+    def _encode(self, obj):
+        if self._session_fmt == "json":
+            return _dumps(obj)
+        return encode_session(obj, self._session_fmt)
+
+    def save_session_dict(self, code: str, data: Dict) -> None:
+        code = str(code).upper()
+        players = data.get("players") or {}
+        head = {k: v for k, v in data.items() if k != "players"}
+        written = self._written_players.get(code)
+        if written is None:
+            written = self._load_player_dicts(code)
+        changed = [(code, pid, self._encode(p)) for pid, p in players.items() if written.get(pid) != p]
+        removed = [(code, pid) for pid in written.keys() - players.keys()]
+        head_body = self._encode(head)
+        # only changed player rows are written
+        metrics.SESSION_SAVE_BYTES.observe(len(head_body) + sum(len(row[2]) for row in changed))
+        with self._lock, self._transaction() as conn:
+            conn.execute(_UPSERT_SESSION, (code, head_body))
+            if changed:
+                conn.executemany(_UPSERT_PLAYER, changed)
+            if removed:
+                conn.executemany(_DELETE_PLAYER, removed)
+        self._written_players[code] = dict(players)
+
+    def save_players(self, code: str, players: Iterable[Dict], head: Optional[Dict] = None) -> None:
+        """Upsert individual player rows (and the session row when `head` is given)
+        without touching the other players."""
+        code = str(code).upper()
+        players = list(players)
+        rows = [(code, p["id"], self._encode(p)) for p in players]
+        head_body = self._encode(head) if head is not None else None
+        if not rows and head_body is None:
+            return
+        metrics.SESSION_SAVE_BYTES.observe(len(head_body or "") + sum(len(row[2]) for row in rows))
+        with self._lock, self._transaction() as conn:
+            if head_body is not None:
+                conn.execute(_UPSERT_SESSION, (code, head_body))
+            if rows:
+                conn.executemany(_UPSERT_PLAYER, rows)
+        written = self._written_players.get(code)
+        if written is not None:
+            for p in players:
+                written[p["id"]] = p
+
+    def _load_player_dicts(self, code: str) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute(_SELECT_PLAYERS, (code,)).fetchall()
+        return {pid: _decode(data) for pid, data in rows}
+
+    def load_session_dict(self, code: str) -> Dict | None:
+        code = str(code).upper()
+        with self._lock:
+            row = self._conn.execute(_SELECT_SESSION, (code,)).fetchone()
+        if row is None:
+            return None
+        data = _decode(row[0])
+        players = self._load_player_dicts(code)
+        self._written_players[code] = dict(players)
+        data["players"] = {pid: dict(p) for pid, p in players.items()}
+        return data
+
+    def load_all_session_dicts(self) -> Dict[str, Dict]:
+        out: Dict[str, Dict] = {}
+        for code in self.list_session_codes():
+            try:
+                data = self.load_session_dict(code)
+            except Exception:
+                continue
+            if data is not None:
+                out[code] = data
+        return out
+
+    def list_session_codes(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT code FROM sessions ORDER BY code").fetchall()]
+
+    def delete_session(self, code: str) -> None:
+        code = str(code).upper()
+        with self._lock, self._transaction() as conn:
+            conn.execute("DELETE FROM sessions WHERE code = ?", (code,))
+            conn.execute("DELETE FROM players WHERE code = ?", (code,))
+        self._written_players.pop(code, None)
+
+    # --- Question sets ---
+    def save_question_set(self, name: str, questions: List[Dict]) -> str:
+        safe = _sanitized_name(name)
+        body = _dumps(questions)
+        raw = body.encode("utf-8")
+        with self._lock:
+            self._conn.execute(_UPSERT_QSET, (safe, len(questions), len(raw), hashlib.sha256(raw).hexdigest(), time.time(), body))
+        return f"{safe}.json"
+
+    def read_question_set(self, name: str) -> Optional[Tuple[Dict, List[Dict]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, count, updated_at, bytes, hash, data FROM question_sets WHERE name = ?", (_sanitized_name(name),)
+            ).fetchone()
+        return (_qset_meta(row[:5]), json.loads(row[5])) if row else None
+
+    def question_set_meta(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(f"{_QSET_META_COLUMNS} WHERE name = ?", (_sanitized_name(name),)).fetchone()
+        return _qset_meta(row) if row else None
+
+    def list_question_set_meta(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(f"{_QSET_META_COLUMNS} ORDER BY name").fetchall()
+        return [_qset_meta(row) for row in rows]
+
+    def delete_question_set(self, name: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM question_sets WHERE name = ?", (_sanitized_name(name),))
+        return cur.rowcount > 0
+
+    # --- Leaderboard snapshots ---
+    def put_snapshot(self, name: str, code: str, created_at: str, count: int, record: Any) -> None:
+        # data holds either the keyframe rows (JSON array) or a delta (JSON object)
+        body = _dumps(record)
+        entry = snapshot_entry(name, code, created_at, count, body.encode("utf-8"), None)
+        metrics.SNAPSHOT_WRITE_BYTES.observe(entry["bytes"])
+        with self._lock:
+            self._conn.execute(_UPSERT_SNAPSHOT, (name, code, created_at, count, entry["bytes"], entry["checksum"], body))
+
+    def get_snapshot(self, name: str) -> Optional[Tuple[str, Optional[str], Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT code, created_at, data FROM leaderboard_snapshots WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def _has_snapshot(self, name: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM leaderboard_snapshots WHERE name = ?", (name,)).fetchone()
+        return row is not None
+
+    def _drop_snapshots(self, code: str, names: List[str]) -> int:
+        with self._lock, self._transaction() as conn:
+            cur = conn.executemany("DELETE FROM leaderboard_snapshots WHERE name = ?", [(name,) for name in names])
+        return cur.rowcount
+
+    def list_leaderboard_snapshots(self, code: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        # Metadata columns only; the leaderboard payload is never parsed for listing
+        where, params = ("WHERE code = ? ", [str(code).upper()]) if code else ("", [])
+        with self._lock:
+            rows = self._conn.execute(
+                f"{_SNAPSHOT_COLUMNS} {where}ORDER BY name DESC LIMIT ? OFFSET ?",
+                (*params, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return [
+            {
+                "name": name,
+                "file": f"{name}.json",
+                "code": snap_code,
+                "createdAt": created_at,
+                "createdAtHuman": _human_timestamp(created_at),
+                "count": int(count),
+                "bytes": int(size),
+                "checksum": checksum,
+            }
+            for name, snap_code, created_at, count, size, checksum in rows
+        ]
+
+    def count_leaderboard_snapshots(self, code: Optional[str] = None) -> int:
+        with self._lock:
+            if code:
+                row = self._conn.execute("SELECT COUNT(*) FROM leaderboard_snapshots WHERE code = ?", (str(code).upper(),)).fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM leaderboard_snapshots").fetchone()
+        return int(row[0])
+
+    def delete_leaderboard_snapshots(self, code: Optional[str] = None) -> int:
+        self._chains.forget(str(code).upper() if code else None)
+        with self._lock:
+            if code:
+                cur = self._conn.execute("DELETE FROM leaderboard_snapshots WHERE code = ?", (str(code).upper(),))
+            else:
+                cur = self._conn.execute("DELETE FROM leaderboard_snapshots")
+        return cur.rowcount
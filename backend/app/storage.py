@@ -1,7 +1,23 @@
 from __future__ import annotations
+import hashlib
 import json
 import os
-from typing import Dict, List, Optional, Tuple
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import metrics
+from .snapshot_chain import RETAIN, SnapshotChains, is_delta, rebuild
+from .snapshot_manifest import SnapshotManifest, snapshot_entry
+
+try:  # optional: QUIZ_SESSION_FORMAT=msgpack
+    import msgpack
+except ImportError:  # pragma: no cover - JSON only
+    msgpack = None
+
+
+# On-disk encoding of session snapshots; reads detect either format.
+SESSION_FORMATS = ("json", "msgpack")
 
 
 def get_data_dir() -> str:
@@ -14,193 +30,566 @@ def get_data_dir() -> str:
     return base
 
 
-def _session_path(code: str) -> str:
-    code = str(code).upper()
-    return os.path.join(get_data_dir(), "sessions", f"{code}.json")
+def _sanitized_name(name: str) -> str:
+    # allow alnum, dash, underscore only; lowercased
+    safe = ''.join(ch for ch in name if ch.isalnum() or ch in ('-', '_')).strip('-_').lower()
+    return safe or 'untitled'
 
 
-def save_session_dict(code: str, data: Dict) -> None:
-    path = _session_path(code)
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    os.replace(tmp, path)
+def _snapshot_timestamp() -> str:
+    import datetime as _dt
+    return _dt.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
 
 
-def load_session_dict(code: str) -> Dict | None:
-    path = _session_path(code)
-    if not os.path.exists(path):
+def session_format(kind: Optional[str] = None) -> str:
+    fmt = (kind or os.getenv("QUIZ_SESSION_FORMAT", "json")).strip().lower()
+    if fmt not in SESSION_FORMATS:
+        raise ValueError(f"Unknown QUIZ_SESSION_FORMAT: {fmt}")
+    if fmt == "msgpack" and msgpack is None:
+        raise RuntimeError("QUIZ_SESSION_FORMAT=msgpack needs the msgpack package (pip install msgpack)")
+    return fmt
+
+
+def encode_session(data: Any, fmt: str) -> bytes:
+    if fmt == "msgpack":
+        return msgpack.packb(data, use_bin_type=True)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode_session(body: bytes) -> Any:
+    # JSON snapshots are objects; a msgpack map never starts with "{" or whitespace
+    if body[:1] in (b"{", b"[", b" ", b"\n", b"\r", b"\t"):
+        return json.loads(body)
+    if msgpack is None:
+        raise RuntimeError("Session data is msgpack-encoded; install msgpack to read it")
+    return msgpack.unpackb(body, raw=False)
+
+
+def _question_set_meta(name: str, body: bytes, mtime: float) -> Dict:
+    try:
+        arr = json.loads(body)
+        count = len(arr) if isinstance(arr, list) else 0
+    except ValueError:
+        count = 0
+    return {"name": name, "count": count, "mtime": mtime, "size": len(body), "hash": hashlib.sha256(body).hexdigest()}
+
+
+def _human_timestamp(created_at) -> Optional[str]:
+    if not isinstance(created_at, str):
         return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    try:
+        import datetime as _dt
+        dt = _dt.datetime.strptime(created_at, "%Y%m%d_%H%M%S")
+        return dt.strftime("%Y-%m-%d %H:%M:%S UTC")
+    except Exception:
+        return created_at
 
 
-def load_all_session_dicts() -> Dict[str, Dict]:
-    base = get_data_dir()
-    sessions_dir = os.path.join(base, "sessions")
-    if not os.path.isdir(sessions_dir):
-        return {}
-    out: Dict[str, Dict] = {}
-    for name in os.listdir(sessions_dir):
-        if not name.endswith(".json"):
-            continue
-        code = name[:-5]
+class StorageBackend(ABC):
+    """Interface implemented by every storage backend.
+
+    The module-level functions below delegate to the configured backend
+    (QUIZ_STORAGE=json|sqlite), so callers never talk to a backend directly.
+
+    Leaderboard snapshots are stored as chains (see snapshot_chain.py): backends only
+    implement the raw record primitives (put_snapshot, get_snapshot, ...), the
+    keyframe/delta logic lives here.
+    """
+
+    # True when save_players() can write part of a session
+    saves_players = False
+
+    def __init__(self):
+        self._chains = SnapshotChains()
+
+    @abstractmethod
+    def save_session_dict(self, code: str, data: Dict) -> None:
+        raise NotImplementedError
+
+    def save_players(self, code: str, players: Iterable[Dict], head: Optional[Dict] = None) -> None:
+        """Write the session without its players (`head`) plus only the given player dicts.
+        Optional: only called on backends that set saves_players."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_session_dict(self, code: str) -> Dict | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def load_all_session_dicts(self) -> Dict[str, Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_session_codes(self) -> List[str]:
+        """Codes of all stored sessions, without reading them."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_session(self, code: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_question_set(self, name: str, questions: List[Dict]) -> str:
+        raise NotImplementedError
+
+    def load_question_set(self, name: str) -> Optional[List[Dict]]:
+        found = self.read_question_set(name)
+        return found[1] if found is not None else None
+
+    @abstractmethod
+    def read_question_set(self, name: str) -> Optional[Tuple[Dict, List[Dict]]]:
+        """(metadata, items) read together, so the metadata hash describes exactly these items."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def question_set_meta(self, name: str) -> Optional[Dict]:
+        """{name, count, mtime, size, hash} of a set, without parsing it when unchanged."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_question_set_meta(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def list_question_sets(self) -> List[Tuple[str, int]]:
+        return [(meta["name"], meta["count"]) for meta in self.list_question_set_meta()]
+
+    @abstractmethod
+    def delete_question_set(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def save_leaderboard_snapshot(self, code: str, leaderboard: List[Dict]) -> str:
+        code = str(code).upper()
+        ts = _snapshot_timestamp()
+        name = f"{code}_{ts}"
+        n = 1
+        while self._has_snapshot(name):
+            # two reveals within the same second
+            n += 1
+            name = f"{code}_{ts}_{n:03d}"
+        record, head = self._chains.encode(code, name, leaderboard, self._has_snapshot)
+        self.put_snapshot(name, code, ts, len(leaderboard), record)
+        self._chains.commit(code, head)
+        if RETAIN and self.count_leaderboard_snapshots(code) > RETAIN:
+            self.compact_leaderboard_snapshots(code, RETAIN)
+        return f"{name}.json"
+
+    def load_leaderboard_snapshot(self, file_name: str) -> Optional[Dict]:
+        name = file_name[:-5] if file_name.endswith('.json') else file_name
+        found = rebuild(name, self.get_snapshot)
+        if found is None:
+            return None
+        code, created_at, rows = found
+        return {"code": code, "createdAt": created_at, "leaderboard": rows}
+
+    def compact_leaderboard_snapshots(self, code: str, keep: int) -> int:
+        """Delete all but the newest `keep` snapshots of a code; returns how many were deleted.
+
+        The oldest snapshot kept is rewritten as a keyframe first, so the remaining
+        chain never points at a deleted base.
+        """
+        code = str(code).upper()
+        keep = max(0, int(keep))
+        entries = self.list_leaderboard_snapshots(code)
+        drop = [e["name"] for e in entries[keep:]]
+        if not drop:
+            return 0
+        if keep:
+            oldest = entries[keep - 1]["name"]
+            found = self.get_snapshot(oldest)
+            if found is not None and is_delta(found[2]):
+                rebuilt = rebuild(oldest, self.get_snapshot)
+                if rebuilt is not None:
+                    self.put_snapshot(oldest, code, rebuilt[1], len(rebuilt[2]), rebuilt[2])
+        else:
+            self._chains.forget(code)
+        return self._drop_snapshots(code, drop)
+
+    @abstractmethod
+    def put_snapshot(self, name: str, code: str, created_at: str, count: int, record: Any) -> None:
+        """Store a keyframe (list of rows) or delta (dict) under `name`, replacing any previous record."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_snapshot(self, name: str) -> Optional[Tuple[str, Optional[str], Any]]:
+        """(code, createdAt, record) or None; the record as stored, not rebuilt into rows."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _has_snapshot(self, name: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _drop_snapshots(self, code: str, names: List[str]) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_leaderboard_snapshots(self, code: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Snapshot metadata (no leaderboard rows), newest first; filtered by exact code."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def count_leaderboard_snapshots(self, code: Optional[str] = None) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_leaderboard_snapshots(self, code: Optional[str] = None) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonFileBackend(StorageBackend):
+    """One JSON file per session, question set and leaderboard snapshot under QUIZ_DATA_DIR.
+
+    Sessions are written as <code>.json or, with QUIZ_SESSION_FORMAT=msgpack, as
+    <code>.msgpack; either file is read back regardless of the configured format.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, session_fmt: Optional[str] = None):
+        super().__init__()
+        self._base_dir = base_dir
+        self._session_fmt = session_format(session_fmt)
+        self._manifest: Optional[SnapshotManifest] = None
+        # question set file stem -> ((mtime_ns, size), metadata)
+        self._qset_index: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+
+    def _base(self) -> str:
+        if self._base_dir:
+            for sub in ("sessions", "question_sets", "leaderboards"):
+                os.makedirs(os.path.join(self._base_dir, sub), exist_ok=True)
+            return self._base_dir
+        return get_data_dir()
+
+    def _session_path(self, code: str, fmt: str = "json") -> str:
+        code = str(code).upper()
+        return os.path.join(self._base(), "sessions", f"{code}.{fmt}")
+
+    def save_session_dict(self, code: str, data: Dict) -> None:
+        # Compact encoding: sessions with thousands of players are rewritten often
+        path = self._session_path(code, self._session_fmt)
+        tmp = path + ".tmp"
+        body = encode_session(data, self._session_fmt)
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+        metrics.SESSION_SAVE_BYTES.observe(len(body))
+        for fmt in SESSION_FORMATS:
+            # drop the copy left over from before a format switch
+            other = self._session_path(code, fmt)
+            if fmt != self._session_fmt and os.path.exists(other):
+                os.remove(other)
+
+    def load_session_dict(self, code: str) -> Dict | None:
+        # configured format first, then the other one
+        for fmt in sorted(SESSION_FORMATS, key=lambda f: f != self._session_fmt):
+            path = self._session_path(code, fmt)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    return decode_session(f.read())
+        return None
+
+    def load_all_session_dicts(self) -> Dict[str, Dict]:
+        out: Dict[str, Dict] = {}
+        for code in self.list_session_codes():
+            try:
+                data = self.load_session_dict(code)
+            except Exception:
+                # skip corrupt file
+                continue
+            if data is not None:
+                out[code] = data
+        return out
+
+    def list_session_codes(self) -> List[str]:
+        sessions_dir = os.path.join(self._base(), "sessions")
+        if not os.path.isdir(sessions_dir):
+            return []
+        codes = set()
+        for name in os.listdir(sessions_dir):
+            stem, _, ext = name.rpartition(".")
+            if stem and ext in SESSION_FORMATS:
+                codes.add(stem)
+        return sorted(codes)
+
+    def delete_session(self, code: str) -> None:
+        for fmt in SESSION_FORMATS:
+            path = self._session_path(code, fmt)
+            if os.path.exists(path):
+                os.remove(path)
+
+    # --- Question set (bank) helpers ---
+    def _qset_path(self, name: str) -> str:
+        return os.path.join(self._base(), "question_sets", f"{_sanitized_name(name)}.json")
+
+    def save_question_set(self, name: str, questions: List[Dict]) -> str:
+        path = self._qset_path(name)
+        tmp = path + ".tmp"
+        body = json.dumps(questions, indent=2, ensure_ascii=False).encode("utf-8")
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+        st = os.stat(path)
+        stem = os.path.basename(path)[:-5]
+        self._qset_index[stem] = ((st.st_mtime_ns, st.st_size), _question_set_meta(stem, body, st.st_mtime))
+        return os.path.basename(path)
+
+    def _qset_read(self, stem: str, path: str) -> Optional[Tuple[Dict, bytes]]:
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                body = f.read()
+        except FileNotFoundError:
+            self._qset_index.pop(stem, None)
+            return None
+        meta = _question_set_meta(stem, body, st.st_mtime)
+        self._qset_index[stem] = ((st.st_mtime_ns, st.st_size), meta)
+        return meta, body
+
+    def _qset_meta_at(self, stem: str, path: str) -> Optional[Dict]:
         try:
-            with open(os.path.join(sessions_dir, name), "r", encoding="utf-8") as f:
-                out[code] = json.load(f)
-        except Exception:
-            # skip corrupt file
-            continue
-    return out
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._qset_index.pop(stem, None)
+            return None
+        cached = self._qset_index.get(stem)
+        if cached is not None and cached[0] == (st.st_mtime_ns, st.st_size):
+            return cached[1]
+        found = self._qset_read(stem, path)
+        return found[0] if found is not None else None
+
+    def read_question_set(self, name: str) -> Optional[Tuple[Dict, List[Dict]]]:
+        path = self._qset_path(name)
+        found = self._qset_read(os.path.basename(path)[:-5], path)
+        if found is None:
+            return None
+        return found[0], json.loads(found[1])
+
+    def question_set_meta(self, name: str) -> Optional[Dict]:
+        path = self._qset_path(name)
+        return self._qset_meta_at(os.path.basename(path)[:-5], path)
+
+    def list_question_set_meta(self) -> List[Dict]:
+        # one stat per file; a set is only re-read after its mtime/size changed
+        qdir = os.path.join(self._base(), "question_sets")
+        out: List[Dict] = []
+        if not os.path.isdir(qdir):
+            return out
+        for name in sorted(os.listdir(qdir)):
+            if not name.endswith('.json'):
+                continue
+            meta = self._qset_meta_at(name[:-5], os.path.join(qdir, name))
+            if meta is not None:
+                out.append(meta)
+        return out
 
+    def delete_question_set(self, name: str) -> bool:
+        path = self._qset_path(name)
+        self._qset_index.pop(os.path.basename(path)[:-5], None)
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+
+    # --- Leaderboard snapshots ---
+    def _leaderboard_dir(self) -> str:
+        return os.path.join(self._base(), "leaderboards")
+
+    def _snapshots(self) -> SnapshotManifest:
+        if self._manifest is None:
+            self._manifest = SnapshotManifest(self._leaderboard_dir(), _describe_snapshot_file)
+        return self._manifest
+
+    def _snapshot_path(self, name: str) -> str:
+        return os.path.join(self._leaderboard_dir(), f"{os.path.basename(name)}.json")
+
+    def put_snapshot(self, name: str, code: str, created_at: str, count: int, record: Any) -> None:
+        payload = {"code": code, "createdAt": created_at, "count": count}
+        payload["delta" if is_delta(record) else "leaderboard"] = record
+        body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        path = self._snapshot_path(name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+        metrics.SNAPSHOT_WRITE_BYTES.observe(len(body))
+        self._snapshots().add(snapshot_entry(name, code, created_at, count, body, _human_timestamp(created_at)))
+
+    def get_snapshot(self, name: str) -> Optional[Tuple[str, Optional[str], Any]]:
+        path = self._snapshot_path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        record = data["delta"] if "delta" in data else (data.get("leaderboard") or [])
+        return data.get("code"), data.get("createdAt"), record
+
+    def _has_snapshot(self, name: str) -> bool:
+        return os.path.exists(self._snapshot_path(name))
+
+    def _drop_snapshots(self, code: str, names: List[str]) -> int:
+        deleted = 0
+        for name in names:
+            try:
+                os.remove(self._snapshot_path(name))
+                deleted += 1
+            except FileNotFoundError:
+                continue
+        self._snapshots().remove(code, names)
+        return deleted
+
+    def list_leaderboard_snapshots(self, code: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        items = self._snapshots().entries(str(code).upper() if code else None)
+        end = None if limit is None else offset + limit
+        return items[offset:end]
+
+    def count_leaderboard_snapshots(self, code: Optional[str] = None) -> int:
+        return len(self._snapshots().entries(str(code).upper() if code else None))
+
+    def delete_leaderboard_snapshots(self, code: Optional[str] = None) -> int:
+        """Delete leaderboard snapshots. If code is provided, only delete for that code.
+        Returns the number of files deleted.
+        """
+        ldir = self._leaderboard_dir()
+        if not os.path.isdir(ldir):
+            return 0
+        self._chains.forget(str(code).upper() if code else None)
+        if code:
+            code = str(code).upper()
+            return self._drop_snapshots(code, [e["name"] for e in self._snapshots().entries(code)])
+        deleted = 0
+        for name in os.listdir(ldir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                os.remove(os.path.join(ldir, name))
+                deleted += 1
+            except FileNotFoundError:
+                continue
+        self._snapshots().clear()
+        return deleted
+
+
+def _describe_snapshot_file(file_name: str, body: bytes) -> Dict:
+    data = json.loads(body)
+    name = file_name[:-5]
+    created_at = data.get("createdAt")
+    code = data.get("code") or name.rsplit("_", 2)[0]
+    count = data["count"] if "count" in data else len(data.get("leaderboard") or [])
+    return snapshot_entry(name, str(code).upper(), created_at, count, body, _human_timestamp(created_at))
+
+
+# --- Backend selection ---
+_backend: Optional[StorageBackend] = None
+
+
+def create_backend(kind: Optional[str] = None) -> StorageBackend:
+    kind = (kind or os.getenv("QUIZ_STORAGE", "json")).strip().lower()
+    if kind == "sqlite":
+        from .sqlite_storage import SqliteBackend
+        return SqliteBackend(os.getenv("QUIZ_SQLITE_PATH") or os.path.join(get_data_dir(), "quizzer.db"))
+    if kind == "json":
+        return JsonFileBackend()
+    raise ValueError(f"Unknown QUIZ_STORAGE backend: {kind}")
+
+
+def get_backend() -> StorageBackend:
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend: Optional[StorageBackend]) -> None:
+    """Swap the active backend (None re-reads QUIZ_STORAGE on next use)."""
+    global _backend
+    if _backend is not None and _backend is not backend:
+        _backend.close()
+    _backend = backend
 
-def delete_session(code: str) -> None:
-    path = _session_path(code)
-    if os.path.exists(path):
-        os.remove(path)
 
+def save_session_dict(code: str, data: Dict) -> None:
+    t0 = time.perf_counter()
+    get_backend().save_session_dict(code, data)
+    metrics.SESSION_SAVE_SECONDS.observe(time.perf_counter() - t0)
 
-# --- Question set (bank) helpers ---
-def _sanitized_name(name: str) -> str:
-    # allow alnum, dash, underscore only; lowercased
-    safe = ''.join(ch for ch in name if ch.isalnum() or ch in ('-', '_')).strip('-_').lower()
-    return safe or 'untitled'
+
+def saves_players() -> bool:
+    return get_backend().saves_players
+
+
+def save_players(code: str, players: List[Dict], head: Optional[Dict] = None) -> None:
+    t0 = time.perf_counter()
+    get_backend().save_players(code, players, head)
+    metrics.SESSION_SAVE_SECONDS.observe(time.perf_counter() - t0)
+
+
+def load_session_dict(code: str) -> Dict | None:
+    return get_backend().load_session_dict(code)
 
 
-def _qset_path(name: str) -> str:
-    base = get_data_dir()
-    return os.path.join(base, "question_sets", f"{_sanitized_name(name)}.json")
+def load_all_session_dicts() -> Dict[str, Dict]:
+    return get_backend().load_all_session_dicts()
+
+
+def list_session_codes() -> List[str]:
+    return get_backend().list_session_codes()
+
+
+def delete_session(code: str) -> None:
+    get_backend().delete_session(code)
 
 
 def save_question_set(name: str, questions: List[Dict]) -> str:
-    path = _qset_path(name)
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(questions, f, indent=2, ensure_ascii=False)
-    os.replace(tmp, path)
-    return os.path.basename(path)
+    return get_backend().save_question_set(name, questions)
 
 
 def load_question_set(name: str) -> Optional[List[Dict]]:
-    path = _qset_path(name)
-    if not os.path.exists(path):
-        return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_backend().load_question_set(name)
+
+
+def read_question_set(name: str) -> Optional[Tuple[Dict, List[Dict]]]:
+    return get_backend().read_question_set(name)
+
+
+def question_set_meta(name: str) -> Optional[Dict]:
+    return get_backend().question_set_meta(name)
 
 
 def list_question_sets() -> List[Tuple[str, int]]:
-    base = get_data_dir()
-    qdir = os.path.join(base, "question_sets")
-    out: List[Tuple[str, int]] = []
-    if not os.path.isdir(qdir):
-        return out
-    for name in os.listdir(qdir):
-        if not name.endswith('.json'):
-            continue
-        filepath = os.path.join(qdir, name)
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                arr = json.load(f)
-                count = len(arr) if isinstance(arr, list) else 0
-        except Exception:
-            count = 0
-        out.append((name[:-5], count))
-    # sort by name
-    out.sort(key=lambda t: t[0])
-    return out
+    return get_backend().list_question_sets()
 
 
-def delete_question_set(name: str) -> bool:
-    path = _qset_path(name)
-    if os.path.exists(path):
-        os.remove(path)
-        return True
-    return False
+def list_question_set_meta() -> List[Dict]:
+    return get_backend().list_question_set_meta()
 
 
-# --- Leaderboard snapshots ---
-def _leaderboard_dir() -> str:
-    return os.path.join(get_data_dir(), "leaderboards")
+def delete_question_set(name: str) -> bool:
+    return get_backend().delete_question_set(name)
 
 
 def save_leaderboard_snapshot(code: str, leaderboard: List[Dict]) -> str:
-    import datetime as _dt
-    code = str(code).upper()
-    ts = _dt.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    fname = f"{code}_{ts}.json"
-    path = os.path.join(_leaderboard_dir(), fname)
-    tmp = path + ".tmp"
-    payload = {"code": code, "createdAt": ts, "leaderboard": leaderboard}
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2, ensure_ascii=False)
-    os.replace(tmp, path)
-    return fname
-
-
-def list_leaderboard_snapshots(code: Optional[str] = None) -> List[Dict]:
-    items: List[Dict] = []
-    ldir = _leaderboard_dir()
-    if not os.path.isdir(ldir):
-        return items
-    for name in os.listdir(ldir):
-        if not name.endswith('.json'):
-            continue
-        if code and not name.upper().startswith(str(code).upper() + '_'):
-            continue
-        try:
-            with open(os.path.join(ldir, name), 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            created_at = data.get("createdAt")
-            created_human = None
-            if isinstance(created_at, str):
-                try:
-                    import datetime as _dt
-                    dt = _dt.datetime.strptime(created_at, "%Y%m%d_%H%M%S")
-                    created_human = dt.strftime("%Y-%m-%d %H:%M:%S UTC")
-                except Exception:
-                    created_human = created_at
-            items.append({
-                "name": name[:-5],
-                "file": name,
-                "createdAt": created_at,
-                "createdAtHuman": created_human,
-                "count": len(data.get("leaderboard") or []),
-                "code": data.get("code"),
-            })
-        except Exception:
-            continue
-    # newest first
-    items.sort(key=lambda d: d.get("file"), reverse=True)
-    return items
+    t0 = time.perf_counter()
+    name = get_backend().save_leaderboard_snapshot(code, leaderboard)
+    metrics.SNAPSHOT_WRITE_SECONDS.observe(time.perf_counter() - t0)
+    return name
+
+
+def list_leaderboard_snapshots(code: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+    return get_backend().list_leaderboard_snapshots(code, offset, limit)
+
+
+def count_leaderboard_snapshots(code: Optional[str] = None) -> int:
+    return get_backend().count_leaderboard_snapshots(code)
 
 
 def load_leaderboard_snapshot(file_name: str) -> Optional[Dict]:
-    ldir = _leaderboard_dir()
-    path = os.path.join(ldir, file_name if file_name.endswith('.json') else file_name + '.json')
-    if not os.path.exists(path):
-        return None
-    with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return get_backend().load_leaderboard_snapshot(file_name)
 
 
 def delete_leaderboard_snapshots(code: Optional[str] = None) -> int:
-    """Delete leaderboard snapshots. If code is provided, only delete for that code.
-    Returns the number of files deleted.
-    """
-    ldir = _leaderboard_dir()
-    if not os.path.isdir(ldir):
-        return 0
-    deleted = 0
-    prefix = (str(code).upper() + "_") if code else None
-    for name in list(os.listdir(ldir)):
-        if not name.endswith('.json'):
-            continue
-        if prefix and not name.upper().startswith(prefix):
-            continue
-        try:
-            os.remove(os.path.join(ldir, name))
-            deleted += 1
-        except Exception:
-            continue
-    return deleted
+    return get_backend().delete_leaderboard_snapshots(code)
+
+
+def compact_leaderboard_snapshots(code: str, keep: int) -> int:
+    return get_backend().compact_leaderboard_snapshots(code, keep)
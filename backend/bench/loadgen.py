@@ -0,0 +1,459 @@
+"""Load generator: simulated players and an admin driving a quiz over HTTP + Socket.IO.
+
+Usage:
+    python -m backend.bench.loadgen [--players N] [--questions Q] [--out FILE]
+                                    [--url URL | --in-process] [--workers W]
+
+Each player goes through the same flow as the frontend: register over HTTP,
+join_quiz, submit_answer on every question and wait for reveal/answer_result.
+The admin starts the quiz, reveals each question and moves on with next. At the
+end a share of the players reconnect (disconnect, connect, join_quiz).
+
+By default a server is started on a free localhost port with a throwaway data
+directory (`uvicorn backend.app.main:asgi_app`, or the cluster launcher with
+--workers). --in-process runs the app inside this process instead, and --url
+targets a server that is already running. Its server CPU is not measured.
+
+Reported latencies (p50/p95/p99/max, in ms):
+    register        POST /register round trip
+    join            join_quiz until "joined"
+    answer_lock     submit_answer until "answer_locked"
+    reveal_result   reveal request until each player's "answer_result"
+    reveal_fanout   reveal request until the last player's "answer_result" (one per question)
+    reconnect       connect + join_quiz until "joined"
+    clock_rtt       clock_ping until "clock_pong" (--clock-pings exchanges per join)
+
+Requests the server sheds (answer_rejected "busy", retry_after, HTTP 429) are
+retried after the delay it asks for, so their latency includes the wait; the
+number of such replies is reported as "shed".
+
+Results are written as JSON (--out, default loadgen-<timestamp>.json). Compare two
+runs with `python -m backend.bench.loadgen --compare OLD.json NEW.json`.
+Needs aiohttp (the Socket.IO client transport).
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+import socketio
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SOCKET_PATH = "/ws/socket.io"
+
+
+def percentiles(samples: List[float]) -> Dict:
+    if not samples:
+        return {"n": 0}
+    s = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(s[min(len(s) - 1, int(q * len(s)))], 3)
+
+    return {"n": len(s), "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(s[-1], 3)}
+
+
+def _cpu_seconds(pid: int) -> Optional[float]:
+    """utime + stime of `pid` and its descendants, from /proc (Linux only)."""
+    tick = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    stats: Dict[int, tuple] = {}
+    try:
+        for name in os.listdir("/proc"):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{name}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            # after "comm)": state ppid ... utime(12) stime(13)
+            stats[int(name)] = (int(fields[1]), int(fields[11]) + int(fields[12]))
+    except OSError:
+        return None
+    if pid not in stats:
+        return None
+    total, todo = 0, [pid]
+    while todo:
+        cur = todo.pop()
+        total += stats[cur][1]
+        todo.extend(p for p, (ppid, _) in stats.items() if ppid == cur)
+    return total / tick
+
+
+class Server:
+    """The server under test: spawned, in-process or external."""
+
+    def __init__(self, args):
+        self.args = args
+        self.url = args.url
+        self.proc: Optional[subprocess.Popen] = None
+        self._uvicorn = None
+        self._task: Optional[asyncio.Task] = None
+        self.mode = "external" if args.url else ("in-process" if args.in_process else "spawn")
+
+    async def start(self) -> None:
+        if self.mode == "external":
+            return
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        env = dict(os.environ, QUIZ_DATA_DIR=self.args.data_dir or tempfile.mkdtemp(prefix="quizbench-"))
+        env.setdefault("ADMIN_SECRET", self.args.token)
+        if self.mode == "in-process":
+            os.environ.update(env)
+            sys.path.insert(0, ROOT)
+            import uvicorn
+            from backend.app.main import asgi_app
+            config = uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning")
+            self._uvicorn = uvicorn.Server(config)
+            self._task = asyncio.create_task(self._uvicorn.serve())
+        else:
+            if self.args.workers > 1:
+                cmd = [sys.executable, "-m", "backend.app.cluster", "--workers", str(self.args.workers), "--port", str(port), "--log-level", "warning"]
+            else:
+                cmd = [sys.executable, "-m", "uvicorn", "backend.app.main:asgi_app", "--port", str(port), "--log-level", "warning"]
+            self.proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+        async with aiohttp.ClientSession() as http:
+            for _ in range(200):
+                try:
+                    async with http.get(self.url + "/health") as r:
+                        if r.status == 200:
+                            return
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.1)
+        raise SystemExit(f"server at {self.url} did not come up")
+
+    def cpu_seconds(self) -> Optional[float]:
+        if self.mode == "spawn" and self.proc is not None:
+            return _cpu_seconds(self.proc.pid)
+        if self.mode == "in-process":
+            # includes the simulated clients, which share this process
+            return time.process_time()
+        return None
+
+    async def stop(self) -> None:
+        if self._uvicorn is not None:
+            self._uvicorn.should_exit = True
+            await self._task
+        if self.proc is not None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+class Stats:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = {k: [] for k in ("register", "join", "answer_lock", "reveal_result", "reveal_fanout", "reconnect", "clock_rtt")}
+        self.errors: Dict[str, int] = {}
+        self.received = 0
+        self.shed = 0  # answer_rejected(busy) / retry_after / 429 replies, each retried
+
+    def add(self, name: str, ms: float) -> None:
+        self.latency[name].append(ms)
+
+    def error(self, name: str) -> None:
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+
+class SimPlayer:
+    def __init__(self, n: int, bench: "Bench"):
+        self.n = n
+        self.bench = bench
+        self.pid: Optional[str] = None
+        self.sio: Optional[socketio.AsyncClient] = None
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._sent: Dict[str, Dict] = {}  # last payload per event, resent on retry_after
+        self.results: List[float] = []
+
+    def _wait(self, event: str) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters[event] = fut
+        return fut
+
+    def _fire(self, event: str, data=None) -> None:
+        self.bench.stats.received += 1
+        fut = self._waiters.pop(event, None)
+        if fut is not None and not fut.done():
+            fut.set_result(data)
+
+    async def register(self, http: aiohttp.ClientSession) -> None:
+        t0 = time.perf_counter()
+        body = {"name": f"bench{self.n}", "email": f"bench{self.n}@load.test"}
+        while True:
+            async with http.post(self.bench.quiz_api("/register"), json=body) as r:
+                if r.status == 429:
+                    self.bench.stats.shed += 1
+                    await asyncio.sleep(float(r.headers.get("Retry-After") or 1))
+                    continue
+                r.raise_for_status()
+                self.pid = (await r.json())["playerId"]
+                break
+        self.bench.stats.add("register", (time.perf_counter() - t0) * 1000)
+
+    async def connect(self, stat: str) -> None:
+        sio = socketio.AsyncClient(reconnection=False)
+        self.sio = sio
+        sio.on("*", self._on_any)
+        t0 = time.perf_counter()
+        joined = self._wait("joined")
+        await sio.connect(self.bench.url, socketio_path=SOCKET_PATH, transports=["websocket"])
+        await self._emit("join_quiz", {"code": self.bench.code, "name": f"bench{self.n}", "playerId": self.pid, "email": f"bench{self.n}@load.test"})
+        await asyncio.wait_for(joined, self.bench.args.timeout)
+        self.bench.stats.add(stat, (time.perf_counter() - t0) * 1000)
+        for _ in range(self.bench.args.clock_pings):
+            await self._clock_exchange()
+
+    async def _clock_exchange(self) -> None:
+        pong = self._wait("clock_pong")
+        t0 = time.perf_counter()
+        await self._emit("clock_ping", {"t0": time.time()})
+        reply = await asyncio.wait_for(pong, self.bench.args.timeout)
+        await self.sio.emit("clock_sync", {**reply, "t3": time.time()})
+        self.bench.stats.add("clock_rtt", (time.perf_counter() - t0) * 1000)
+
+    async def _on_any(self, event, data=None):
+        if event == "question" and self.bench.answering:
+            asyncio.create_task(self._answer())
+        elif event == "answer_result":
+            self.results.append(time.perf_counter())
+        elif event == "answer_rejected":
+            reason = (data or {}).get("reason")
+            if reason == "busy":
+                asyncio.create_task(self._retry("submit_answer", data))
+                return
+            self.bench.stats.error(f"answer_rejected_{reason}")
+            fut = self._waiters.pop("answer_locked", None)
+            if fut is not None and not fut.done():
+                fut.set_exception(RuntimeError(reason))
+        elif event == "retry_after":
+            asyncio.create_task(self._retry(data.get("event"), data))
+            return
+        self._fire(event, data)
+
+    async def _emit(self, event: str, data: Dict) -> None:
+        self._sent[event] = data
+        await self.sio.emit(event, data)
+
+    async def _retry(self, event: str, reply: Dict) -> None:
+        self.bench.stats.shed += 1
+        await asyncio.sleep(float(reply.get("retryAfter") or 0.5))
+        if event in self._sent:
+            await self.sio.emit(event, self._sent[event])
+
+    async def _answer(self) -> None:
+        await asyncio.sleep(random.random() * self.bench.args.think)
+        locked = self._wait("answer_locked")
+        t0 = time.perf_counter()
+        try:
+            await self._emit("submit_answer", {"answer": random.choice(["a", "b"])})
+            await asyncio.wait_for(locked, self.bench.args.timeout)
+        except Exception:
+            self.bench.stats.error("answer_lock")
+            return
+        self.bench.stats.add("answer_lock", (time.perf_counter() - t0) * 1000)
+
+    async def disconnect(self) -> None:
+        if self.sio is not None:
+            await self.sio.disconnect()
+
+
+class Bench:
+    def __init__(self, args, server: Server):
+        self.args = args
+        self.server = server
+        self.code = args.code.upper()
+        self.stats = Stats()
+        self.players: List[SimPlayer] = []
+        self.answering = False  # players only answer questions sent while a round is open
+
+    @property
+    def url(self) -> str:
+        return self.server.url
+
+    def quiz_api(self, path: str) -> str:
+        return f"{self.url}/api/quiz/{self.code}{path}"
+
+    def admin_api(self, path: str) -> str:
+        return f"{self.url}/api/admin/quiz/{self.code}{path}"
+
+    async def _bounded(self, items, fn, stat: str) -> None:
+        sem = asyncio.Semaphore(self.args.concurrency)
+
+        async def one(item):
+            async with sem:
+                try:
+                    await fn(item)
+                except Exception:
+                    self.stats.error(stat)
+
+        await asyncio.gather(*(one(i) for i in items))
+
+    async def run(self) -> Dict:
+        args = self.args
+        headers = {"X-Admin-Token": args.token}
+        questions = [
+            {"id": f"q{i}", "text": f"Question {i}", "choices": [{"id": "a", "text": "A"}, {"id": "b", "text": "B"}], "answer": "b", "duration": args.duration}
+            for i in range(args.questions)
+        ]
+        timeline: Dict[str, float] = {}
+        async with aiohttp.ClientSession(headers=headers) as http:
+            async with http.post(f"{self.url}/api/admin/quiz", json={"code": self.code}) as r:
+                r.raise_for_status()
+            async with http.post(self.admin_api("/questions"), json={"questions": questions}) as r:
+                r.raise_for_status()
+            admin = socketio.AsyncClient(reconnection=False)
+            await admin.connect(self.url, socketio_path=SOCKET_PATH, transports=["websocket"])
+            await admin.emit("admin_join", {"token": args.token, "code": self.code})
+
+            self.players = [SimPlayer(i, self) for i in range(args.players)]
+            t0 = time.perf_counter()
+            await self._bounded(self.players, lambda p: p.register(http), "register")
+            await self._bounded([p for p in self.players if p.pid], lambda p: p.connect("join"), "join")
+            timeline["join_s"] = time.perf_counter() - t0
+            live = [p for p in self.players if p.sio is not None and p.sio.connected]
+
+            t_quiz = time.perf_counter()
+            for qi in range(args.questions):
+                for p in live:
+                    p.results.clear()
+                self.answering = True
+                async with http.post(self.admin_api("/start" if qi == 0 else "/next")) as r:
+                    r.raise_for_status()
+                t_question = time.perf_counter()
+                # answers are sent from the "question" handler after up to --think seconds
+                await asyncio.sleep(args.think + args.settle)
+                # answers the server shed are still being retried: give them the question's time
+                while time.perf_counter() - t_question < args.duration and any("answer_locked" in p._waiters for p in live):
+                    await asyncio.sleep(0.01)
+                self.answering = False
+                t_reveal = time.perf_counter()
+                async with http.post(self.admin_api("/reveal")) as r:
+                    r.raise_for_status()
+                deadline = time.perf_counter() + args.timeout
+                while time.perf_counter() < deadline and any(not p.results for p in live):
+                    await asyncio.sleep(0.01)
+                arrivals = [p.results[0] for p in live if p.results]
+                self.stats.errors["reveal_result_missing"] = self.stats.errors.get("reveal_result_missing", 0) + len(live) - len(arrivals)
+                for t in arrivals:
+                    self.stats.add("reveal_result", (t - t_reveal) * 1000)
+                if arrivals:
+                    self.stats.add("reveal_fanout", (max(arrivals) - t_reveal) * 1000)
+            timeline["quiz_s"] = time.perf_counter() - t_quiz
+
+            again = random.sample(live, int(len(live) * args.reconnect))
+            await self._bounded(again, lambda p: p.disconnect(), "disconnect")
+            await self._bounded(again, lambda p: p.connect("reconnect"), "reconnect")
+            timeline["total_s"] = time.perf_counter() - t0
+
+            await self._bounded(self.players, lambda p: p.disconnect(), "disconnect")
+            await admin.disconnect()
+        answers = len(self.stats.latency["answer_lock"])
+        return {
+            "players": len(self.players),
+            "connected": len(live),
+            "timeline": {k: round(v, 3) for k, v in timeline.items()},
+            "latency_ms": {k: percentiles(v) for k, v in self.stats.latency.items()},
+            "throughput": {
+                "registrations_per_s": round(len(self.stats.latency["register"]) / timeline["join_s"], 1) if timeline["join_s"] else None,
+                "answers_per_s": round(answers / timeline["quiz_s"], 1) if timeline["quiz_s"] else None,
+                "events_received_per_s": round(self.stats.received / timeline["total_s"], 1) if timeline["total_s"] else None,
+            },
+            "errors": {k: v for k, v in self.stats.errors.items() if v},
+            "shed": self.stats.shed,
+        }
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+async def _main(args) -> Dict:
+    server = Server(args)
+    await server.start()
+    cpu0, wall0 = server.cpu_seconds(), time.perf_counter()
+    try:
+        result = await Bench(args, server).run()
+    finally:
+        cpu1, wall1 = server.cpu_seconds(), time.perf_counter()
+        await server.stop()
+    cpu = {"mode": server.mode}
+    if cpu0 is not None and cpu1 is not None:
+        cpu["seconds"] = round(cpu1 - cpu0, 3)
+        cpu["percent"] = round(100 * (cpu1 - cpu0) / (wall1 - wall0), 1)
+    result["server_cpu"] = cpu
+    result["meta"] = {
+        "commit": _git_rev(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "mode": server.mode,
+        "workers": args.workers,
+        "questions": args.questions,
+        "think": args.think,
+    }
+    return result
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'metric':<28}{'old':>12}{'new':>12}{'change':>10}")
+    for name, stats in new.get("latency_ms", {}).items():
+        for q in ("p50", "p95", "p99"):
+            a, b = old.get("latency_ms", {}).get(name, {}).get(q), stats.get(q)
+            if a is None or b is None:
+                continue
+            change = f"{(b - a) / a * 100:+.0f}%" if a else ""
+            print(f"{name + ' ' + q:<28}{a:>12.1f}{b:>12.1f}{change:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate players against the quiz server and report latencies")
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--duration", type=int, default=30, help="question duration in seconds")
+    parser.add_argument("--think", type=float, default=2.0, help="players answer within this many seconds of a question")
+    parser.add_argument("--settle", type=float, default=1.0, help="extra seconds before the admin reveals")
+    parser.add_argument("--reconnect", type=float, default=0.1, help="share of players that reconnect at the end")
+    parser.add_argument("--concurrency", type=int, default=200, help="registrations/connects in flight at once")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--clock-pings", type=int, default=0, help="clock sync exchanges per player after each join")
+    parser.add_argument("--code", default="BENCH", help="quiz code to create and use")
+    parser.add_argument("--token", default=os.getenv("ADMIN_SECRET", "changeme"))
+    parser.add_argument("--url", default=None, help="use a running server instead of starting one")
+    parser.add_argument("--in-process", action="store_true", help="run the app inside this process")
+    parser.add_argument("--workers", type=int, default=1, help="start the cluster launcher with N workers")
+    parser.add_argument("--data-dir", default=None, help="data directory for a started server (default: temp dir)")
+    parser.add_argument("--out", default=None, help="JSON result file (default: loadgen-<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+    result = asyncio.run(_main(args))
+    out = args.out or time.strftime("loadgen-%Y%m%d-%H%M%S.json")
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps({k: result[k] for k in ("latency_ms", "throughput", "server_cpu", "errors")}, indent=2))
+    print(f"Wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
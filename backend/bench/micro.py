@@ -0,0 +1,253 @@
+"""Microbenchmarks for backend hot paths, with time-vs-N scaling curves.
+
+Usage:
+    python -m backend.bench.micro [--sizes 100,1000,10000,50000] [--only NAME,...]
+                                  [--max-exponent 1.3] [--baseline FILE] [--tolerance 1.5]
+                                  [--save FILE]
+
+Every benchmark builds a synthetic session of N players (registered, all of them
+answering the current question) in a throwaway data directory. Socket.IO emits
+are stubbed out, so only the server-side work is timed; per-player fan-out still
+encodes its packets. The garbage collector is paused while a run is timed, as
+timeit does. For each benchmark the suite prints the median time per size
+and the scaling exponent k of time ~ N^k between the two largest sizes
+(0 = flat, 1 = linear, 2 = quadratic).
+
+The run fails (exit status 1) when
+  * an exponent exceeds the benchmark's limit (--max-exponent, or the lower
+    per-benchmark limit for the ones that must stay flat), or
+  * with --baseline, a time is more than --tolerance times the baseline's
+    (sizes whose baseline is under 1ms are skipped as noise).
+--save writes the results as JSON for later use as a baseline.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+os.environ.setdefault("QUIZ_DATA_DIR", tempfile.mkdtemp(prefix="quizmicro-"))
+os.environ.setdefault("QUIZ_PERSIST_DELAY", "3600")  # nothing is flushed behind the benchmark's back
+sys.path.insert(0, ROOT)
+
+from backend.app import main as app_main  # noqa: E402
+from backend.app import storage  # noqa: E402
+
+# A benchmark: setup(n) -> async callable timed once per repeat (fresh setup each time).
+Setup = Callable[[int], Awaitable[Callable[[], Awaitable[None]]]]
+
+
+async def _noop(*args, **kwargs) -> None:
+    return None
+
+
+def _stub_emits() -> None:
+    sio = app_main.sio
+    sio.emit = _noop
+    sio.eio.send_packet = _noop
+    # every player counts as connected locally, so fan-out takes its encode path
+    sio.manager.eio_sid_from_sid = lambda sid, namespace=None: sid
+
+
+def _session(n: int, code: str = "MICRO", answered: bool = True) -> "app_main.QuizSession":
+    """Quiz with n connected players on question 0; everyone has answered."""
+    session = app_main.QuizSession(code=code)
+    session.set_questions([
+        app_main.Question(id="q0", text="q", choices=[app_main.Choice(id="a", text="A"), app_main.Choice(id="b", text="B")], answer="b", duration=30),
+    ])
+    app_main.SESSIONS[code] = session
+    app_main.ACTIVE_PLAYER_SOCKETS.clear()
+    for i in range(n):
+        pid = f"p{i:06d}"
+        player = app_main.Player(id=pid, name=f"player {i}", email=f"p{i}@micro.test", participant_code=f"p{i}@micro.test", score=(i * 7919) % 5000)
+        session.players[pid] = player
+        session.ranking.update(player)
+        session.index_email(player)
+        app_main.ACTIVE_PLAYER_SOCKETS[pid] = f"sid{i}"
+    session.current_index = 0
+    session.is_active = True
+    session.question_started_at = time.time() - 10
+    if answered:
+        t = session.question_started_at
+        for i, pid in enumerate(session.players):
+            session.lock_answer(pid, "b" if i % 3 else "a", t + i * 1e-4)
+    return session
+
+
+async def bench_leaderboard_rows(n: int):
+    session = _session(n, answered=False)
+
+    async def run():
+        session.ranking.rows()
+    return run
+
+
+async def bench_leaderboard_broadcast(n: int):
+    session = _session(n, answered=False)
+
+    async def run():
+        await app_main._broadcast_leaderboard(session, admin_rows=session.ranking.rows())
+    return run
+
+
+async def bench_reveal_answers(n: int):
+    session = _session(n)
+
+    async def run():
+        await app_main._reveal_answers(session)
+    return run
+
+
+async def bench_emit_answers_progress(n: int):
+    session = _session(n)
+
+    async def run():
+        await app_main._emit_answers_progress(session)
+    return run
+
+
+REGISTER_BATCH = 200
+_register_round = [0]
+
+
+async def bench_register_user(n: int):
+    # time per registration into a quiz that already has n players; fresh emails every
+    # round so the per-email admission bucket never throttles the benchmark
+    _session(n, answered=False)
+    _register_round[0] += 1
+    r = _register_round[0]
+    payloads = [app_main.RegisterPayload(name=f"new {i}", email=f"new{r}.{i}@micro.test") for i in range(REGISTER_BATCH)]
+
+    async def run():
+        for payload in payloads:
+            await app_main.register_user("MICRO", payload)
+    return run
+
+
+async def bench_save_session_dict(n: int):
+    data = _session(n).model_dump()
+
+    async def run():
+        storage.save_session_dict("MICRO", data)
+    return run
+
+
+async def bench_list_leaderboard_snapshots(n: int):
+    # n/100 stored snapshots of a small quiz; lists the newest page
+    code = f"SNAP{n}"
+    storage.delete_leaderboard_snapshots(code)
+    rows = _session(10, code=code, answered=False).ranking.rows()
+    for _ in range(max(1, n // 100)):
+        storage.save_leaderboard_snapshot(code, rows)
+
+    async def run():
+        storage.list_leaderboard_snapshots(code, limit=50)
+    return run
+
+
+# name -> (setup, max exponent, time divisor reported per op)
+BENCHMARKS: Dict[str, Tuple[Setup, Optional[float], int]] = {
+    "leaderboard_rows": (bench_leaderboard_rows, None, 1),
+    "leaderboard_broadcast": (bench_leaderboard_broadcast, None, 1),
+    "reveal_answers": (bench_reveal_answers, None, 1),
+    "emit_answers_progress": (bench_emit_answers_progress, None, 1),
+    "register_user": (bench_register_user, 0.5, REGISTER_BATCH),
+    "save_session_dict": (bench_save_session_dict, None, 1),
+    "list_leaderboard_snapshots": (bench_list_leaderboard_snapshots, None, 1),
+}
+
+
+def _repeats(n: int) -> int:
+    return 7 if n <= 1000 else 5 if n <= 10000 else 3
+
+
+async def run_suite(names: List[str], sizes: List[int]) -> Dict[str, Dict[str, float]]:
+    _stub_emits()
+    results: Dict[str, Dict[str, float]] = {}
+    for name in names:
+        setup, _limit, per = BENCHMARKS[name]
+        results[name] = {}
+        for n in sizes:
+            times = []
+            for _ in range(_repeats(n)):
+                run = await setup(n)
+                # as timeit does: a collection triggered by earlier setups' garbage
+                # would land in whichever run happens to cross the threshold
+                gc.collect()
+                gc.disable()
+                try:
+                    t0 = time.perf_counter()
+                    await run()
+                    times.append((time.perf_counter() - t0) * 1000 / per)
+                finally:
+                    gc.enable()
+            results[name][str(n)] = round(statistics.median(times), 4)
+            print(f"  {name:<28} N={n:<7} {results[name][str(n)]:>10.3f} ms", flush=True)
+    return results
+
+
+def exponent(curve: Dict[str, float]) -> Optional[float]:
+    points = sorted((int(n), t) for n, t in curve.items())
+    if len(points) < 2:
+        return None
+    (n1, t1), (n2, t2) = points[-2], points[-1]
+    if t1 <= 0 or t2 <= 0:
+        return None
+    return math.log(t2 / t1) / math.log(n2 / n1)
+
+
+def check(results: Dict[str, Dict[str, float]], max_exponent: float, baseline: Optional[Dict], tolerance: float) -> List[str]:
+    failures = []
+    print(f"\n{'benchmark':<28}" + "".join(f"{'N=' + n:>12}" for n in next(iter(results.values()))) + f"{'exponent':>10}")
+    for name, curve in results.items():
+        k = exponent(curve)
+        limit = BENCHMARKS[name][1] if BENCHMARKS[name][1] is not None else max_exponent
+        print(f"{name:<28}" + "".join(f"{t:>12.3f}" for t in curve.values()) + (f"{k:>10.2f}" if k is not None else f"{'-':>10}"))
+        if k is not None and k > limit:
+            failures.append(f"{name}: time grows as N^{k:.2f} (limit N^{limit})")
+        for n, t in curve.items():
+            base = ((baseline or {}).get("results", {}).get(name) or {}).get(n)
+            if base is not None and base >= 1.0 and t > base * tolerance:
+                failures.append(f"{name} N={n}: {t:.2f}ms vs baseline {base:.2f}ms (> x{tolerance})")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time backend hot paths at increasing player counts")
+    parser.add_argument("--sizes", default="100,1000,10000,50000", help="comma-separated player counts")
+    parser.add_argument("--only", default=None, help="comma-separated benchmark names (default: all)")
+    parser.add_argument("--max-exponent", type=float, default=1.3, help="fail when time grows faster than N^k")
+    parser.add_argument("--baseline", default=None, help="results JSON from an earlier --save")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor against --baseline")
+    parser.add_argument("--save", default=None, help="write results JSON here")
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+    names = [s.strip() for s in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = [s for s in names if s not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}; choose from {', '.join(BENCHMARKS)}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    results = asyncio.run(run_suite(names, sizes))
+    failures = check(results, args.max_exponent, baseline, args.tolerance)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"sizes": sizes, "results": results}, f, indent=2)
+    if failures:
+        print("\nFAILED:\n  " + "\n  ".join(failures))
+        raise SystemExit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,3 +22,18 @@ export function api(path: string) {
   const p = path.startsWith('/') ? path : '/' + path
   return `${API_BASE}${p}`
 }
+
+// Quiz session from the ?code= query param; unset => the default global quiz
+const rawQuizCode = new URLSearchParams(window.location.search).get('code') ?? ''
+export const QUIZ_CODE: string | null = rawQuizCode.trim().toUpperCase() || null
+
+// Per-session API paths: adminApi('/start') => /api/admin/quiz/<CODE>/start (or /api/admin/start)
+export function adminApi(path: string, code: string | null = QUIZ_CODE) {
+  const p = path.startsWith('/') ? path : '/' + path
+  return api(code ? `/api/admin/quiz/${encodeURIComponent(code)}${p}` : `/api/admin${p}`)
+}
+
+export function quizApi(path: string, code: string | null = QUIZ_CODE) {
+  const p = path.startsWith('/') ? path : '/' + path
+  return api(code ? `/api/quiz/${encodeURIComponent(code)}${p}` : `/api/quiz${p}`)
+}
@@ -1,6 +1,6 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { io, Socket } from 'socket.io-client'
-import { api, SOCKET_URL, SOCKET_PATH } from '../config'
+import { api, adminApi, QUIZ_CODE, SOCKET_URL, SOCKET_PATH } from '../config'
 
 type LifelinesState = { '5050': boolean; hint: boolean }
 
@@ -25,6 +25,8 @@ export default function Admin() {
   const [lifelines, setLifelines] = useState<LifelinesState>({ '5050': true, hint: true })
   const [logs, setLogs] = useState<string[]>([])
   const [lockedStats, setLockedStats] = useState<{ lockedCount: number; playersCount: number; locked: { id: string; name: string }[]; unlocked?: { id: string; name: string }[]; players?: { id: string; name: string }[] } | null>(null)
+  // Answers-progress protocol position: full snapshot sets it, deltas must continue from it
+  const progressRef = useRef<{ epoch: number; version: number } | null>(null)
   const [busy, setBusy] = useState(false)
   const [allowedEmailsText, setAllowedEmailsText] = useState('')
   const [allowedEmails, setAllowedEmails] = useState<string[]>([])
@@ -42,7 +44,7 @@ export default function Admin() {
   const s = io(SOCKET_URL, { path: SOCKET_PATH, transports: ['websocket'] })
     s.on('connect', () => {
       setConnected(true)
-      s.emit('admin_join', { token }) // global quiz (code omitted)
+      s.emit('admin_join', { token, code: QUIZ_CODE }) // code omitted => global quiz
       appendLog('Socket connected')
       refreshParticipants()
       loadAllowed()
@@ -54,20 +56,41 @@ export default function Admin() {
     s.on('leaderboard', (lb) => { setLeaderboard(lb) })
   s.on('status', (st) => setStatus(st))
     s.on('answers_progress', (p) => {
+      progressRef.current = { epoch: p.epoch ?? 0, version: p.version ?? 0 }
       setLockedStats(p)
       appendLog(`Locked ${p.lockedCount}/${p.playersCount}`)
       refreshParticipants()
     })
+    s.on('answers_progress_delta', (d) => {
+      const pos = progressRef.current
+      // Missed a batch or the question changed: ask for a fresh snapshot
+      if (!pos || d.epoch !== pos.epoch || d.fromVersion > pos.version) {
+        s.emit('answers_progress_sync')
+        return
+      }
+      const newLocked = (d.locked || []).filter((x: any) => x.v > pos.version).map((x: any) => ({ id: x.id, name: x.name }))
+      const newPlayers = (d.players || []).filter((x: any) => x.v > pos.version).map((x: any) => ({ id: x.id, name: x.name }))
+      progressRef.current = { epoch: d.epoch, version: d.version }
+      setLockedStats(prev => {
+        if (!prev) return prev
+        const lockedIds = new Set(newLocked.map((x: any) => x.id))
+        const players = [...(prev.players || []), ...newPlayers]
+        const unlocked = [...(prev.unlocked || []), ...newPlayers].filter(pl => !lockedIds.has(pl.id))
+        return { ...prev, lockedCount: d.lockedCount, playersCount: d.playersCount, locked: [...prev.locked, ...newLocked], players, unlocked }
+      })
+      if (newLocked.length) appendLog(`Answers locked: ${newLocked.map((x: any) => x.name).join(', ')} (${d.lockedCount}/${d.playersCount})`)
+      if (newPlayers.length) appendLog(`Registered: ${newPlayers.map((x: any) => x.name).join(', ')}`)
+    })
     s.on('lifelines', (lf) => setLifelines(lf))
-  s.on('answer_submitted', (ans) => { appendLog(`Answer locked: ${ans.name}`); refreshParticipants() })
     s.on('lifeline_used', (lf) => appendLog(`Lifeline: ${lf.name} used ${lf.lifeline}`))
+    s.on('fanout', (f) => { if (typeof f?.ms === 'number') appendLog(`Sent ${f.event} to ${f.sent}/${f.total} players in ${Math.round(f.ms)} ms`) })
     s.on('question', (q) => appendLog(`Question broadcast: ${q.text}`))
     setSocket(s)
   }
 
   async function refreshParticipants() {
     try {
-  const r = await fetch(api('/api/admin/leaderboard'), { headers: { 'X-Admin-Token': token } })
+  const r = await fetch(adminApi('/leaderboard'), { headers: { 'X-Admin-Token': token } })
       if (r.ok) {
         const data = await r.json()
         setParticipants(Array.isArray(data) ? data : [])
@@ -76,8 +99,8 @@ export default function Admin() {
   }
 
   async function ensureSession() {
-    // Create/ensure global session exists (idempotent)
-  await fetch(api('/api/admin/quiz'), { method: 'POST', headers: { 'X-Admin-Token': token } })
+    // Create/ensure this session (or the global one) exists (idempotent)
+  await fetch(api('/api/admin/quiz'), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify(QUIZ_CODE ? { code: QUIZ_CODE } : {}) })
   }
 
   async function uploadQuestions() {
@@ -85,7 +108,7 @@ export default function Admin() {
     try {
       await ensureSession()
       const questions = JSON.parse(questionJson)
-  const r = await fetch(api(`/api/admin/questions`), {
+  const r = await fetch(adminApi(`/questions`), {
         method: 'POST',
         headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token },
         body: JSON.stringify({ questions }),
@@ -125,12 +148,12 @@ export default function Admin() {
 
   async function applyQset(name: string) {
     await ensureSession()
-  const r = await fetch(api('/api/admin/question_sets/apply'), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify({ name }) })
+  const r = await fetch(adminApi('/question_sets/apply'), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify({ name }) })
   if (r.ok) { const d = await r.json(); appendLog(`Applied set '${name}' (${d.count} questions)`); loadCurrentQuestions() }
   }
 
   async function exportCurrent() {
-  const r = await fetch(api('/api/admin/questions/export'), { method: 'POST', headers: { 'X-Admin-Token': token } })
+  const r = await fetch(adminApi('/questions/export'), { method: 'POST', headers: { 'X-Admin-Token': token } })
     if (r.ok) {
       const data = await r.json()
       setQuestionJson(JSON.stringify(data.questions, null, 2))
@@ -139,7 +162,7 @@ export default function Admin() {
   }
 
   async function listSnapshots() {
-    const r = await fetch(api('/api/admin/leaderboard/snapshots'), { headers: { 'X-Admin-Token': token } })
+    const r = await fetch(adminApi('/leaderboard/snapshots'), { headers: { 'X-Admin-Token': token } })
     if (r.ok) {
       const data = await r.json()
       setSnapshots(data.items || [])
@@ -149,7 +172,7 @@ export default function Admin() {
 
   async function loadCurrentQuestions() {
     try {
-      const r = await fetch(api('/api/admin/questions/export'), { method: 'POST', headers: { 'X-Admin-Token': token } })
+      const r = await fetch(adminApi('/questions/export'), { method: 'POST', headers: { 'X-Admin-Token': token } })
       if (r.ok) {
         const data = await r.json()
         const arr = Array.isArray(data.questions) ? data.questions : []
@@ -159,7 +182,7 @@ export default function Admin() {
   }
 
   async function applySnapshot(file: string) {
-    const r = await fetch(api('/api/admin/leaderboard/snapshots/apply'), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify({ file }) })
+    const r = await fetch(adminApi('/leaderboard/snapshots/apply'), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify({ file }) })
     if (r.ok) {
       appendLog('Applied snapshot: ' + file)
     } else {
@@ -170,7 +193,7 @@ export default function Admin() {
   async function disconnectAll() {
     if (!token) return
     if (!confirm('Disconnect all connected clients?')) return
-    const r = await fetch(api('/api/admin/disconnect_all'), { method: 'POST', headers: { 'X-Admin-Token': token } })
+    const r = await fetch(adminApi('/disconnect_all'), { method: 'POST', headers: { 'X-Admin-Token': token } })
     if (r.ok) {
       const d = await r.json().catch(() => ({}))
       appendLog(`Disconnected ${d.disconnected ?? '?'} clients`)
@@ -184,7 +207,7 @@ export default function Admin() {
   async function clearSnapshots() {
     if (!token) return
     if (!confirm('Delete all leaderboard snapshots for the current quiz?')) return
-    const r = await fetch(api('/api/admin/leaderboard/snapshots/clear'), { method: 'POST', headers: { 'X-Admin-Token': token } })
+    const r = await fetch(adminApi('/leaderboard/snapshots/clear'), { method: 'POST', headers: { 'X-Admin-Token': token } })
     if (r.ok) {
       const d = await r.json().catch(() => ({}))
       appendLog(`Deleted ${d.deleted ?? 0} leaderboard snapshots`)
@@ -210,27 +233,27 @@ export default function Admin() {
 
   async function startQuiz() {
     await ensureSession()
-  await fetch(api(`/api/admin/start`), { method: 'POST', headers: { 'X-Admin-Token': token } })
+  await fetch(adminApi(`/start`), { method: 'POST', headers: { 'X-Admin-Token': token } })
     appendLog('Quiz started')
   }
   async function next() {
-  const r = await fetch(api(`/api/admin/next`), { method: 'POST', headers: { 'X-Admin-Token': token } })
+  const r = await fetch(adminApi(`/next`), { method: 'POST', headers: { 'X-Admin-Token': token } })
     if (r.ok) {
       const data = await r.json().catch(() => ({}))
       if (data?.revealed) appendLog('Reveal executed (first press)')
       else appendLog('Advanced to next question')
     }
   }
-  async function pause() { await fetch(api(`/api/admin/pause`), { method: 'POST', headers: { 'X-Admin-Token': token } }); appendLog('Quiz paused/resumed') }
-  async function reset() { await fetch(api(`/api/admin/reset`), { method: 'POST', headers: { 'X-Admin-Token': token } }); appendLog('Quiz reset') }
-  async function reveal() { await fetch(api(`/api/admin/reveal`), { method: 'POST', headers: { 'X-Admin-Token': token } }); appendLog('Reveal triggered') }
-  async function updateLifelines() { await fetch(api(`/api/admin/lifelines`), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify({ lifelines }) }); appendLog('Lifelines updated') }
+  async function pause() { await fetch(adminApi(`/pause`), { method: 'POST', headers: { 'X-Admin-Token': token } }); appendLog('Quiz paused/resumed') }
+  async function reset() { await fetch(adminApi(`/reset`), { method: 'POST', headers: { 'X-Admin-Token': token } }); appendLog('Quiz reset') }
+  async function reveal() { await fetch(adminApi(`/reveal`), { method: 'POST', headers: { 'X-Admin-Token': token } }); appendLog('Reveal triggered') }
+  async function updateLifelines() { await fetch(adminApi(`/lifelines`), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify({ lifelines }) }); appendLog('Lifelines updated') }
 
   async function suddenDeathStart() {
     const n = Number(topN)
     const body: any = {}
     if (Number.isInteger(n) && n > 0) body.topN = n
-    const r = await fetch(api('/api/admin/sudden_death/start'), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify(body) })
+    const r = await fetch(adminApi('/sudden_death/start'), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify(body) })
     if (r.ok) {
       const d = await r.json().catch(() => ({}))
       appendLog(`Sudden death started (allowed ${d.count ?? '?'})`)
@@ -239,12 +262,12 @@ export default function Admin() {
     }
   }
   async function suddenDeathStop() {
-    const r = await fetch(api('/api/admin/sudden_death/stop'), { method: 'POST', headers: { 'X-Admin-Token': token } })
+    const r = await fetch(adminApi('/sudden_death/stop'), { method: 'POST', headers: { 'X-Admin-Token': token } })
     if (r.ok) appendLog('Sudden death stopped')
     else appendLog('Failed to stop sudden death')
   }
   async function fetchFinalResults() {
-    const r = await fetch(api('/api/admin/final_results'), { headers: { 'X-Admin-Token': token } })
+    const r = await fetch(adminApi('/final_results'), { headers: { 'X-Admin-Token': token } })
     if (r.ok) {
       const d = await r.json().catch(() => ({}))
       const top = (d.leaderboard || []).slice(0, 5).map((p: any, i: number) => `${i + 1}. ${p.name} (${p.score}) firsts:${p.firsts} time:${p.cumTime}s`).join(' | ')
@@ -259,7 +282,7 @@ export default function Admin() {
     if (!val) return
     const idx = Number(val)
     if (!Number.isInteger(idx)) { alert('Enter a valid integer index (0-based)'); return }
-    const r = await fetch(api(`/api/admin/goto`), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify({ index: idx }) })
+    const r = await fetch(adminApi(`/goto`), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify({ index: idx }) })
     if (r.ok) {
       const d = await r.json().catch(() => ({}))
       appendLog(`Jumped to question index ${d.index ?? idx}`)
@@ -269,7 +292,7 @@ export default function Admin() {
   }
 
   async function loadAllowed() {
-  const r = await fetch(api('/api/admin/allowed_emails'), { headers: { 'X-Admin-Token': token } })
+  const r = await fetch(adminApi('/allowed_emails'), { headers: { 'X-Admin-Token': token } })
     if (r.ok) {
       const data = await r.json()
   const list = Array.isArray(data.emails) ? data.emails : []
@@ -280,7 +303,7 @@ export default function Admin() {
   }
   async function saveAllowed(mode: string = 'replace') {
     const emails = allowedEmailsText.split(/\n|,/).map(e => e.trim()).filter(Boolean)
-  const r = await fetch(api('/api/admin/allowed_emails'), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify({ emails, mode }) })
+  const r = await fetch(adminApi('/allowed_emails'), { method: 'POST', headers: { 'Content-Type': 'application/json', 'X-Admin-Token': token }, body: JSON.stringify({ emails, mode }) })
     if (r.ok) {
       const data = await r.json()
   setAllowedEmails(data.emails || emails)
@@ -299,7 +322,7 @@ export default function Admin() {
 
   return (
     <div className="max-w-6xl mx-auto p-4 sm:p-8">
-      <h1 className="text-3xl font-bold mb-1">Admin Console (Global Quiz)</h1>
+      <h1 className="text-3xl font-bold mb-1">Admin Console ({QUIZ_CODE ? `Quiz ${QUIZ_CODE}` : 'Global Quiz'})</h1>
       <p className="text-slate-600 mb-4">Steps: 1) Enter admin token 2) (Optional) Load sample & Upload 3) Start 4) Next / Pause / Reveal / Reset.</p>
 
       <section className="border border-slate-200 rounded-xl p-4 mb-4">
@@ -549,10 +572,10 @@ export default function Admin() {
           <button onClick={next} disabled={!token}>Next</button>
           <button onClick={pause} disabled={!token}>Pause/Resume</button>
           <button onClick={reveal} disabled={!token}>Reveal</button>
-          <button onClick={async () => { await fetch(api('/api/admin/leaderboard/show'), { method: 'POST', headers: { 'X-Admin-Token': token } }) }} disabled={!token}>Show Leaderboard</button>
-          <button onClick={async () => { await fetch(api('/api/admin/leaderboard/hide'), { method: 'POST', headers: { 'X-Admin-Token': token } }) }} disabled={!token}>Hide Leaderboard</button>
+          <button onClick={async () => { await fetch(adminApi('/leaderboard/show'), { method: 'POST', headers: { 'X-Admin-Token': token } }) }} disabled={!token}>Show Leaderboard</button>
+          <button onClick={async () => { await fetch(adminApi('/leaderboard/hide'), { method: 'POST', headers: { 'X-Admin-Token': token } }) }} disabled={!token}>Hide Leaderboard</button>
           <button onClick={reset} disabled={!token}>Reset</button>
-          <button onClick={async () => { await fetch(api('/api/admin/leaderboard/reset'), { method: 'POST', headers: { 'X-Admin-Token': token } }); appendLog('Leaderboard reset to zero') }} disabled={!token}>Reset Leaderboard</button>
+          <button onClick={async () => { await fetch(adminApi('/leaderboard/reset'), { method: 'POST', headers: { 'X-Admin-Token': token } }); appendLog('Leaderboard reset to zero') }} disabled={!token}>Reset Leaderboard</button>
           <button onClick={async () => { if (confirm('Full reset will disconnect everyone and clear all sessions. Continue?')) { await fetch(api('/api/admin/full_reset'), { method: 'POST', headers: { 'X-Admin-Token': token } }); appendLog('Full reset executed') } }} disabled={!token}>
             Full Reset (Fresh Start)
           </button>
@@ -1,6 +1,6 @@
 import { useEffect, useRef, useState } from 'react'
 import { io, Socket } from 'socket.io-client'
-import { SOCKET_URL, SOCKET_PATH } from '../config'
+import { QUIZ_CODE, SOCKET_URL, SOCKET_PATH } from '../config'
 
 export default function Display() {
   const [socket, setSocket] = useState<Socket | null>(null)
@@ -16,7 +16,7 @@ export default function Display() {
 
   useEffect(() => {
     const s = io(SOCKET_URL, { path: SOCKET_PATH, transports: ['websocket'] })
-    s.on('connect', () => { s.emit('display_join', {}) })
+    s.on('connect', () => { s.emit('display_join', { code: QUIZ_CODE }) })
     s.on('question', (payload) => {
       const q = payload?.question || payload
       setQuestion(q)
@@ -103,14 +103,13 @@ export default function Display() {
             <div className="lb-table-wrap">
               <table className="lb-table">
                 <thead>
-                  <tr><th className="rank">#</th><th>Name</th><th>Email</th><th className="score">Score</th></tr>
+                  <tr><th className="rank">#</th><th>Name</th><th className="score">Score</th></tr>
                 </thead>
                 <tbody>
                   {leaderboard.map((p, i) => (
                     <tr key={p.id}>
-                      <td className="rank">{i + 1}</td>
+                      <td className="rank">{p.rank ?? i + 1}</td>
                       <td>{p.name}</td>
-                      <td className="email">{p.email || ''}</td>
                       <td className="score">{p.score}</td>
                     </tr>
                   ))}
@@ -145,7 +144,6 @@ export default function Display() {
         .lb-table th, .lb-table td { padding: 12px 16px; border-bottom: 1px solid rgba(255,255,255,0.08); }
         .lb-table td.rank, .lb-table th.rank { width: 60px; text-align: center; }
         .lb-table td.score, .lb-table th.score { text-align: right; width: 140px; }
-        .lb-table td.email { color:#cbd5e1; }
       `}</style>
     </div>
   )
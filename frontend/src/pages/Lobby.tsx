@@ -1,37 +1,48 @@
-import { api } from '../config'
+import { quizApi, QUIZ_CODE } from '../config'
 import { useState } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { BrandLayout, GlassCard, BrandButton, BrandStrip } from '../components/Brand'
 
 export default function Lobby() {
-  // Global quiz - no code needed
+  // Global quiz unless the link carries ?code=
   const [name, setName] = useState('')
   const [email, setEmail] = useState('')
   const [error, setError] = useState<string | null>(null)
   const [loading, setLoading] = useState(false)
   const navigate = useNavigate()
 
+  function register() {
+    return fetch(quizApi('/register'), {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ name, email }),
+    })
+  }
+
   async function handleJoin(e: React.FormEvent) {
     e.preventDefault()
     setError(null)
     setLoading(true)
     try {
-    const vResp = await fetch(api(`/api/quiz/validate`))
+    const vResp = await fetch(quizApi('/validate'))
       if (!vResp.ok) throw new Error('Quiz not available')
       const v = await vResp.json()
       if (!v.valid) throw new Error('Quiz not available')
-    const regResp = await fetch(api(`/api/quiz/register`), {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ name, email }),
-      })
+    let regResp = await register()
+      // 429: the server is shedding a registration burst; wait as told and retry
+      for (let attempt = 0; regResp.status === 429 && attempt < 5; attempt++) {
+        const wait = Number(regResp.headers.get('Retry-After')) || 1
+        await new Promise(r => setTimeout(r, wait * 1000))
+        regResp = await register()
+      }
       if (!regResp.ok) {
         if (regResp.status === 409) throw new Error('Email already registered')
         if (regResp.status === 403) throw new Error('Email not allowed')
+        if (regResp.status === 429) throw new Error('Too many people joining right now, please try again')
         throw new Error('Registration failed')
       }
       const reg = await regResp.json()
-      navigate('/quiz', { state: { name, email, playerId: reg.playerId, participantCode: reg.participantCode } })
+      navigate('/quiz' + window.location.search, { state: { name, email, code: QUIZ_CODE, playerId: reg.playerId, participantCode: reg.participantCode } })
     } catch (err: any) {
       setError(err.message || 'Join failed')
     } finally {
@@ -1,6 +1,6 @@
 import { useEffect, useRef, useState } from 'react'
 import { io, Socket } from 'socket.io-client'
-import { SOCKET_URL, SOCKET_PATH } from '../config'
+import { QUIZ_CODE, SOCKET_URL, SOCKET_PATH } from '../config'
 import { useLocation, useNavigate } from 'react-router-dom'
 import { BrandLayout, GlassCard, BrandButton, BrandStrip } from '../components/Brand'
 
@@ -8,6 +8,7 @@ export default function Quiz() {
   const nav = useNavigate()
   const loc = useLocation() as any
   const { name, email, playerId, participantCode } = loc.state || {}
+  const code: string | null = loc.state?.code ?? QUIZ_CODE
   const [socket, setSocket] = useState<Socket | null>(null)
   const [question, setQuestion] = useState<any>(null)
   const [questionIndex, setQuestionIndex] = useState<number | null>(null)
@@ -15,6 +16,7 @@ export default function Quiz() {
   const [result, setResult] = useState<any>(null)
   const [timeLeft, setTimeLeft] = useState<number>(0)
   const serverSkewRef = useRef<number>(0) // serverTime - clientNow
+  const clockRef = useRef<{ rtt: number, offset: number }[]>([]) // recent clock exchanges (s)
   const [keepIds, setKeepIds] = useState<string[] | null>(null)
   const [hint, setHint] = useState<string | null>(null)
   const [lifelineStatus, setLifelineStatus] = useState<{ [k: string]: boolean }>({ '5050': true, hint: true })
@@ -29,19 +31,39 @@ export default function Quiz() {
   const timerRef = useRef<number | null>(null)
   const [showLB, setShowLB] = useState<boolean>(false)
   const [leaderboard, setLeaderboard] = useState<any[]>([])
+  const [standing, setStanding] = useState<any>(null)
+  const pendingAnswerRef = useRef<string | null>(null) // submitted, not yet locked or rejected
 
   useEffect(() => {
   if (!name || !playerId) {
-      nav('/')
+      nav('/' + window.location.search)
       return
     }
   const s = io(SOCKET_URL, { path: SOCKET_PATH, transports: ['websocket'] })
+    // NTP-style clock exchanges: a few right after joining, then one every 30 s
+    const ping = () => s.emit('clock_ping', { t0: Date.now() / 1000 })
+    const clockTimer = window.setInterval(() => { if (s.connected) ping() }, 30000)
+    s.on('clock_pong', (p) => {
+      const t3 = Date.now() / 1000
+      s.emit('clock_sync', { ...p, t3 })
+      const sample = { rtt: (t3 - p.t0) - (p.t2 - p.t1), offset: ((p.t1 - p.t0) + (p.t2 - t3)) / 2 }
+      clockRef.current = [...clockRef.current.slice(-7), sample]
+      serverSkewRef.current = bestClock()!.offset
+      if (clockRef.current.length < 4) window.setTimeout(ping, 200)
+    })
     s.on('connect', () => {
-      s.emit('join_quiz', { name, playerId, email })
+      s.emit('join_quiz', { code, name, playerId, email })
+    })
+    // server busy: try again after the delay it asked for
+    s.on('retry_after', (r) => {
+      if (r?.event === 'join_quiz') window.setTimeout(() => s.emit('join_quiz', { code, name, playerId, email }), (r.retryAfter ?? 1) * 1000)
     })
   s.on('connect_error', (err) => console.warn('socket connect_error', err.message))
   s.on('error', (err) => console.warn('socket error', err))
     s.on('joined', (j) => {
+      // estimates are kept by the server handling this session: measure again
+      clockRef.current = []
+      ping()
       if (j?.participantCode) {
         setResult((r: any) => ({ ...(r || {}), participantCode: j.participantCode }))
       }
@@ -59,31 +81,39 @@ export default function Quiz() {
         setRevealAnswer(null)
         setRejectedReason(null)
         setRevealed(false)
+        pendingAnswerRef.current = null
     // compute initial time left from server
     const clientNow = Date.now() / 1000
     const serverNow = typeof payload?.serverTime === 'number' ? payload.serverTime : clientNow
-    serverSkewRef.current = serverNow - clientNow
+    const clock = bestClock()
+    serverSkewRef.current = clock ? clock.offset : serverNow - clientNow
     const duration = payload?.duration ?? q?.duration ?? 30
     const startedAt = payload?.startedAt ?? clientNow
     const remaining = typeof payload?.remaining === 'number' ? payload.remaining : Math.max(0, duration - Math.max(0, (serverNow - startedAt)))
-    setTimeLeft(Math.ceil(remaining))
+    setTimeLeft(Math.ceil(Math.max(0, remaining - transit())))
       })
     s.on('status', (st) => {
         setStatus(st)
         if (typeof st?.paused === 'boolean') setPaused(st.paused)
         if (typeof st?.revealed === 'boolean') setRevealed(st.revealed)
         // resync time if provided
-        if (typeof st?.serverTime === 'number') {
+        if (typeof st?.serverTime === 'number' && !bestClock()) {
           const clientNow = Date.now() / 1000
           serverSkewRef.current = st.serverTime - clientNow
         }
         if (typeof st?.remaining === 'number') {
-          setTimeLeft(Math.ceil(st.remaining))
+          setTimeLeft(Math.ceil(Math.max(0, st.remaining - transit())))
         }
       })
     s.on('answer_result', (r) => setResult(r))
-    s.on('answer_locked', (payload) => { setLocked(true); setSubmitting(false); if (payload?.answer) setLockedAnswer(String(payload.answer)) })
+    s.on('answer_locked', (payload) => { pendingAnswerRef.current = null; setLocked(true); setSubmitting(false); if (payload?.answer) setLockedAnswer(String(payload.answer)) })
     s.on('answer_rejected', (r) => {
+        const pending = pendingAnswerRef.current
+        if (r?.reason === 'busy' && pending !== null) {
+          window.setTimeout(() => { if (pendingAnswerRef.current === pending) s.emit('submit_answer', { answer: pending }) }, (r.retryAfter ?? 0.5) * 1000)
+          return
+        }
+        pendingAnswerRef.current = null
         setRejectedReason(r?.reason || 'rejected')
         setSubmitting(false)
         // If we optimistically set a choice, clear it when rejected
@@ -103,17 +133,18 @@ export default function Quiz() {
   s.on('leaderboard', (lb) => setLeaderboard(lb))
   s.on('leaderboard_show', (lb) => { setLeaderboard(lb || []); setShowLB(true) })
   s.on('leaderboard_hide', () => setShowLB(false))
+  s.on('leaderboard_rank', (st) => setStanding(st || null))
     s.on('reset', () => {
       try { s.disconnect() } catch {}
-      nav('/')
+      nav('/' + window.location.search)
     })
     s.on('replaced', () => {
       alert('You were disconnected because another tab connected with your email.')
       s.disconnect()
-      nav('/')
+      nav('/' + window.location.search)
     })
     setSocket(s)
-    return () => { s.disconnect() }
+    return () => { window.clearInterval(clockTimer); s.disconnect() }
   }, [name, playerId])
 
   // countdown synced to server; freeze when paused or revealed
@@ -128,11 +159,24 @@ export default function Quiz() {
     return () => { if (timerRef.current) window.clearTimeout(timerRef.current) }
   }, [timeLeft, paused, revealed])
 
+  // the exchange with the shortest round trip is the least delayed by queues
+  function bestClock() {
+    const samples = clockRef.current
+    return samples.length ? samples.reduce((a, b) => (b.rtt < a.rtt ? b : a)) : null
+  }
+
+  // seconds a server message took to get here (half the round trip)
+  function transit() {
+    const clock = bestClock()
+    return clock ? Math.max(0, clock.rtt) / 2 : 0
+  }
+
   function submitAnswer(answer: string) {
     const disallowed = locked || revealed || paused || submitting || (timeLeft <= 0)
     if (disallowed) return
     setSubmitting(true)
     setLockedAnswer(answer)
+    pendingAnswerRef.current = answer
     socket?.emit('submit_answer', { answer })
   }
 
@@ -259,7 +303,9 @@ export default function Quiz() {
           <div className="flex flex-col h-full">
             <div className="px-4 sm:px-6 py-3 sm:py-4 border-b border-white/10 glass flex items-center justify-between">
               <h3 className="text-2xl font-bold text-white">Leaderboard</h3>
-              <span className="text-sm text-slate-300">Shown by host</span>
+              <span className="text-sm text-slate-300">
+                {standing ? `You: #${standing.rank} of ${standing.total} · ${standing.score} pts` : 'Shown by host'}
+              </span>
             </div>
             <div className="flex-1 overflow-auto p-4 sm:p-6 brand">
               <div className="max-w-4xl mx-auto">
@@ -275,8 +321,8 @@ export default function Quiz() {
                     </thead>
                     <tbody>
                       {leaderboard.map((p, i) => (
-                        <tr key={p.id} className="border-b border-white/5 text-slate-200">
-                          <td className="py-2">{i + 1}</td>
+                        <tr key={p.id} className={`border-b border-white/5 ${p.id === playerId ? 'text-white font-semibold' : 'text-slate-200'}`}>
+                          <td className="py-2">{p.rank ?? i + 1}</td>
                           <td className="py-2">{p.name}</td>
                           <td className="py-2 text-right">{p.score}</td>
                         </tr>